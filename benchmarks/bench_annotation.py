@@ -0,0 +1,71 @@
+# coding: utf-8
+"""Benchmark the propagation of annotations and enrichment analysis.
+
+Random annotations of items to terms are propagated to the ancestors of
+their terms with `Term.rparents`, and with `Ontology.annotate`. Random
+study sets are then tested for over-representation with
+`AnnotationIndex.enrichment`.
+
+Usage:
+    python benchmarks/bench_annotation.py [-a ANNOTATIONS] [-s STUDIES] [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print("{:<28} {:>8.3f} s".format(label, time.time() - start))
+    return result
+
+
+def naive(ontology, annotations):
+    found = {}
+    for item, term in annotations:
+        for other in [ontology[term]] + list(ontology[term].rparents()):
+            found.setdefault(other.id, set()).add(item)
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-a', '--annotations', type=int, default=1000000)
+    parser.add_argument('-i', '--items', type=int, default=20000)
+    parser.add_argument('-s', '--studies', type=int, default=100)
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    rng = random.Random(0)
+    ids = list(ontology.terms)
+    annotations = [("item{}".format(rng.randrange(args.items)), rng.choice(ids))
+                   for _ in range(args.annotations)]
+    print("{} terms, {} annotations".format(len(ontology), len(annotations)))
+
+    expected = timed("rparents propagation", lambda: naive(ontology, annotations))
+    index = timed("annotate", lambda: ontology.annotate(iter(annotations)))
+    studies = [rng.sample(index.names, rng.randint(50, 500)) for _ in range(args.studies)]
+    timed("enrichment, {} sets".format(len(studies)), lambda: index.enrichment(studies))
+
+    if any(index.count(id) != len(items) for id, items in expected.items()):
+        print("indexed results differ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
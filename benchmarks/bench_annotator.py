@@ -0,0 +1,76 @@
+# coding: utf-8
+"""Benchmark the annotation of free text with the labels of terms.
+
+A text is made of random names and synonyms of an ontology mixed with
+filler words. It is annotated by searching each label in the text as a
+substring, on a small sample of labels, and then with the automaton of
+an `Annotator` in one and several processes: the throughput of each
+method is reported.
+
+Usage:
+    python benchmarks/bench_annotator.py [path] [-s SIZE] [-j PROCESSES]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func, size):
+    start = time.time()
+    result = func()
+    elapsed = time.time() - start
+    print("{:<28} {:>8.3f} s {:>8.2f} MB/s".format(label, elapsed, size / elapsed / 1e6))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    parser.add_argument('-s', '--size', type=int, default=5000000,
+                        help="the approximate size of the text, in characters")
+    parser.add_argument('-j', '--processes', type=int, default=4)
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    rng = random.Random(0)
+    terms = list(ontology)
+    labels = [t.name for t in terms if t.name] + [s.desc for t in terms for s in t.synonyms]
+    filler = "the patient was seen with a history of".split()
+
+    lines, size = [], 0
+    while size < args.size:
+        words = rng.sample(filler, 4) + [rng.choice(labels)] + rng.sample(filler, 4)
+        lines.append(" ".join(words) + ".\n")
+        size += len(lines[-1])
+    text = "".join(lines)
+    print("{} labels, {} characters in {} lines".format(len(labels), len(text), len(lines)))
+
+    sample = rng.sample(labels, 100)
+    folded = text.lower()
+    timed("substring (100 labels)", lambda: [folded.count(l.lower()) for l in sample], len(text))
+
+    annotator = timed("build", ontology.annotator, len(text))
+    timed("annotate", lambda: annotator.annotate(text), len(text))
+    timed("annotate_lines", lambda: list(annotator.annotate_lines(lines)), len(text))
+    if args.processes > 1:
+        timed("annotate_lines ({} processes)".format(args.processes), lambda: list(
+            annotator.annotate_lines(lines, processes=args.processes, chunksize=1024)), len(text))
+
+
+if __name__ == "__main__":
+    main()
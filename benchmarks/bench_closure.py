@@ -0,0 +1,77 @@
+# coding: utf-8
+"""Benchmark subsumption queries with and without a closure index.
+
+The recursive `Term.rparents` and `Term.rchildren` methods are compared
+with the same methods backed by `Ontology.closure`, and random "is X a
+descendant of Y" queries are answered by searching the memoized
+`Term.rparents` lists, with `ClosureIndex.is_descendant`, and with
+`Ontology.batch_is_descendant`. Expanding each term of the pairs to
+its ancestors is also compared with `Ontology.batch_ancestors`.
+
+Usage:
+    python benchmarks/bench_closure.py [-n PAIRS] [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print("{:<28} {:>8.3f} s".format(label, time.time() - start))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--pairs', type=int, default=1000000)
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    rng = random.Random(0)
+    ids = list(ontology.terms)
+    pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(args.pairs)]
+    print("{} terms, {} pairs".format(len(ontology), len(pairs)))
+
+    timed("recursive rparents", lambda: [t.rparents() for t in ontology])
+    timed("recursive rchildren", lambda: [t.rchildren() for t in ontology])
+    expected = timed("recursive is_descendant", lambda: [
+        ontology[b] in ontology[a].rparents() for a, b in pairs])
+
+    ontology._empty_cache()
+    index = timed("closure build", ontology.closure)
+    timed("indexed rparents", lambda: [t.rparents() for t in ontology])
+    timed("indexed rchildren", lambda: [t.rchildren() for t in ontology])
+    found = timed("indexed is_descendant", lambda: [
+        index.is_descendant(a, b) for a, b in pairs])
+
+    terms, others = [a for a, _ in pairs], [b for _, b in pairs]
+    mask = timed("batch is_descendant", lambda: ontology.batch_is_descendant(terms, others))
+    timed("rparents expansion", lambda: [ontology[a].rparents() for a in terms])
+    timed("batch ancestors expansion", lambda: ontology.batch_ancestors(terms))
+
+    if found != expected or [bool(x) for x in mask] != expected:
+        print("indexed results differ", file=sys.stderr)
+    size = sum(getattr(a, 'nbytes', None) or len(a) * a.itemsize for a in (
+        index._up_offsets, index._up_indices, index._down_offsets, index._down_indices))
+    print("{:<28} {:>8.1f} KiB".format("index size", size / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
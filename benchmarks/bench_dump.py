@@ -0,0 +1,89 @@
+# coding: utf-8
+"""Benchmark the memory used to serialize an ontology in obo format.
+
+The ontology is serialized to a gzip stream, first by writing the whole
+`Ontology.obo` string, and then with `Ontology.dump`, which writes the
+ontology one chunk at a time. The time taken and the peak of memory
+allocated during the serialization (measured with `tracemalloc`, on
+Python 3) are reported.
+
+Usage:
+    python benchmarks/bench_dump.py [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import gzip
+import os
+import sys
+import time
+import warnings
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+class Sink(object):
+    """A binary file discarding what is written, but counting it.
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    def flush(self):
+        pass
+
+
+def measured(label, func):
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    peak = 0
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print("{:<28} {:>8.3f} s {:>8.1f} MiB peak".format(label, elapsed, peak / 1048576.0))
+
+
+def write_string(ontology, sink):
+    with gzip.GzipFile(fileobj=sink, mode='wb') as f:
+        obo = ontology.obo
+        f.write(obo.encode('utf-8') if isinstance(obo, type(u'')) else obo)
+
+
+def write_chunks(ontology, sink):
+    with gzip.GzipFile(fileobj=sink, mode='wb') as f:
+        ontology.dump(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    print("{} terms".format(len(ontology)))
+    for label, func in (("obo string", write_string), ("dump", write_chunks)):
+        sink = Sink()
+        measured(label, lambda: func(ontology, sink))
+        print("{:<28} {:>8} bytes".format("compressed", sink.size))
+
+
+if __name__ == "__main__":
+    main()
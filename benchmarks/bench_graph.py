@@ -0,0 +1,74 @@
+# coding: utf-8
+"""Benchmark the storage of the relations of an ontology in a `TermGraph`.
+
+The memory used by a linked ontology is measured with `tracemalloc`
+(on Python 3), and the recursive `Term.rparents` and `Term.rchildren`
+walking the arrays of the graph are compared with the same methods
+following `Term.relations`, once the graph is marked as stale.
+
+Usage:
+    python benchmarks/bench_graph.py [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print("{:<28} {:>8.3f} s".format(label, time.time() - start))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+    ontology = pronto.Ontology(args.path, False)
+    if tracemalloc is not None:
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print("{:<28} {:>8.1f} MiB".format("ontology size", size / 1048576.0))
+
+    graph = next(iter(ontology)).relations._graph
+    print("{} terms, {!r}".format(len(ontology), graph))
+    size = sum(len(a) * a.itemsize for a in (
+        graph._groups, graph._kinds, graph._bounds, graph._targets,
+        graph._up_offsets, graph._up_targets, graph._down_offsets, graph._down_targets))
+    print("{:<28} {:>8.1f} KiB".format("graph size", size / 1024.0))
+
+    parents = timed("graph rparents", lambda: [t.rparents().id for t in ontology])
+    children = timed("graph rchildren", lambda: [t.rchildren().id for t in ontology])
+
+    graph._stale = True
+    ontology._empty_cache()
+    expected = timed("relations rparents", lambda: [t.rparents().id for t in ontology])
+    if timed("relations rchildren", lambda: [t.rchildren().id for t in ontology]) != children \
+            or expected != parents:
+        print("graph results differ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
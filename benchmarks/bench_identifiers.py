@@ -0,0 +1,78 @@
+# coding: utf-8
+"""Benchmark the memory used by the identifiers of an ontology.
+
+The memory used by a parsed ontology is measured with `tracemalloc`
+(on Python 3), and the closure index of the ontology is built with a
+`list` and a `dict` of identifiers, and with a compact `IdTable`: the
+memory used by both representations and the time taken to find the
+positions of all terms are compared.
+
+Usage:
+    python benchmarks/bench_identifiers.py [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print("{:<28} {:>8.3f} s".format(label, time.time() - start))
+    return result
+
+
+def traced(label, func):
+    if tracemalloc is None:
+        return func()
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("{:<28} {:>8.1f} MiB".format(label, size / 1048576.0))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = traced("ontology", lambda: pronto.Ontology(args.path, False))
+    ids = list(ontology.terms)
+    print("{} terms".format(len(ids)))
+
+    index = ontology.closure(compact=False)
+    size = sys.getsizeof(index.ids) + sys.getsizeof(index._positions)
+    print("{:<28} {:>8.1f} KiB".format("list and dict", size / 1024.0))
+    expected = timed("dict positions", lambda: index.batch_positions(ids))
+
+    table = traced("IdTable", lambda: pronto.identifiers.IdTable(index.ids))
+    print("{:<28} {:>8.1f} KiB".format("IdTable arrays", table.nbytes / 1024.0))
+    index = ontology.closure(compact=True)
+    found = timed("IdTable positions", lambda: index.batch_positions(ids))
+
+    if list(found) != list(expected):
+        print("compact results differ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
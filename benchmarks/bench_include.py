@@ -0,0 +1,85 @@
+# coding: utf-8
+"""Benchmark repeated small `Ontology.include` and `Ontology.merge` calls.
+
+New terms, each a child of a random term of the ontology, are added
+in small batches. The time of the incremental linking done by
+`Ontology.include` and `Ontology.merge` is compared with the time of a
+full `Ontology.adopt` and `Ontology.reference` pass after each batch,
+which is what both methods used to do.
+
+Usage:
+    python benchmarks/bench_include.py [-b BATCHES] [-s SIZE] [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def batches(ontology, count, size, seed=0):
+    rng = random.Random(seed)
+    ids = list(ontology.terms)
+    is_a = pronto.Relationship('is_a')
+    return [
+        [pronto.Term('BENCH:{:07}'.format(i * size + j), 'bench',
+                     relations={is_a: [rng.choice(ids)]})
+            for j in range(size)]
+        for i in range(count)
+    ]
+
+
+def full(ontology, batch):
+    for term in batch:
+        ontology.terms[term.id] = term
+    ontology._empty_cache()
+    ontology.adopt()
+    ontology.reference()
+
+
+def include(ontology, batch):
+    ontology.include(*batch)
+
+
+def merge(ontology, batch):
+    other = pronto.Ontology()
+    other.include(*batch)
+    ontology.merge(other)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-b', '--batches', type=int, default=50)
+    parser.add_argument('-s', '--size', type=int, default=10)
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    data = pickle.dumps(pronto.Ontology(args.path, False), pickle.HIGHEST_PROTOCOL)
+    print("{} terms, {} batches of {} terms".format(
+        len(pickle.loads(data)), args.batches, args.size))
+    for name, func in [('full', full), ('include', include), ('merge', merge)]:
+        ontology = pickle.loads(data)
+        todo = batches(ontology, args.batches, args.size)
+        start = time.time()
+        for batch in todo:
+            func(ontology, batch)
+        elapsed = time.time() - start
+        print("{:<10} {:>8.3f} s {:>10.2f} ms/batch".format(
+            name, elapsed, 1000 * elapsed / args.batches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# coding: utf-8
+"""Benchmark the serialization and parsing of ontologies in JSON.
+
+The ontology is first serialized with the `Ontology.json` property,
+which builds the whole document in memory, and then in OBO Graphs JSON
+with `Ontology.dump`, which writes one chunk at a time. The OBO Graphs
+document is then parsed back, and compared to parsing the ontology in
+obo format. The time taken and the peak of memory allocated (measured
+with `tracemalloc`, on Python 3) are reported.
+
+Usage:
+    python benchmarks/bench_json.py [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import io
+import os
+import sys
+import time
+import warnings
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+class Sink(object):
+    """A binary file discarding what is written, but counting it.
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    def flush(self):
+        pass
+
+
+def measured(label, func):
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start = time.time()
+    result = func()
+    elapsed = time.time() - start
+    peak = 0
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print("{:<28} {:>8.3f} s {:>8.1f} MiB peak".format(label, elapsed, peak / 1048576.0))
+    return result
+
+
+def write_string(ontology, sink):
+    sink.write(ontology.json.encode('utf-8'))
+
+
+def write_chunks(ontology, sink):
+    ontology.dump(sink, format='obojson')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    print("{} terms".format(len(ontology)))
+    for label, func in (("json string", write_string), ("obojson dump", write_chunks)):
+        sink = Sink()
+        measured(label, lambda: func(ontology, sink))
+        print("{:<28} {:>8} bytes".format("size", sink.size))
+
+    document = io.BytesIO()
+    ontology.dump(document, format='obojson')
+    obo = io.BytesIO()
+    ontology.dump(obo)
+    for label, data, name in (("obojson parse", document, 'OboJSONParser'),
+                              ("obo parse", obo, 'OboParser')):
+        data.seek(0)
+        parsed = measured(label, lambda: pronto.Ontology(data, False, parser=name))
+        assert len(parsed) == len(ontology)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# coding: utf-8
+"""Benchmark looking up terms by name and synonym.
+
+All the term names and synonyms of an ontology are looked up, first by
+scanning all the terms for each of them, then with the secondary index
+of the ontology (see `Ontology.lookup_index`), whose build time is
+reported separately.
+
+Usage:
+    python benchmarks/bench_lookup.py [path] [-n NUMBER]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print("{:<28} {:>8.3f} s".format(label, time.time() - start))
+    return result
+
+
+def scan(ontology, values):
+    found = []
+    for value in values:
+        found.append(sorted(
+            term.id for term in ontology
+            if term.name == value or any(s.desc == value for s in term.synonyms)))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    parser.add_argument('-n', '--number', type=int, default=200,
+                        help="the number of values to look up with a scan")
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    values = sorted(set(term.name for term in ontology if term.name))
+    print("{} terms, {} names".format(len(ontology), len(values)))
+
+    expected = timed("scan ({} values)".format(args.number),
+                     lambda: scan(ontology, values[:args.number]))
+    timed("index build", ontology.lookup_index)
+    found = timed("index ({} values)".format(len(values)), lambda: [
+        sorted(ontology.lookup(value, ['name', 'synonym']).id) for value in values])
+
+    if found[:args.number] != expected:
+        print("indexed results differ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# coding: utf-8
+"""Benchmark the wall time and peak memory usage of the `OboParser`.
+
+Each measure is done in a fresh interpreter, so that the peak resident
+set size reported by `resource.getrusage` only accounts for a single
+parse of a single file. The memory used by the interpreter and the
+imported modules is measured the same way, and reported separately.
+
+Usage:
+    python benchmarks/bench_obo_parser.py [-n RUNS] [-w WORKERS] [path ...]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+CHILD = """
+import gzip, json, resource, sys, time, warnings
+sys.path.insert(0, {maindir!r})
+warnings.simplefilter('ignore')
+from pronto.parser import OboParser
+path, workers = sys.argv[1], int(sys.argv[2]) or None
+start = time.time()
+if path:
+    with (gzip.GzipFile(path) if path.endswith('.gz') else open(path, 'rb')) as handle:
+        meta, terms, imports = OboParser.parse(handle, workers)
+json.dump({{
+    'time': time.time() - start,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}, sys.stdout)
+"""
+
+
+def measure(path, runs, workers=0):
+    """Return the best wall time and the peak RSS (in KiB) of ``runs`` parses.
+    """
+    code = CHILD.format(maindir=MAINDIR)
+    results = [
+        json.loads(subprocess.check_output([sys.executable, '-c', code, path, str(workers)]).decode('utf-8'))
+            for _ in range(runs)
+    ]
+    return min(r['time'] for r in results), max(r['rss'] for r in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    parser.add_argument('-w', '--workers', type=int, default=0)
+    parser.add_argument('paths', nargs='*', default=[
+        os.path.join(DATADIR, 'hpo.obo.gz'),
+        os.path.join(DATADIR, 'psi-ms.obo'),
+    ])
+    args = parser.parse_args(argv)
+
+    _, base_rss = measure('', args.runs)
+    print("{:<20} {:>10} {:>14} {:>14}".format('file', 'time (s)', 'peak RSS (MiB)', 'parse (MiB)'))
+    for path in args.paths:
+        elapsed, rss = measure(path, args.runs, args.workers)
+        print("{:<20} {:>10.3f} {:>14.1f} {:>14.1f}".format(
+            os.path.basename(path), elapsed, rss / 1024.0, (rss - base_rss) / 1024.0,
+        ))
+
+
+if __name__ == "__main__":
+    main()
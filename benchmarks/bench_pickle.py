@@ -0,0 +1,70 @@
+# coding: utf-8
+"""Benchmark the size and speed of pickled `Ontology` instances.
+
+Each ontology is parsed once, then pickled and unpickled several times
+with the highest pickle protocol available. The best time of each
+operation is reported, along with the time it takes to parse the
+ontology, and the relations of the unpickled ontology are checked
+against the original ones.
+
+Usage:
+    python benchmarks/bench_pickle.py [-n RUNS] [--imports] [path ...]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+from six.moves import cPickle as pickle
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def relations(ontology):
+    return sorted(
+        (term.id, relation.obo_name, tuple(getattr(x, 'id', x) for x in others))
+            for term in ontology
+                for relation, others in term.relations.items()
+    )
+
+
+def best(func, runs):
+    return min(timeit.repeat(func, number=1, repeat=runs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    parser.add_argument('--imports', action='store_true')
+    parser.add_argument('paths', nargs='*', default=[
+        os.path.join(DATADIR, 'cl.ont.gz'),
+    ])
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    print("{:<16} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+        'file', 'terms', 'size (KiB)', 'parse (s)', 'dump (s)', 'load (s)'))
+    for path in args.paths:
+        ontology = pronto.Ontology(path, args.imports)
+        data = pickle.dumps(ontology, pickle.HIGHEST_PROTOCOL)
+        if relations(pickle.loads(data)) != relations(ontology):
+            print("{}: unpickled relations differ".format(path), file=sys.stderr)
+        print("{:<16} {:>8} {:>10.1f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+            os.path.basename(path), len(ontology), len(data) / 1024.0,
+            best(lambda: pronto.Ontology(path, args.imports), 1),
+            best(lambda: pickle.dumps(ontology, pickle.HIGHEST_PROTOCOL), args.runs),
+            best(lambda: pickle.loads(data), args.runs),
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# coding: utf-8
+"""Benchmark the prefix and approximate search of terms.
+
+Misspelled labels of an ontology (with a character dropped or swapped)
+are searched by comparing them to every label with `difflib`, on a
+small sample of queries, and then with a `SearchIndex`. The ontology
+can be grown to a given number of terms with synthetic terms whose
+labels mix the words of the real labels, to measure the time taken to
+build the index and to answer a query on large ontologies.
+
+Usage:
+    python benchmarks/bench_search.py [path] [-t TERMS] [-q QUERIES]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+from pronto.search import SearchIndex
+
+
+def timed(label, func, count=1):
+    start = time.time()
+    result = func()
+    elapsed = time.time() - start
+    print("{:<28} {:>8.3f} s {:>10.3f} ms/query".format(label, elapsed, 1000 * elapsed / count))
+    return result
+
+
+def grow(ontology, size, rng):
+    """Add synthetic terms to an ontology until it has ``size`` terms.
+    """
+    words = sorted(set(w for t in ontology for w in t.name.split()))
+    terms = []
+    for i in range(len(ontology), size):
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(2, 5)))
+        synonyms = {pronto.Synonym(" ".join(rng.choice(words) for _ in range(3)), 'EXACT')}
+        terms.append(pronto.Term('SYN:{:07d}'.format(i), name, synonyms=synonyms))
+    return list(ontology) + terms
+
+
+def misspell(label, rng):
+    i = rng.randrange(len(label) - 1)
+    if rng.random() < 0.5:
+        return label[:i] + label[i+1:]
+    return label[:i] + label[i+1] + label[i] + label[i+2:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    parser.add_argument('-t', '--terms', type=int, default=0,
+                        help="the number of terms to grow the ontology to")
+    parser.add_argument('-q', '--queries', type=int, default=200)
+    parser.add_argument('--no-difflib', dest='difflib', action='store_false',
+                        help="skip the slow search with difflib")
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    rng = random.Random(0)
+    terms = grow(pronto.Ontology(args.path, False), args.terms, rng)
+    labels = [(t.name, t.id) for t in terms if t.name]
+    labels += [(s.desc, t.id) for t in terms for s in t.synonyms]
+    queries = [misspell(rng.choice(labels)[0], rng) for _ in range(args.queries)]
+    prefixes = [q[:rng.randint(2, 6)] for q in queries]
+    print("{} terms, {} labels".format(len(terms), len(labels)))
+
+    def scan(query):
+        matcher = difflib.SequenceMatcher(b=query.lower())
+        best = []
+        for label, id in labels:
+            matcher.set_seq1(label.lower())
+            if matcher.real_quick_ratio() > 0.6 and matcher.quick_ratio() > 0.6:
+                best.append((matcher.ratio(), id))
+        return sorted(best, reverse=True)[:10]
+
+    n = max(1, 5 * 12000 // len(terms)) if args.difflib else 0
+    if n:
+        timed("difflib ({} queries)".format(n), lambda: [scan(q) for q in queries[:n]], n)
+
+    index = timed("build", lambda: SearchIndex(terms))
+    print(index)
+    timed("prefix", lambda: [index.prefix(p) for p in prefixes], len(prefixes))
+    timed("fuzzy", lambda: [index.fuzzy(q) for q in queries], len(queries))
+
+
+if __name__ == "__main__":
+    main()
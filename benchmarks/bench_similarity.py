@@ -0,0 +1,90 @@
+# coding: utf-8
+"""Benchmark the semantic similarity of groups of terms.
+
+Random groups of terms ("patients" and "diseases") are compared with
+the best-match average of their Resnik similarity, computed on top of
+`Term.rparents`, and with `SimilarityIndex.group_similarity`, in the
+current process and with a pool of processes.
+
+Usage:
+    python benchmarks/bench_similarity.py [-p PATIENTS] [-d DISEASES] [path]
+
+"""
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print("{:<28} {:>8.3f} s".format(label, time.time() - start))
+    return result
+
+
+def naive(ontology, patients, diseases):
+    """Compute the best-match average of each pair of groups with `Term.rparents`.
+    """
+    lineage = {id: {id} | set(ontology[id].rparents().id) for id in ontology.terms}
+    ic = {id: -math.log(len(ontology[id].rchildren()) / len(ontology) + 1 / len(ontology))
+          for id in ontology.terms}
+
+    def resnik(a, b):
+        return max([ic[x] for x in lineage[a] & lineage[b]] or [0.0])
+
+    def bma(group, other):
+        table = [[resnik(a, b) for b in other] for a in group]
+        rows = sum(max(row) for row in table) / len(group)
+        cols = sum(max(col) for col in zip(*table)) / len(other)
+        return (rows + cols) / 2
+
+    return [[bma(p, d) for d in diseases] for p in patients]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-p', '--patients', type=int, default=1000)
+    parser.add_argument('-d', '--diseases', type=int, default=2000)
+    parser.add_argument('-j', '--processes', type=int, default=4)
+    parser.add_argument('-n', '--naive', type=int, default=20,
+                        help="the number of patients compared with rparents")
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'hpo.obo.gz'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    rng = random.Random(0)
+    ids = list(ontology.terms)
+    patients = [rng.sample(ids, rng.randint(3, 15)) for _ in range(args.patients)]
+    diseases = [rng.sample(ids, rng.randint(5, 30)) for _ in range(args.diseases)]
+    print("{} terms, {} patients, {} diseases".format(
+        len(ontology), len(patients), len(diseases)))
+
+    expected = timed("rparents, {} patients".format(args.naive),
+                     lambda: naive(ontology, patients[:args.naive], diseases))
+    index = timed("similarity index build", ontology.similarity)
+    scores = timed("group_similarity", lambda: index.group_similarity(patients, diseases))
+    timed("group_similarity, {} procs".format(args.processes), lambda: index.group_similarity(
+        patients, diseases, processes=args.processes))
+
+    difference = abs(scores[:args.naive] - expected).max() if expected else 0.0
+    if difference > 1e-9:
+        print("indexed results differ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# coding: utf-8
+"""Benchmark the memory used by the value objects of an ontology.
+
+The `Description`, `Synonym` and `Relationship` instances reachable
+from the terms of an ontology are collected, and the bytes used by
+each type are reported: the instances themselves, their ``__dict__``
+if they have one, and their containers of cross-references. Objects
+shared by several terms are only counted once.
+
+Usage:
+    python benchmarks/bench_values.py [path]
+
+"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import collections
+import os
+import sys
+import warnings
+
+MAINDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATADIR = os.path.join(MAINDIR, "tests", "resources")
+
+sys.path.insert(0, MAINDIR)
+import pronto
+
+
+def footprint(obj, seen):
+    """Get the bytes used by an object and its attributes, once each.
+    """
+    size = 0
+    for x in (obj, getattr(obj, '__dict__', None), getattr(obj, 'xref', None)):
+        if x is not None and id(x) not in seen:
+            seen.add(id(x))
+            size += sys.getsizeof(x)
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=os.path.join(DATADIR, 'psi-ms.obo'))
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+
+    ontology = pronto.Ontology(args.path, False)
+    objects = collections.OrderedDict((name, {}) for name in ('Description', 'Synonym', 'Relationship'))
+    for term in ontology:
+        objects['Description'][id(term.desc)] = term.desc
+        for synonym in term.synonyms:
+            objects['Synonym'][id(synonym)] = synonym
+        for relation in term.relations:
+            objects['Relationship'][id(relation)] = relation
+
+    print("{} terms".format(len(ontology)))
+    seen = set()
+    for name, instances in objects.items():
+        size = sum(footprint(x, seen) for x in instances.values())
+        print("{:<16} {:>8} objects {:>10} bytes {:>8.1f} bytes/object".format(
+            name, len(instances), size, size / max(len(instances), 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+# coding: utf-8
+"""Annotations of items with ontology terms, and enrichment analysis.
+
+This module defines `AnnotationIndex`, which propagates the annotations
+of items (such as genes) to all the ancestors of their terms following
+the *true path rule*, and tests whether the terms are over-represented
+in sets of items with a hypergeometric test.
+
+Annotations are read as a stream of ``(item, term)`` pairs, for
+instance with `read_table` from a tab-separated file, and are stored in
+arrays rather than as Python objects for each annotation.
+
+Example:
+    >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+    >>> index = cl.annotate([('a', 'CL:0000540'), ('b', 'CL:0000127')])
+    >>> index.items('CL:0002319')
+    ['a', 'b']
+    >>> index.count('CL:0000540')
+    1
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import array
+import collections
+import gzip
+import io
+import warnings
+
+import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .utils import ProntoWarning
+
+
+def read_table(handle, item_column=0, term_column=1, sep='\t', comment='!'):
+    """Iterate over the annotations of a delimited text file.
+
+    Arguments:
+        handle (str or file handle): the path to the file (which may be
+            compressed with gzip if its name ends with ``.gz``), or a
+            file handle to read the lines from.
+        item_column (int): the index of the column with the annotated
+            items.
+        term_column (int): the index of the column with the term
+            identifiers.
+        sep (str): the column separator.
+        comment (str): the prefix of the comment lines.
+
+    Yields:
+        tuple: an ``(item, term)`` pair for each annotation of the file.
+
+    Example:
+        Read the gene product annotations of a GAF file::
+
+            >>> annotations = read_table('goa_human.gaf.gz', 1, 4) # doctest: +SKIP
+
+    """
+    if isinstance(handle, six.string_types):
+        if handle.endswith('.gz'):
+            opened = io.TextIOWrapper(gzip.open(handle), encoding='utf-8')
+        else:
+            opened = io.open(handle, encoding='utf-8')
+        with opened:
+            for pair in read_table(opened, item_column, term_column, sep, comment):
+                yield pair
+        return
+
+    last = max(item_column, term_column)
+    for line in handle:
+        if isinstance(line, six.binary_type):
+            line = line.decode('utf-8')
+        if not line.strip() or line.startswith(comment):
+            continue
+        fields = line.rstrip('\r\n').split(sep)
+        if len(fields) > last:
+            yield fields[item_column], fields[term_column]
+
+
+class AnnotationIndex(object):
+    """The annotations of items with the terms of an ontology.
+
+    Every item annotated with a term is also annotated with all the
+    ancestors of the term (the *true path rule*). The ancestors are read
+    from a `~pronto.closure.ClosureIndex`, which computes them once for
+    each term in topological order, so annotations are propagated with
+    a single lookup each.
+
+    The items of each term are stored as sorted item positions in a
+    CSR-like pair of arrays (an array of offsets and an array of
+    positions), and so are the terms of each item. They are `numpy`
+    arrays if `numpy` is available, and `array.array` otherwise.
+
+    Attributes:
+        closure (~pronto.closure.ClosureIndex): the closure index used
+            to propagate the annotations.
+        ids (list): the identifier of each term, by position.
+        names (list): the annotated items, by position.
+
+    Note:
+        The index is not updated when the ontology is modified: create
+        a new index with `Ontology.annotate` afterwards.
+
+    """
+
+    # the number of annotations propagated at once
+    _BLOCK = 1 << 20
+
+    def __init__(self, ontology, annotations, relationships=None):
+        """Propagate the annotations of items to the terms of an ontology.
+
+        Arguments:
+            ontology (~pronto.Ontology): the ontology of the terms.
+            annotations (iterable or dict): the annotations, as an
+                iterable of ``(item, term)`` pairs, or as a mapping of
+                items to their terms. Terms can be given as `Term`
+                instances or as identifiers. Annotations to terms that
+                are not in the ontology are ignored, with a warning.
+            relationships (iterable, optional): the relationships to
+                follow from a term to its ancestors (see
+                `Ontology.closure`), for instance ``['is_a', 'part_of']``.
+                Leave to `None` to use all the bottomup relationships,
+                as `Term.rparents` does.
+
+        """
+        self.closure = ontology.closure(relationships)
+        self.ids = self.closure.ids
+        self.names = []
+        self._items = {}
+
+        items, terms = self._read(annotations)
+        if numpy is None:
+            pairs = self._propagate_python(items, terms)
+        else:
+            pairs = self._propagate(numpy.frombuffer(items, dtype=numpy.dtype(str('l'))),
+                                    numpy.frombuffer(terms, dtype=numpy.dtype(str('l'))))
+        self._term_offsets, self._term_items = pairs
+        self._item_offsets, self._item_terms = self._invert(*pairs)
+
+    def __repr__(self):
+        return "AnnotationIndex({} items, {} terms)".format(len(self.names), len(self.ids))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    @property
+    def counts(self):
+        """`numpy.ndarray` or `list`: the number of items of each term, by position.
+        """
+        offsets = self._term_offsets
+        if numpy is not None:
+            return numpy.diff(offsets)
+        return [offsets[i+1] - offsets[i] for i in six.moves.range(len(self.ids))]
+
+    def count(self, term):
+        """Get the number of items annotated with a term or its descendants.
+
+        Raises:
+            KeyError: when the term is not in the ontology.
+
+        """
+        i = self.closure.position(term)
+        return int(self._term_offsets[i+1] - self._term_offsets[i])
+
+    def items(self, term):
+        """Get the items annotated with a term or its descendants.
+
+        Raises:
+            KeyError: when the term is not in the ontology.
+
+        """
+        i = self.closure.position(term)
+        found = self._term_items[self._term_offsets[i]:self._term_offsets[i+1]]
+        return [self.names[j] for j in found]
+
+    def terms(self, item):
+        """Get the identifiers of the terms of an item, and of their ancestors.
+
+        Raises:
+            KeyError: when the item has no annotation.
+
+        """
+        j = self._items[item]
+        found = self._item_terms[self._item_offsets[j]:self._item_offsets[j+1]]
+        return [self.ids[i] for i in found]
+
+    def study_counts(self, study_sets):
+        """Count the items of several sets annotated with each term.
+
+        Arguments:
+            study_sets (iterable): collections of items. Items without
+                annotations are ignored.
+
+        Returns:
+            numpy.ndarray: a matrix of shape ``(len(study_sets), len(ids))``
+            with the number of items of each set annotated with each term
+            or its descendants.
+
+        Raises:
+            ImportError: when `numpy` is not available.
+
+        """
+        if numpy is None:
+            raise ImportError("numpy is required to count the terms of study sets")
+        members, sizes = array.array(str('l')), []
+        for study in study_sets:
+            found = {self._items[item] for item in study if item in self._items}
+            members.extend(sorted(found))
+            sizes.append(len(found))
+        members = numpy.frombuffer(members, dtype=numpy.dtype(str('l')))
+        owners = numpy.repeat(numpy.arange(len(sizes)), sizes)
+
+        offsets, indices = self._item_offsets, self._item_terms
+        starts = offsets[members]
+        counts = offsets[members + 1] - starts
+        bounds = numpy.cumsum(counts) - counts
+        terms = indices[numpy.repeat(starts - bounds, counts) + numpy.arange(counts.sum())]
+        keys = numpy.repeat(owners, counts) * len(self.ids) + terms
+        found = numpy.bincount(keys, minlength=len(sizes) * len(self.ids))
+        return found.reshape(len(sizes), len(self.ids))
+
+    def enrichment(self, study_sets, population=None):
+        """Test the over-representation of each term in several sets of items.
+
+        The p-value of a term in a study set is the probability to find
+        at least as many items annotated with the term (or with one of
+        its descendants) in a set of the same size drawn at random from
+        the population, following a hypergeometric distribution.
+
+        Arguments:
+            study_sets (iterable): collections of items. Items without
+                annotations, or outside of the population, are ignored.
+            population (iterable, optional): the items to draw the study
+                sets from. Leave to `None` to use all the annotated
+                items.
+
+        Returns:
+            tuple: two matrices of shape ``(len(study_sets), len(ids))``,
+            with the number of items of each set annotated with each
+            term, and the p-value of each term in each set.
+
+        Raises:
+            ImportError: when `numpy` is not available.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> index = cl.annotate({'a': ['CL:0000540'], 'b': ['CL:0000127'],
+            ...                      'c': ['CL:0000236'], 'd': ['CL:0000236']})
+            >>> counts, pvalues = index.enrichment([['a', 'b']])
+            >>> i = index.closure.position('CL:0002319')
+            >>> int(counts[0, i]), round(float(pvalues[0, i]), 6)
+            (2, 0.166667)
+
+        """
+        if numpy is None:
+            raise ImportError("numpy is required to compute the enrichment of study sets")
+        if population is None:
+            total = len(self.names)
+            background = self.counts
+        else:
+            population = set(population)
+            study_sets = [population.intersection(study) for study in study_sets]
+            background = self.study_counts([population])[0]
+            total = sum(item in self._items for item in population)
+
+        counts = self.study_counts(study_sets)
+        sizes = numpy.array([sum(item in self._items for item in set(study))
+                             for study in study_sets], dtype=numpy.int64)
+        pvalues = _hypergeometric_sf(counts, total, background[None, :], sizes[:, None])
+        return counts, pvalues
+
+    def _read(self, annotations):
+        """Read the annotations as arrays of item and term positions.
+        """
+        if isinstance(annotations, collections.Mapping):
+            annotations = ((item, term) for item, terms in six.iteritems(annotations)
+                           for term in terms)
+        items, terms, missing = array.array(str('l')), array.array(str('l')), set()
+        positions, names = self.closure._positions, self._items
+        for item, term in annotations:
+            term = getattr(term, 'id', term)
+            i = positions.get(term)
+            if i is None:
+                missing.add(term)
+                continue
+            j = names.get(item)
+            if j is None:
+                j = names[item] = len(self.names)
+                self.names.append(item)
+            items.append(j)
+            terms.append(i)
+        if missing:
+            warnings.warn("{} annotation terms are not in the ontology and were "
+                          "ignored".format(len(missing)), ProntoWarning)
+        return items, terms
+
+    def _propagate(self, items, terms):
+        """Propagate the annotations to the ancestors of their terms.
+
+        Returns:
+            tuple: the CSR-like arrays of the items of each term.
+
+        """
+        # keys are computed in 64-bit, since `long` is 32-bit on Windows
+        width = max(len(self.names), 1)
+        keys = numpy.unique(terms.astype(numpy.int64) * width + items)
+        found = [keys]
+        for start in six.moves.range(0, len(keys), self._BLOCK):
+            block = keys[start:start+self._BLOCK]
+            offsets, ancestors = self.closure.batch_ancestors(block // width)
+            owners = numpy.repeat(block % width, numpy.diff(offsets))
+            found.append(numpy.unique(ancestors.astype(numpy.int64) * width + owners))
+        keys = numpy.unique(numpy.concatenate(found))
+
+        offsets = numpy.zeros(len(self.ids) + 1, dtype=numpy.intp)
+        numpy.cumsum(numpy.bincount(keys // width, minlength=len(self.ids)), out=offsets[1:])
+        return offsets, keys % width
+
+    def _propagate_python(self, items, terms):
+        """Propagate the annotations without `numpy`.
+        """
+        found = [set() for _ in self.ids]
+        closure = self.closure
+        lineage = {i: [i] + closure.ancestor_positions(i) for i in set(terms)}
+        for j, i in six.moves.zip(items, terms):
+            for k in lineage[i]:
+                found[k].add(j)
+        offsets, indices = array.array(str('l'), [0]), array.array(str('l'))
+        for members in found:
+            indices.extend(sorted(members))
+            offsets.append(len(indices))
+        return offsets, indices
+
+    def _invert(self, offsets, indices):
+        """Get the terms of each item from the items of each term.
+        """
+        if numpy is not None:
+            terms = numpy.repeat(numpy.arange(len(self.ids)), numpy.diff(offsets))
+            order = numpy.argsort(indices, kind='mergesort')
+            bounds = numpy.zeros(len(self.names) + 1, dtype=numpy.intp)
+            numpy.cumsum(numpy.bincount(indices, minlength=len(self.names)), out=bounds[1:])
+            return bounds, terms[order]
+
+        found = [[] for _ in self.names]
+        for i in six.moves.range(len(self.ids)):
+            for j in indices[offsets[i]:offsets[i+1]]:
+                found[j].append(i)
+        bounds, terms = array.array(str('l'), [0]), array.array(str('l'))
+        for members in found:
+            terms.extend(members)
+            bounds.append(len(terms))
+        return bounds, terms
+
+
+def _hypergeometric_sf(k, N, K, n):
+    """Get the probability to draw at least ``k`` successes.
+
+    ``n`` items are drawn without replacement from a population of
+    ``N`` items with ``K`` successes. The terms of the tail are summed
+    away from the mode of the distribution, where they decrease
+    quickly: the upper tail directly when ``k`` is above the mode, and
+    the lower tail (to subtract from 1) otherwise.
+    """
+    k, K, n = numpy.broadcast_arrays(numpy.asarray(k, dtype=numpy.int64),
+                                     numpy.asarray(K, dtype=numpy.int64),
+                                     numpy.asarray(n, dtype=numpy.int64))
+    logfact = numpy.zeros(N + 1)
+    numpy.cumsum(numpy.log(numpy.arange(1, N + 1)), out=logfact[1:])
+
+    def logpmf(i, K, n):
+        return (logfact[K] - logfact[i] - logfact[K-i]
+                + logfact[N-K] - logfact[n-i] - logfact[N-K-n+i]
+                - logfact[N] + logfact[n] + logfact[N-n])
+
+    low, high = numpy.maximum(0, n + K - N), numpy.minimum(K, n)
+    upper = k > (n + 1) * (K + 1) // (N + 2)
+    result = numpy.where(upper, 0.0, 1.0)
+    flat = numpy.flatnonzero((k > low) & (k <= high))
+    flat_k, flat_K, flat_n = k.ravel()[flat], K.ravel()[flat], n.ravel()[flat]
+    flat_upper = upper.ravel()[flat]
+    i = numpy.where(flat_upper, flat_k, flat_k - 1)
+    step = numpy.where(flat_upper, 1, -1)
+    stop = numpy.where(flat_upper, high.ravel()[flat], low.ravel()[flat])
+    total = numpy.zeros(len(flat))
+    active = numpy.arange(len(flat))
+    while len(active):
+        term = numpy.exp(logpmf(i[active], flat_K[active], flat_n[active]))
+        total[active] += term
+        done = (i[active] == stop[active]) | (term <= total[active] * 1e-17)
+        i[active] += step[active]
+        active = active[~done]
+
+    values = result.ravel()
+    values[flat] = numpy.where(flat_upper, total, 1.0 - total)
+    values[k.ravel() <= low.ravel()] = 1.0
+    values[k.ravel() > high.ravel()] = 0.0
+    return numpy.clip(values, 0.0, 1.0).reshape(k.shape)
@@ -0,0 +1,273 @@
+# coding: utf-8
+"""Dictionary-based annotation of free text with ontology terms.
+
+This module defines `Annotator`, which compiles the names and synonyms
+of the terms of an ontology into an Aho-Corasick automaton over words,
+and finds all the occurrences of these labels in a text in a single
+pass, whatever the number of labels.
+
+Example:
+    >>> from pronto.annotator import Annotator
+    >>> annotator = Annotator(uo, scopes=['EXACT'])
+    >>> for match in annotator.annotate('3 Kilogram per cubic metre'):
+    ...     print(match.start, match.end, match.id)
+    2 10 UO:0000009
+    2 26 UO:0000083
+    15 26 UO:0000096
+    21 26 UO:0000008
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import collections
+import multiprocessing
+import re
+
+import six
+
+from .lookup import _casefold
+
+
+#: A label found in a text: ``text[start:end]`` matches a label of
+#: the term with identifier ``id``.
+Match = collections.namedtuple('Match', ['start', 'end', 'id'])
+
+
+class Annotator(object):
+    """An automaton finding the labels of terms in free text.
+
+    Texts and labels are split into words (runs of letters, digits and
+    underscores) and single punctuation characters, so that labels are
+    only found on word boundaries: *arm* is found in *left arm* but not
+    in *harm*, and *type 2* is not found in *type 21*.
+
+    The automaton is stored as `list` of nodes numbered from 0 (the
+    root), with a `dict` mapping the next words to the next nodes, the
+    failure link of each node (the node of its longest proper suffix
+    which is also in the automaton), and a link to the nearest suffix
+    ending a label. Words of a text which are not part of any label
+    bring the automaton back to its root without further lookups.
+
+    Attributes:
+        casefold (bool): whether labels are found regardless of case.
+
+    """
+
+    _RX_WORD = re.compile(r'\w+|[^\w\s]', re.U)
+
+    def __init__(self, ontology, scopes=None, names=True, casefold=True):
+        """Compile the labels of the terms of an ontology.
+
+        Arguments:
+            ontology (~pronto.Ontology or iterable): the ontology, or
+                the `Term` instances, to take the labels from.
+            scopes (iterable, optional): the scopes of the synonyms to
+                use as labels (such as ``['EXACT']``). Leave to `None`
+                to use all synonyms, or give an empty list to use none.
+            names (bool): whether to use the names of the terms as
+                labels.
+            casefold (bool): whether to ignore the case of labels.
+
+        """
+        self.casefold = casefold
+        self._goto, self._terms, self._depth = [{}], [()], [0]
+        self._words = set()
+        scopes = None if scopes is None else frozenset(scopes)
+        for term in ontology:
+            if names and term.name:
+                self._add(term.name, term.id)
+            for synonym in term.synonyms:
+                if scopes is None or synonym.scope in scopes:
+                    self._add(synonym.desc, term.id)
+        self._link()
+
+    def __repr__(self):
+        return "Annotator({} labels, {} words)".format(
+            sum(1 for ids in self._terms if ids), len(self._words))
+
+    def annotate(self, text, longest=False):
+        """Find the labels of terms in a text.
+
+        Arguments:
+            text (str): the text to annotate.
+            longest (bool): only keep the longest of overlapping
+                matches, starting with the leftmost one. Matches of
+                several terms on the same span are all kept.
+
+        Returns:
+            list: the `Match` instances found in the text, sorted by
+            position.
+
+        Example:
+            >>> from pronto.annotator import Annotator
+            >>> annotator = Annotator(uo)
+            >>> [m.id for m in annotator.annotate('degree Celsius')]
+            ['UO:0000185', 'UO:0000027']
+            >>> [m.id for m in annotator.annotate('degree Celsius', longest=True)]
+            ['UO:0000027']
+
+        """
+        goto, fail, report = self._goto, self._fail, self._report
+        terms, depth, words = self._terms, self._depth, self._words
+        text, fold = self._fold(text)
+
+        matches, starts, node = [], [], 0
+        for k, match in enumerate(self._RX_WORD.finditer(text)):
+            starts.append(match.start())
+            word = fold(match.group()) if fold else match.group()
+            if word not in words:
+                node = 0
+                continue
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            found = node if terms[node] else report[node]
+            while found:
+                begin, end = starts[k - depth[found] + 1], match.end()
+                for id in terms[found]:
+                    matches.append(Match(begin, end, id))
+                found = report[found]
+
+        matches.sort()
+        return _longest(matches) if longest else matches
+
+    def annotate_many(self, texts, longest=False, processes=None, chunksize=64):
+        """Find the labels of terms in several texts.
+
+        Texts are read from ``texts`` as they are needed, so that a
+        stream of texts (such as the lines of a file) is never loaded
+        at once in memory.
+
+        Arguments:
+            texts (iterable): the texts to annotate.
+            longest (bool): only keep the longest of overlapping matches
+                (see `Annotator.annotate`).
+            processes (int, optional): the number of processes to use to
+                annotate the texts in parallel, which is worth it for
+                large batches of texts. Leave to `None` to annotate texts
+                in the current process.
+            chunksize (int): the number of texts sent at once to each
+                process.
+
+        Yields:
+            list: the matches found in each text, in the order of the
+            texts.
+
+        """
+        if processes is None or processes <= 1:
+            for text in texts:
+                yield self.annotate(text, longest)
+            return
+
+        pool = multiprocessing.Pool(processes, _init_worker, (self, longest))
+        try:
+            for matches in pool.imap(_annotate_text, texts, chunksize):
+                yield matches
+        finally:
+            pool.terminate()
+
+    def annotate_lines(self, lines, longest=False, processes=None, chunksize=64):
+        """Find the labels of terms in a text given as lines.
+
+        Labels are not found across line breaks.
+
+        Arguments:
+            lines (iterable): the lines of the text, for instance an
+                open text file. Line endings are kept, so that the
+                offsets of the matches are relative to the start of the
+                whole text.
+            longest (bool), processes (int), chunksize (int): see
+                `Annotator.annotate_many`.
+
+        Yields:
+            `Match`: the matches found in the text, in order.
+
+        """
+        def iterlines():
+            for line in lines:
+                offsets.append(offsets[-1] + len(line))
+                yield line
+
+        offsets = [0]
+        results = self.annotate_many(iterlines(), longest, processes, chunksize)
+        for i, matches in enumerate(results):
+            for match in matches:
+                yield Match(match.start + offsets[i], match.end + offsets[i], match.id)
+
+    def _fold(self, text):
+        """Fold the case of a text, keeping the offsets of its words.
+
+        Returns:
+            tuple: the text, folded if possible, and the function to
+            fold each word with, or `None` if the text is folded.
+
+        """
+        if not self.casefold:
+            return text, None
+        folded = _casefold(text)
+        # case folding may lengthen characters (such as ß to ss): fold
+        # each word on its own when offsets would otherwise be shifted
+        if len(folded) != len(text):
+            return text, _casefold
+        return folded, None
+
+    def _add(self, label, id):
+        """Add a label of a term to the trie of the automaton.
+        """
+        label, fold = self._fold(label)
+        node = 0
+        for word in self._RX_WORD.findall(label):
+            word = fold(word) if fold else word
+            next_node = self._goto[node].get(word)
+            if next_node is None:
+                next_node = self._goto[node][word] = len(self._goto)
+                self._goto.append({})
+                self._terms.append(())
+                self._depth.append(self._depth[node] + 1)
+            self._words.add(word)
+            node = next_node
+        if node and id not in self._terms[node]:
+            self._terms[node] += (id,)
+
+    def _link(self):
+        """Compute the failure and report links of the nodes, breadth-first.
+        """
+        goto, terms = self._goto, self._terms
+        self._fail = fail = [0] * len(goto)
+        self._report = report = [0] * len(goto)
+        queue = collections.deque(six.itervalues(goto[0]))
+        while queue:
+            node = queue.popleft()
+            for word, child in six.iteritems(goto[node]):
+                suffix = fail[node]
+                while suffix and word not in goto[suffix]:
+                    suffix = fail[suffix]
+                fail[child] = goto[suffix].get(word, 0)
+                report[child] = fail[child] if terms[fail[child]] else report[fail[child]]
+                queue.append(child)
+
+
+def _longest(matches):
+    """Keep the leftmost longest of overlapping sorted matches.
+    """
+    kept, end = [], 0
+    for match in sorted(matches, key=lambda m: (m.start, -m.end, m.id)):
+        if match.start >= end:
+            kept.append(match)
+            end = match.end
+        elif kept[-1][:2] == match[:2]:
+            kept.append(match)
+    return kept
+
+
+def _init_worker(annotator, longest):
+    """Store the annotator used by all the texts of a worker process.
+    """
+    global _worker_state
+    _worker_state = annotator, longest
+
+
+def _annotate_text(text):
+    annotator, longest = _worker_state
+    return annotator.annotate(text, longest)
@@ -0,0 +1,226 @@
+# coding: utf-8
+"""Persistent cache of parsed ontologies.
+
+This module defines `OntologyCache`, which saves the state of parsed
+ontologies in a directory, so that loading the same ontology again
+does not require to parse it and its imports.
+
+Example:
+    >>> from pronto import Ontology
+    >>> from pronto.cache import OntologyCache
+    >>> cache = OntologyCache('tests/run/cache')
+    >>> uo = Ontology('tests/resources/uo.obo', cache=cache)
+    >>> uo = Ontology('tests/resources/uo.obo', cache=cache)  # not parsed
+    >>> cache.clear()
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import hashlib
+import os
+
+import six
+from six.moves import cPickle as pickle
+
+from .utils import atomic_write, unique_everseen
+
+
+class OntologyCache(object):
+    """A directory of parsed ontologies.
+
+    Entries are keyed by the location of an ontology and by the options
+    used to load it, including the mappings of the catalog used to
+    resolve its imports. They record the size, the modification time and,
+    optionally, a SHA-1 digest of every local file the ontology was
+    built from (the ontology itself and its imports), and are only used
+    when none of these files changed.
+
+    Once the cache grows over its maximum size, the least recently used
+    entries are removed.
+
+    Note:
+        Remote ontologies and imports cannot be checked for changes:
+        remote ontologies are never cached, and entries depending on
+        remote imports assume they did not change. Use `OntologyCache.clear`
+        to refresh them.
+
+    """
+
+    _VERSION = 2
+    _SUFFIX = '.pkl'
+
+    def __init__(self, directory=None, max_size=512*1024*1024, check_hash=False):
+        """Create a new cache.
+
+        Arguments:
+            directory (str, optional): the directory where to store the
+                entries. Leave to `None` to use the ``pronto`` directory
+                of the user cache directory.
+            max_size (int, optional): the maximum size of the cache, in
+                bytes.
+            check_hash (bool, optional): if `True`, also compare the
+                SHA-1 digest of the files of an ontology before using
+                an entry, instead of only their size and modification
+                time.
+
+        """
+        self.directory = directory or self.default_directory()
+        self.max_size = max_size
+        self.check_hash = check_hash
+
+    def __repr__(self):
+        return "OntologyCache(\"{}\")".format(self.directory)
+
+    @staticmethod
+    def default_directory():
+        """Get the default location of the cache.
+        """
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'pronto')
+
+    @classmethod
+    def _coerce(cls, cache):
+        """Get an `OntologyCache` from the ``cache`` argument of `Ontology`.
+        """
+        if isinstance(cache, cls):
+            return cache
+        elif cache is True:
+            return cls()
+        elif isinstance(cache, six.string_types):
+            return cls(cache)
+        raise TypeError("cache must be bool, str or OntologyCache, not {}".format(
+            type(cache).__name__))
+
+    def key(self, location, imports=True, import_depth=-1, parser=None, catalog=None):
+        """Get the name of the entry of an ontology loaded with the given options.
+        """
+        import_depth = import_depth if imports else 0
+        mappings = None
+        if catalog is not None and import_depth:
+            mappings = (sorted(six.iteritems(catalog.uris)),
+                        sorted(six.iteritems(catalog.rewrites)))
+        options = (_normalize(location), import_depth, parser, mappings)
+        return hashlib.sha1(repr(options).encode('utf-8')).hexdigest()
+
+    def load(self, ontology, location, imports=True, import_depth=-1, parser=None,
+             catalog=None):
+        """Restore the state of an ontology from the cache.
+
+        Returns:
+            bool: `True` if the ontology was restored, `False` if the
+            cache has no valid entry for the ontology.
+
+        """
+        path = self._entry(self.key(location, imports, import_depth, parser, catalog))
+        try:
+            with open(path, 'rb') as handle:
+                version, sources = pickle.load(handle)
+                if version != self._VERSION or not all(self._is_fresh(*s) for s in sources):
+                    return False
+                ontology.__setstate__(pickle.load(handle))
+            os.utime(path, None)
+        except Exception:   # missing, evicted, corrupted or outdated entries
+            return False
+        ontology.path = location
+        return True
+
+    def store(self, ontology, imports=True, import_depth=-1, parser=None, catalog=None):
+        """Save the state of a parsed ontology in the cache.
+
+        Ontologies without a local path are ignored, as well as errors
+        raised while writing the entry.
+        """
+        if ontology.path is None or _is_remote(ontology.path):
+            return
+        path = self._entry(self.key(ontology.path, imports, import_depth, parser, catalog))
+
+        try:
+            sources = [self._fingerprint(s) for s in unique_everseen(ontology._sources)]
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with atomic_write(path) as handle:
+                pickle.dump((self._VERSION, sources), handle, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(ontology.__getstate__(), handle, pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError, pickle.PicklingError, TypeError):
+            return
+
+        self._evict()
+
+    def clear(self):
+        """Remove all the entries of the cache.
+        """
+        for path, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+    def _entries(self):
+        """List the ``(path, stat)`` of each entry, least recently used first.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if name.endswith(self._SUFFIX) and not name.startswith('.'):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((path, os.stat(path)))
+                except OSError:
+                    pass
+        entries.sort(key=lambda entry: entry[1].st_mtime)
+        return entries
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits.
+        """
+        entries = self._entries()
+        size = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= stat.st_size
+
+    def _fingerprint(self, location):
+        if _is_remote(location):
+            return location, None, None, None
+        location = _normalize(location)
+        stat = os.stat(location)
+        digest = _digest(location) if self.check_hash else None
+        return location, stat.st_size, stat.st_mtime, digest
+
+    def _is_fresh(self, location, size, mtime, digest):
+        if size is None:
+            return True
+        stat = os.stat(location)
+        if stat.st_size != size or (self.check_hash and digest is None):
+            return False
+        if digest is not None and (self.check_hash or stat.st_mtime != mtime):
+            return _digest(location) == digest
+        return stat.st_mtime == mtime
+
+
+def _is_remote(location):
+    return location.startswith(('http', 'ftp'))
+
+
+def _normalize(location):
+    return location if _is_remote(location) else os.path.abspath(location)
+
+
+def _digest(path, blocksize=1024*1024):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(blocksize), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
@@ -0,0 +1,188 @@
+# coding: utf-8
+"""Resolution of ontology imports to local files.
+
+This module defines `Catalog`, which maps the IRIs of imported
+ontologies to local copies, so that imports can be resolved without
+any network access. Catalogs can be built from a Python mapping, or
+loaded from an XML catalog such as the ``catalog-v001.xml`` files
+written by the OWL API and Protégé.
+
+Example:
+    >>> from pronto.catalog import Catalog
+    >>> catalog = Catalog({
+    ...     'http://purl.obolibrary.org/obo/uo.obo': 'tests/resources/uo.obo',
+    ... })
+    >>> catalog.resolve('http://purl.obolibrary.org/obo/uo.obo')
+    'tests/resources/uo.obo'
+    >>> catalog.add_rewrite('http://purl.obolibrary.org/obo/', 'tests/resources/imports/')
+    >>> catalog.resolve('http://purl.obolibrary.org/obo/ro_import.owl')
+    'tests/resources/imports/ro_import.owl.gz'
+    >>> catalog.resolve('http://purl.obolibrary.org/obo/missing.obo') is None
+    True
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import collections
+import os
+import warnings
+
+import six
+
+try:
+    import lxml.etree as etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+from .utils import ProntoWarning
+
+
+XML_BASE = '{http://www.w3.org/XML/1998/namespace}base'
+
+
+class Catalog(object):
+    """A mapping of IRIs to local files.
+
+    A catalog contains two kinds of entries: *URIs*, which map a single
+    IRI to a file, and *rewrites*, which map every IRI starting with
+    a given prefix to a file starting with another prefix (the longest
+    matching prefix is used). An IRI is only resolved to a file that
+    exists: when the file is missing, its gzipped version (with an
+    additional ``.gz`` extension) is used instead, if any.
+
+    Attributes:
+        uris (collections.OrderedDict): the mapping of IRIs to paths.
+        rewrites (collections.OrderedDict): the mapping of IRI prefixes
+            to path prefixes.
+
+    """
+
+    #: str: the name of the catalog the OWL API expects next to an ontology.
+    DEFAULT_NAME = 'catalog-v001.xml'
+
+    def __init__(self, uris=None, rewrites=None):
+        """Create a new catalog.
+
+        Arguments:
+            uris (dict, optional): a mapping of IRIs to local paths.
+            rewrites (dict, optional): a mapping of IRI prefixes to local
+                path prefixes.
+
+        """
+        self.uris = collections.OrderedDict(uris or ())
+        self.rewrites = collections.OrderedDict(rewrites or ())
+
+    def __repr__(self):
+        return "Catalog({} uris, {} rewrites)".format(len(self.uris), len(self.rewrites))
+
+    def __contains__(self, iri):
+        return self.resolve(iri) is not None
+
+    @classmethod
+    def from_xml(cls, path):
+        """Load a catalog from an OASIS XML catalog file.
+
+        ``uri`` and ``rewriteURI`` entries are supported, including in
+        ``group`` elements, as well as ``nextCatalog`` entries.
+        Relative paths are resolved against the directory of the
+        catalog file, or against the enclosing ``xml:base`` attribute.
+
+        Raises:
+            IOError: when the catalog file cannot be read.
+
+        """
+        catalog = cls()
+        catalog._read_xml(path, set())
+        return catalog
+
+    @classmethod
+    def _coerce(cls, catalog):
+        """Get a `Catalog` from the ``catalog`` argument of `Ontology`.
+        """
+        if isinstance(catalog, cls):
+            return catalog
+        elif isinstance(catalog, six.string_types):
+            return cls.from_xml(catalog)
+        elif isinstance(catalog, collections.Mapping):
+            return cls(catalog)
+        raise TypeError("catalog must be str, dict or Catalog, not {}".format(
+            type(catalog).__name__))
+
+    @classmethod
+    def _find(cls, location):
+        """Load the catalog next to a local ontology file, if any.
+        """
+        if location is None or location.startswith(('http', 'ftp')):
+            return None
+        path = os.path.join(os.path.dirname(location), cls.DEFAULT_NAME)
+        if not os.path.isfile(path):
+            return None
+        try:
+            return cls.from_xml(path)
+        except (IOError, OSError, etree.ParseError) as e:
+            warnings.warn("{} occured while reading catalog {}".format(
+                type(e).__name__, path), ProntoWarning)
+            return None
+
+    def add(self, iri, path):
+        """Map an IRI to a local path.
+        """
+        self.uris[iri] = path
+
+    def add_rewrite(self, prefix, rewrite):
+        """Map every IRI starting with ``prefix`` to a path starting with ``rewrite``.
+        """
+        self.rewrites[prefix] = rewrite
+
+    def resolve(self, iri):
+        """Get the local file an IRI is mapped to.
+
+        Returns:
+            str or None: the path to an existing local file, or `None`
+            if the IRI is not in the catalog or if its file is missing.
+
+        """
+        path = self.uris.get(iri)
+        if path is None:
+            prefixes = [p for p in self.rewrites if iri.startswith(p)]
+            if not prefixes:
+                return None
+            prefix = max(prefixes, key=len)
+            path = self.rewrites[prefix] + iri[len(prefix):]
+        for candidate in (path, path + '.gz'):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def _read_xml(self, path, seen):
+        path = os.path.abspath(path)
+        if path in seen:
+            return
+        seen.add(path)
+
+        def walk(element, base):
+            if element.get(XML_BASE):
+                base = _localize(base, element.get(XML_BASE))
+            tag = element.tag.rsplit('}', 1)[-1] if isinstance(element.tag, six.string_types) else None
+            if tag == 'uri' and element.get('name') and element.get('uri'):
+                self.uris.setdefault(element.get('name'), _localize(base, element.get('uri')))
+            elif tag == 'rewriteURI' and element.get('uriStartString'):
+                self.rewrites.setdefault(element.get('uriStartString'),
+                                         _localize(base, element.get('rewritePrefix', '')))
+            elif tag == 'nextCatalog' and element.get('catalog'):
+                self._read_xml(_localize(base, element.get('catalog')), seen)
+            for child in element:
+                walk(child, base)
+
+        walk(etree.parse(path).getroot(), os.path.dirname(path))
+
+
+def _localize(base, uri):
+    """Get the path of a catalog entry, relative to the given base.
+    """
+    if uri.startswith('file://'):
+        uri = uri[len('file://'):]
+    path = os.path.join(base, uri.replace('/', os.sep))
+    # keep the trailing separator of rewrite prefixes
+    return os.path.normpath(path) + (os.sep if uri.endswith('/') else '')
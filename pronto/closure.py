@@ -0,0 +1,464 @@
+# coding: utf-8
+"""Transitive closure of the relations of an ontology.
+
+This module defines `ClosureIndex`, which stores the ancestors and the
+descendants of every term of an ontology in compact arrays, so that
+subsumption queries do not need to walk the ontology graph.
+
+Example:
+    >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+    >>> index = cl.closure()
+    >>> index.is_descendant('CL:0000540', 'CL:0000000')
+    True
+    >>> index.is_descendant('CL:0000000', 'CL:0000540')
+    False
+    >>> 'CL:0000003' in index.ancestors('CL:0000540')
+    True
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import array
+import bisect
+import collections
+import itertools
+
+import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .identifiers import IdTable
+from .relationship import Relationship
+from .term import Term, TermList, _direct, _iter_relations
+from .utils import unique_everseen
+
+
+class ClosureIndex(object):
+    """The transitive closure of some relationships of an ontology.
+
+    Terms are numbered by their position in the ontology, followed by
+    the terms outside of the ontology that are the target of a relation.
+    The ancestors and the descendants of each term are stored as sorted
+    positions in two CSR-like pairs of `array.array` (an array of offsets
+    and an array of positions). The batch methods use `numpy`, if it is
+    available, to answer many queries at once without creating any
+    `Term` or `TermList`.
+
+    The ancestors are computed once for each term in topological order,
+    by merging the ancestors of its parents. Terms that are part of a
+    cycle (or that descend from a cycle) are handled as well, and are
+    their own ancestors and descendants.
+
+    Attributes:
+        ids (list or ~pronto.identifiers.IdTable): the identifier of
+            each term, by position.
+        terms (list): the `Term` instances of each position.
+        relationships (tuple): the relationships followed to find the
+            ancestors of a term. The descendants of a term are found by
+            following the same relationships in the other direction.
+
+    """
+
+    def __init__(self, ontology, relationships=None, compact=False):
+        """Build the closure index of an ontology.
+
+        Arguments:
+            ontology (~pronto.Ontology): the ontology to index.
+            relationships (iterable, optional): the relationships (as
+                `Relationship` instances or names) to follow from a term
+                to its ancestors. Leave to `None` to use all the bottomup
+                relationships, as `Term.parents` does.
+            compact (bool): store the identifiers of the terms in an
+                `~pronto.identifiers.IdTable` instead of a `list` and a
+                `dict`, which takes less memory but makes finding the
+                position of a term slower.
+
+        """
+        if relationships is None:
+            relationships = Relationship.bottomup()
+        self.relationships = tuple(
+            r if isinstance(r, Relationship) else Relationship(r)
+                for r in relationships
+        )
+
+        self.terms = list(six.itervalues(ontology.terms))
+        self.ids = [term.id for term in self.terms]
+        self._positions = {id: i for i, id in enumerate(self.ids)}
+        self._size = len(self.terms)
+        self._exact_children = False
+        self._cyclic = frozenset()
+        self._keys = None
+
+        parents = self._collect_parents()
+        if compact:
+            self.ids = IdTable(self.ids)
+            self._positions = self.ids.positions
+        self._up_offsets, self._up_indices = self._closure(parents)
+        self._down_offsets, self._down_indices = self._invert()
+
+    def __repr__(self):
+        return "ClosureIndex({} terms, {} relationships)".format(
+            len(self.ids), len(self.relationships))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, term):
+        return getattr(term, 'id', term) in self._positions
+
+    def position(self, term):
+        """Get the position of a term in the index.
+
+        Arguments:
+            term (~pronto.Term or str): a term or a term identifier.
+
+        Raises:
+            KeyError: when the term is not in the index.
+
+        """
+        return self._positions[getattr(term, 'id', term)]
+
+    def is_descendant(self, term, other):
+        """Check whether ``term`` is a (strict) descendant of ``other``.
+
+        Arguments:
+            term (~pronto.Term or str): a term or a term identifier.
+            other (~pronto.Term or str): a term or a term identifier.
+
+        Raises:
+            KeyError: when either term is not in the index.
+
+        """
+        return self._is_descendant(self.position(term), self.position(other))
+
+    def is_ancestor(self, term, other):
+        """Check whether ``term`` is a (strict) ancestor of ``other``.
+        """
+        return self.is_descendant(other, term)
+
+    def ancestors(self, term):
+        """Get the identifiers of all the ancestors of a term.
+
+        Raises:
+            KeyError: when the term is not in the index.
+
+        """
+        return [self.ids[i] for i in self.ancestor_positions(self.position(term))]
+
+    def descendants(self, term):
+        """Get the identifiers of all the descendants of a term.
+
+        Raises:
+            KeyError: when the term is not in the index.
+
+        """
+        return [self.ids[i] for i in self.descendant_positions(self.position(term))]
+
+    def ancestor_positions(self, i):
+        """Get the sorted positions of the ancestors of the term at position ``i``.
+        """
+        return self._up_indices[self._up_offsets[i]:self._up_offsets[i+1]].tolist()
+
+    def descendant_positions(self, i):
+        """Get the sorted positions of the descendants of the term at position ``i``.
+        """
+        return self._down_indices[self._down_offsets[i]:self._down_offsets[i+1]].tolist()
+
+    def batch_positions(self, terms):
+        """Get the positions of several terms.
+
+        Arguments:
+            terms (iterable): terms or term identifiers, or an integer
+                `numpy` array of positions, which is returned as is.
+
+        Returns:
+            numpy.ndarray or list: the position of each term, as a
+            `numpy` array if `numpy` is available.
+
+        Raises:
+            KeyError: when a term is not in the index.
+
+        """
+        if numpy is not None and isinstance(terms, numpy.ndarray) and terms.dtype.kind in 'iu':
+            return terms.astype(numpy.intp, copy=False)
+        positions = self._positions
+        found = [positions[getattr(t, 'id', t)] for t in terms]
+        return numpy.array(found, dtype=numpy.intp) if numpy is not None else found
+
+    def batch_is_descendant(self, terms, others):
+        """Check whether each term is a (strict) descendant of another term.
+
+        Arguments:
+            terms (iterable): the terms to check (see `batch_positions`).
+            others (iterable): the candidate ancestor of each term.
+
+        Returns:
+            numpy.ndarray or list: a boolean mask, with `True` where the
+            term is a descendant of the term at the same index in
+            ``others``.
+
+        Raises:
+            ValueError: when ``terms`` and ``others`` differ in length.
+            KeyError: when a term is not in the index.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> mask = cl.closure().batch_is_descendant(
+            ...     ['CL:0000540', 'CL:0000000'], ['CL:0000000', 'CL:0000540'])
+            >>> [bool(x) for x in mask]
+            [True, False]
+
+        """
+        terms, others = self.batch_positions(terms), self.batch_positions(others)
+        if len(terms) != len(others):
+            raise ValueError("terms and others must have the same length")
+        if numpy is None:
+            return [self._is_descendant(i, j) for i, j in six.moves.zip(terms, others)]
+
+        keys = self._pair_keys()
+        queries = terms.astype(numpy.int64) * len(self.ids) + others
+        found = numpy.searchsorted(keys, queries)
+        mask = found < len(keys)
+        mask[mask] = keys[found[mask]] == queries[mask]
+        return mask
+
+    def batch_ancestors(self, terms):
+        """Get the ancestors of several terms, as a CSR-like pair of arrays.
+
+        Returns:
+            tuple: an array of ``len(terms) + 1`` offsets, and an array of
+            positions, such that the positions of the ancestors of the
+            *i*-th term are ``positions[offsets[i]:offsets[i+1]]``.
+            Use `ClosureIndex.ids` to get the identifiers of the terms.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> index = cl.closure()
+            >>> offsets, positions = index.batch_ancestors(['CL:0000003', 'CL:0000000'])
+            >>> [int(x) for x in offsets]
+            [0, 3, 4]
+            >>> [index.ids[i] for i in positions[offsets[0]:offsets[1]]]
+            ['CL:0000000', 'GO:0005575', 'GO:0005623']
+
+        """
+        return self._expand(self._up_offsets, self._up_indices, self.batch_positions(terms))
+
+    def batch_descendants(self, terms):
+        """Get the descendants of several terms, as a CSR-like pair of arrays.
+
+        See Also:
+            `ClosureIndex.batch_ancestors` for a description of the arrays.
+
+        """
+        return self._expand(self._down_offsets, self._down_indices, self.batch_positions(terms))
+
+    def _is_descendant(self, i, j):
+        lo, hi = self._up_offsets[i], self._up_offsets[i+1]
+        k = bisect.bisect_left(self._up_indices, j, lo, hi)
+        return k < hi and self._up_indices[k] == j
+
+    def _view(self, values):
+        """Get a `numpy` array sharing the memory of an `array.array`.
+        """
+        return numpy.frombuffer(values, dtype=numpy.dtype(str('l')))
+
+    def _pair_keys(self):
+        """Get the sorted ``descendant * len(self) + ancestor`` keys of the index.
+        """
+        if self._keys is None:
+            offsets = self._view(self._up_offsets)
+            rows = numpy.repeat(numpy.arange(len(self.ids), dtype=numpy.int64), numpy.diff(offsets))
+            self._keys = rows * len(self.ids) + self._view(self._up_indices)
+        return self._keys
+
+    def _expand(self, offsets, indices, positions):
+        """Gather the rows of a CSR-like pair of arrays.
+        """
+        if numpy is None:
+            found, bounds = array.array(str('l')), array.array(str('l'), [0])
+            for i in positions:
+                found.extend(indices[offsets[i]:offsets[i+1]])
+                bounds.append(len(found))
+            return bounds, found
+
+        offsets, indices = self._view(offsets), self._view(indices)
+        starts = offsets[positions]
+        counts = offsets[positions + 1] - starts
+        bounds = numpy.zeros(len(positions) + 1, dtype=numpy.intp)
+        numpy.cumsum(counts, out=bounds[1:])
+        gather = numpy.repeat(starts - bounds[:-1], counts) + numpy.arange(bounds[-1])
+        return bounds, indices[gather]
+
+    def _attach(self):
+        """Make the terms of the ontology use the index in their methods.
+
+        `Term.rchildren` follows the topdown relationships instead of
+        following the bottomup ones backwards: the descendants in the
+        index are only used if both give the same children to each term.
+        """
+        bottomup, topdown = set(self.relationships), set(Relationship.topdown())
+        expected = [set() for _ in six.moves.range(len(self.ids))]
+        children = [set() for _ in six.moves.range(len(self.ids))]
+        for i, term in enumerate(self.terms):
+            for relation, others in _iter_relations(getattr(term, 'relations', {})):
+                if relation in bottomup:
+                    for other in others:
+                        expected[self._positions[getattr(other, 'id', other)]].add(i)
+                elif relation in topdown:
+                    children[i].update(self._positions.get(getattr(other, 'id', other))
+                                       for other in others)
+        self._exact_children = expected == children
+
+        for term in self.terms[:self._size]:
+            term._closure = self
+
+    def _detach(self):
+        """Make the terms of the ontology stop using the index.
+        """
+        for term in self.terms[:self._size]:
+            if term._closure is self:
+                term._closure = None
+
+    def _ordered_terms(self, term, direction):
+        """Get the result of `Term.rparents` or `Term.rchildren` for a term.
+
+        The ancestors (``'bottomup'``) or the descendants (``'topdown'``)
+        of a term are its neighbours followed by the memoized results of
+        each neighbour, without duplicates, which is the order in which
+        `Term.iter_rparents` and `Term.iter_rchildren` find them. Results
+        are memoized in the terms, so that each term is only processed
+        once whatever the number of terms it is reachable from.
+
+        Returns:
+            ~pronto.TermList: the ancestors or descendants of the term,
+            or `None` when they must be found by walking the graph
+            (when a cycle is reachable from the term, or when the
+            children of terms are not the inverse of their parents).
+
+        """
+        i = self.position(term)
+        if direction == 'bottomup':
+            memo, reachable = '_rparents', self.ancestor_positions(i)
+        elif self._exact_children:
+            memo, reachable = '_rchildren', self.descendant_positions(i)
+        else:
+            return None
+        if self._cyclic and (i in self._cyclic or not self._cyclic.isdisjoint(reachable)):
+            return None
+
+        key, stack = (-1, True), [term]
+        while stack:
+            current = stack[-1]
+            if key in getattr(current, memo):
+                stack.pop()
+                continue
+            neighbours = _direct(current, direction)
+            missing = [x for x in neighbours if key not in getattr(x, memo)]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            getattr(current, memo)[key] = TermList(unique_everseen(itertools.chain(
+                neighbours, *(getattr(x, memo)[key] for x in neighbours))))
+        return getattr(term, memo)[key]
+
+    def _collect_parents(self):
+        """Get the positions of the parents of each term.
+
+        Terms outside of the ontology are given new positions when first
+        found, and their own relations are followed as well.
+        """
+        relationships = set(self.relationships)
+        parents = []
+        i = 0
+        while i < len(self.terms):
+            term = self.terms[i]
+            found = []
+            for relation, others in _iter_relations(getattr(term, 'relations', {})):
+                if relation in relationships:
+                    found.extend(self._add(other) for other in others)
+            parents.append(found)
+            i += 1
+        return parents
+
+    def _add(self, term):
+        id = getattr(term, 'id', term)
+        position = self._positions.get(id)
+        if position is None:
+            position = self._positions[id] = len(self.ids)
+            self.ids.append(id)
+            self.terms.append(term if isinstance(term, Term) else Term(id, '', ''))
+        return position
+
+    def _closure(self, parents):
+        """Compute the ancestors of each term, in topological order.
+        """
+        size = len(parents)
+        children = [[] for _ in six.moves.range(size)]
+        pending = [0] * size
+        for i, ps in enumerate(parents):
+            for p in set(ps):
+                children[p].append(i)
+                pending[i] += 1
+
+        ancestors = [None] * size
+        queue = collections.deque(i for i in six.moves.range(size) if not pending[i])
+        while queue:
+            i = queue.popleft()
+            found = set(parents[i])
+            for p in parents[i]:
+                found.update(ancestors[p])
+            ancestors[i] = found
+            for c in children[i]:
+                pending[c] -= 1
+                if not pending[c]:
+                    queue.append(c)
+
+        # terms left are in a cycle, or below one: explore their ancestors
+        cyclic = set()
+        for i in six.moves.range(size):
+            if ancestors[i] is None:
+                found, stack = set(), list(parents[i])
+                while stack:
+                    p = stack.pop()
+                    if p not in found:
+                        found.add(p)
+                        if ancestors[p] is not None:
+                            found.update(ancestors[p])
+                        else:
+                            stack.extend(parents[p])
+                ancestors[i] = found
+                if i in found:
+                    cyclic.add(i)
+        self._cyclic = frozenset(cyclic)
+
+        offsets, indices = array.array(str('l'), [0]), array.array(str('l'))
+        for found in ancestors:
+            indices.extend(sorted(found))
+            offsets.append(len(indices))
+        return offsets, indices
+
+    def _invert(self):
+        """Compute the descendants of each term from their ancestors.
+        """
+        size = len(self.ids)
+        counts = [0] * (size + 1)
+        for j in self._up_indices:
+            counts[j+1] += 1
+        for j in six.moves.range(size):
+            counts[j+1] += counts[j]
+
+        offsets = array.array(str('l'), counts)
+        indices = array.array(str('l'), [0]) * counts[-1]
+        fill = counts[:-1]
+        up_offsets, up_indices = self._up_offsets, self._up_indices
+        for i in six.moves.range(size):
+            for j in up_indices[up_offsets[i]:up_offsets[i+1]]:
+                indices[fill[j]] = i
+                fill[j] += 1
+        return offsets, indices
+
@@ -10,8 +10,17 @@ import six
 
 class Description(six.text_type):
     """A description with optional cross-references.
+
+    The text of a description cannot be changed. Its cross-references
+    are stored in a `tuple`, which can be shared by several descriptions:
+    assign a new ``xref`` tuple instead of editing it in place.
+
+    Note:
+        ``xref`` used to be a `list`. Code appending to it must now
+        assign a new tuple, e.g. ``desc.xref += ('PMID:1',)``.
     """
 
+    __slots__ = ['xref']
     _RX_OBO_EXTRACTER = re.compile(r'[\"\'](.*)[\"\']( \[(.+)\])?')
 
     @classmethod
@@ -29,10 +38,13 @@ class Description(six.text_type):
         return super(Description, cls).__new__(cls, text)
 
     def __init__(self, text, xref=None):
-        self.xref = xref or []
+        self.xref = tuple(xref) if xref else ()
 
     def __repr__(self):
-        return "Description('{}', {})".format(self, self.xref)
+        return "Description('{}', {})".format(self, list(self.xref))
+
+    def __reduce__(self):
+        return Description, (six.text_type(self), self.xref)
 
     @property
     def obo(self):
@@ -0,0 +1,294 @@
+# coding: utf-8
+"""Retrieval of remote ontologies.
+
+This module defines `Fetcher`, which downloads remote ontologies
+through persistent HTTP connections, and keeps the downloaded files in
+a cache directory so that they are only downloaded again when the
+server reports they changed.
+
+Example:
+    >>> from pronto.fetch import Fetcher
+    >>> fetcher = Fetcher('tests/run/http')
+    >>> with fetcher.open('http://localhost:8080/uo.obo') as handle:
+    ...     print(handle.readline().decode('utf-8').strip())
+    format-version: 1.2
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+import six
+from six.moves import http_client
+from six.moves.urllib.error import URLError, HTTPError
+from six.moves.urllib.parse import urljoin, urlsplit
+from six.moves.urllib.request import getproxies, urlopen
+
+from .utils import atomic_write
+
+
+class Fetcher(object):
+    """A downloader of remote files with keep-alive connections and a cache.
+
+    HTTP connections are kept open after each request, and reused for
+    the following requests to the same host. Downloaded files are
+    written to the cache directory, with the ``ETag`` and ``Last-Modified``
+    headers of the response: when the same URL is requested again, the
+    server is asked to only send the file if it changed since, using
+    the ``If-None-Match`` and ``If-Modified-Since`` headers.
+
+    Files are always streamed to the disk, either in the cache directory
+    or in a temporary file, and never loaded in memory entirely. URLs
+    that do not use HTTP (such as FTP URLs) are downloaded with `urlopen`,
+    without being cached.
+
+    Once the cache directory grows over its maximum size, the least
+    recently used files are removed.
+
+    """
+
+    _CHUNK_SIZE = 64 * 1024
+    _MAX_REDIRECTS = 10
+    _REDIRECTS = {301, 302, 303, 307, 308}
+
+    def __init__(self, directory=None, cache=True, max_size=512*1024*1024):
+        """Create a new fetcher.
+
+        Arguments:
+            directory (str, optional): the directory where to store the
+                downloaded files. Leave to `None` to use the ``http``
+                directory of the default `~pronto.cache.OntologyCache`
+                directory.
+            cache (bool, optional): set to `False` to never keep the
+                downloaded files.
+            max_size (int, optional): the maximum size of the cache
+                directory, in bytes.
+
+        """
+        if directory is None:
+            from .cache import OntologyCache
+            directory = os.path.join(OntologyCache.default_directory(), 'http')
+        self.directory = directory
+        self.cache = cache
+        self.max_size = max_size
+        self._idle = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "Fetcher(\"{}\")".format(self.directory)
+
+    def open(self, url, timeout=2):
+        """Open the file at the given URL for reading.
+
+        Returns:
+            io.BufferedReader: a binary file handle, at the beginning
+            of the downloaded file.
+
+        Raises:
+            ~urllib.error.HTTPError: when the server answers with an
+                error status.
+            ~urllib.error.URLError: when the server cannot be reached.
+
+        """
+        if not url.startswith(('http://', 'https://')):
+            with contextlib.closing(urlopen(url, timeout=timeout)) as response:
+                return self._download(response)
+
+        path = self._entry(url) if self.cache else None
+        info = self._load_info(path) if path is not None else {}
+        headers = {}
+        if info.get('etag'):
+            headers['If-None-Match'] = info['etag']
+        if info.get('last_modified'):
+            headers['If-Modified-Since'] = info['last_modified']
+
+        location = url
+        for _ in six.moves.range(self._MAX_REDIRECTS + 1):
+            # the connection goes back to the pool of the requested host,
+            # not the host a redirection points to
+            requested = location
+            connection, response = self._request(requested, headers, timeout)
+            try:
+                if response.status in self._REDIRECTS and response.getheader('Location'):
+                    location = urljoin(location, response.getheader('Location'))
+                    response.read()
+                    continue
+                elif response.status == 304 and info:
+                    response.read()
+                    handle = open(path, 'rb')
+                    os.utime(path, None)
+                    return handle
+                elif response.status >= 400:
+                    raise HTTPError(requested, response.status, response.reason,
+                                    response.msg, None)
+                return self._download(response, path, {
+                    'url': url,
+                    'etag': response.getheader('ETag'),
+                    'last_modified': response.getheader('Last-Modified'),
+                })
+            finally:
+                self._release(requested, connection, response)
+
+        raise HTTPError(url, response.status, "too many redirections", response.msg, None)
+
+    def clear(self):
+        """Remove all the files from the cache directory.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _entry(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _load_info(self, path):
+        """Load the headers of a cached file, if the file was cached.
+        """
+        try:
+            with open(path + '.json', 'rb') as handle:
+                info = json.loads(handle.read().decode('utf-8'))
+            return info if os.path.exists(path) else {}
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _download(self, response, path=None, info=None):
+        """Write the body of a response to the cache, or to a temporary file.
+
+        The body is only written to a temporary file if the cache cannot
+        be written to before the response is read: errors raised once
+        the body started to be read are propagated, since the rest of
+        the body would be incomplete.
+        """
+        if path is not None:
+            reading = False
+            try:
+                if not os.path.isdir(self.directory):
+                    os.makedirs(self.directory)
+                with atomic_write(path) as handle:
+                    reading = True
+                    shutil.copyfileobj(response, handle, self._CHUNK_SIZE)
+                with atomic_write(path + '.json') as handle:
+                    handle.write(json.dumps(info).encode('utf-8'))
+                handle = open(path, 'rb')
+                self._evict()
+                return handle
+            except (IOError, OSError):
+                if reading:
+                    raise
+
+        handle = tempfile.TemporaryFile()
+        shutil.copyfileobj(response, handle, self._CHUNK_SIZE)
+        handle.seek(0)
+        return handle
+
+    def _evict(self):
+        """Remove the least recently used files until the cache fits.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        entries, size = [], 0
+        for name in names:
+            if name.startswith('.'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            size += stat.st_size
+            if not name.endswith('.json'):
+                entries.append((stat.st_mtime, name))
+        entries.sort()
+        for _, name in entries:
+            if size <= self.max_size:
+                break
+            for path in (name, name + '.json'):
+                path = os.path.join(self.directory, path)
+                try:
+                    stat = os.stat(path)
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= stat.st_size
+
+    def _connect(self, location, timeout):
+        """Create a new connection to the host of ``location``.
+        """
+        parts = urlsplit(location)
+        cls = http_client.HTTPSConnection if parts.scheme == 'https' else http_client.HTTPConnection
+        proxy = getproxies().get(parts.scheme)
+        if proxy is None:
+            return cls(parts.netloc, timeout=timeout), False
+        proxy = urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+        if parts.scheme == 'https':
+            connection = cls(proxy.netloc, timeout=timeout)
+            connection.set_tunnel(parts.netloc)
+            return connection, False
+        return http_client.HTTPConnection(proxy.netloc, timeout=timeout), True
+
+    def _request(self, location, headers, timeout):
+        """Send a GET request, reusing an idle connection if possible.
+
+        Returns:
+            tuple: the connection and the response.
+
+        """
+        parts = urlsplit(location)
+        target = parts.path or '/'
+        if parts.query:
+            target = '{}?{}'.format(target, parts.query)
+
+        with self._lock:
+            idle = self._idle[(parts.scheme, parts.netloc)]
+            connection = idle.pop() if idle else None
+
+        while True:
+            reused = connection is not None
+            if connection is None:
+                connection, proxied = self._connect(location, timeout)
+                connection._pronto_proxied = proxied
+            else:
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+            try:
+                connection.request('GET', location if connection._pronto_proxied else target,
+                                   headers=headers)
+                return connection, connection.getresponse()
+            except (http_client.HTTPException, socket.error) as e:
+                connection.close()
+                connection = None
+                if not reused:  # a reused connection may have been closed by the server
+                    if isinstance(e, socket.timeout):
+                        raise
+                    raise URLError(e)
+
+    def _release(self, location, connection, response):
+        """Make a connection available again once its response was read.
+        """
+        if response.will_close or not response.isclosed():
+            connection.close()
+            return
+        parts = urlsplit(location)
+        with self._lock:
+            self._idle[(parts.scheme, parts.netloc)].append(connection)
+
+
+#: Fetcher: the `Fetcher` used to open remote ontologies.
+default_fetcher = Fetcher()
@@ -0,0 +1,223 @@
+# coding: utf-8
+"""Compact storage of the relations between the terms of an ontology.
+
+This module defines `TermGraph`, which stores the relations of all the
+terms of an ontology in a few arrays of integers, instead of a `dict`
+of `TermList` for each term. Once an ontology is linked, the
+`Term.relations` of its terms are `~pronto.term.Relations` views over
+its graph.
+
+Example:
+    >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+    >>> type(cl['CL:0002380'].relations)
+    <class 'pronto.term.Relations'>
+    >>> cl['CL:0002380'].relations[Relationship('is_a')]
+    [<CL:0000605: fungal asexual spore>]
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import array
+import collections
+
+import six
+
+from .term import Term, Relations, _iter_relations
+
+
+class TermGraph(object):
+    """The relations of the terms of an ontology, stored in arrays.
+
+    Terms are numbered by their position in the ontology, followed by
+    the terms outside of the ontology that are the target of a relation.
+    The relations of each term are stored in the order of its former
+    `Term.relations`, with the same layout as the state of a pickled
+    `~pronto.Ontology`:
+
+    * the relations of the *i*-th term are the groups
+      ``groups[i]:groups[i+1]``;
+    * the *g*-th group is a relation ``relations[kinds[g]]`` to the
+      terms at positions ``targets[bounds[g]:bounds[g+1]]``.
+
+    The parents and the children of every term (the targets of its
+    bottomup and topdown relations) are also stored as CSR-like pairs of
+    arrays (an array of offsets and an array of positions), so that
+    `Term.rparents` and `Term.rchildren` walk the graph without creating
+    any intermediate `TermList`. Once the relations of a term are
+    changed through its `~pronto.term.Relations`, the graph is marked
+    as stale and traversals follow `Term.relations` again, until
+    `Ontology.reference` creates a new graph.
+
+    Attributes:
+        terms (list): the `Term` at each position.
+        relations (list): the `Relationship` of each relation kind.
+
+    """
+
+    def __init__(self, terms, relations, groups, kinds, bounds, targets):
+        """Create a graph from its arrays.
+
+        See `TermGraph` for a description of the arguments, and use
+        `TermGraph.from_terms` to create the graph of some terms.
+
+        """
+        self.terms = terms
+        self.relations = relations
+        self._groups = groups
+        self._kinds = kinds
+        self._bounds = bounds
+        self._targets = targets
+        self._kind = {relation: k for k, relation in enumerate(relations)}
+        self._stale = any(term.relations for term in terms[len(self):])
+        self._up_offsets, self._up_targets = self._neighbourhood('bottomup')
+        self._down_offsets, self._down_targets = self._neighbourhood('topdown')
+
+    def __repr__(self):
+        return "TermGraph({} terms, {} relations)".format(
+            len(self._groups) - 1, len(self._targets))
+
+    def __len__(self):
+        return len(self._groups) - 1
+
+    @classmethod
+    def from_terms(cls, terms):
+        """Store the relations of the terms of an ontology.
+
+        Relation targets given as identifiers are replaced with the
+        term of the same identifier in ``terms``, or with a new empty
+        `Term` when there is none, as `Ontology.reference` does.
+
+        Arguments:
+            terms (dict): a mapping of identifiers to the terms of an
+                ontology, such as `Ontology.terms`.
+
+        """
+        linked = list(six.itervalues(terms))
+        positions = {term.id: i for i, term in enumerate(linked)}
+        kinds_of = collections.OrderedDict()
+        groups, kinds = array.array(str('l'), [0]), array.array(str('H'))
+        bounds, targets = array.array(str('l'), [0]), array.array(str('l'))
+
+        for i in six.moves.range(len(positions)):
+            for relation, others in _iter_relations(linked[i].relations):
+                kinds.append(kinds_of.setdefault(relation, len(kinds_of)))
+                for other in others:
+                    id = getattr(other, 'id', other)
+                    position = positions.get(id)
+                    if position is None:
+                        position = positions[id] = len(linked)
+                        linked.append(other if isinstance(other, Term) else Term(id, '', ''))
+                    targets.append(position)
+                bounds.append(len(targets))
+            groups.append(len(kinds))
+
+        return cls(linked, list(kinds_of), groups, kinds, bounds, targets)
+
+    def attach(self):
+        """Make the terms of the graph use it as their `Term.relations`.
+        """
+        for i in six.moves.range(len(self)):
+            term = self.terms[i]
+            term.relations = Relations(self, i)
+            term._children = term._parents = None
+
+    def items(self, i):
+        """Iterate over the relations of the term at position ``i``.
+
+        Yields:
+            tuple: a `Relationship`, and the list of the `Term` it
+            relates the term to.
+
+        """
+        kinds, bounds, targets, terms = self._kinds, self._bounds, self._targets, self.terms
+        for g in six.moves.range(self._groups[i], self._groups[i+1]):
+            yield (self.relations[kinds[g]],
+                   [terms[j] for j in targets[bounds[g]:bounds[g+1]]])
+
+    def kinds(self, i):
+        """Get the relationships of the term at position ``i``.
+        """
+        return [self.relations[self._kinds[g]]
+                for g in six.moves.range(self._groups[i], self._groups[i+1])]
+
+    def get(self, i, relation):
+        """Get the terms related to the term at position ``i``, or `None`.
+        """
+        kind = self._kind.get(relation)
+        if kind is not None:
+            for g in six.moves.range(self._groups[i], self._groups[i+1]):
+                if self._kinds[g] == kind:
+                    start, end = self._bounds[g], self._bounds[g+1]
+                    return [self.terms[j] for j in self._targets[start:end]]
+        return None
+
+    def parents(self, i):
+        """Get the parents of the term at position ``i``, as a list.
+        """
+        return [self.terms[j] for j in self._up_targets[self._up_offsets[i]:self._up_offsets[i+1]]]
+
+    def children(self, i):
+        """Get the children of the term at position ``i``, as a list.
+        """
+        return [self.terms[j] for j in self._down_targets[self._down_offsets[i]:self._down_offsets[i+1]]]
+
+    def walk(self, i, direction):
+        """Iterate over the recursive parents or children of a term.
+
+        The terms are yielded in the order of `Term.iter_rparents` and
+        `Term.iter_rchildren`, by exploring the arrays of the graph.
+
+        Arguments:
+            i (int): the position of the term to start from.
+            direction (str): either ``'bottomup'`` for parents or
+                ``'topdown'`` for children.
+
+        Returns:
+            generator: the recursive parents or children of the term, or
+            `None` if a term of the graph was changed since the graph was
+            created, and the arrays cannot be used.
+
+        """
+        if self._stale:
+            return None
+        if direction == 'bottomup':
+            return self._walk(i, self._up_offsets, self._up_targets)
+        return self._walk(i, self._down_offsets, self._down_targets)
+
+    def _walk(self, i, offsets, targets):
+        terms, size = self.terms, len(self)
+        emitted, explored, stack = set(), {i}, []
+        while True:
+            others = targets[offsets[i]:offsets[i+1]] if i < size else ()
+            for j in others:
+                if j not in emitted:
+                    emitted.add(j)
+                    yield terms[j]
+            stack.append(iter(others))
+            while stack:
+                i = next((j for j in stack[-1] if j not in explored), None)
+                if i is not None:
+                    explored.add(i)
+                    break
+                stack.pop()
+            else:
+                break
+
+    def _neighbourhood(self, direction):
+        """Get the unique targets of the relations of a direction, by term.
+        """
+        followed = {k for k, relation in enumerate(self.relations)
+                    if relation.direction == direction}
+        kinds, bounds, targets = self._kinds, self._bounds, self._targets
+        offsets, found = array.array(str('l'), [0]), array.array(str('l'))
+        for i in six.moves.range(len(self)):
+            seen = set()
+            for g in six.moves.range(self._groups[i], self._groups[i+1]):
+                if kinds[g] in followed:
+                    for j in targets[bounds[g]:bounds[g+1]]:
+                        if j not in seen:
+                            seen.add(j)
+                            found.append(j)
+            offsets.append(len(found))
+        return offsets, found
@@ -0,0 +1,189 @@
+# coding: utf-8
+"""Compact storage of term identifiers.
+
+This module defines `IdTable`, a sequence of term identifiers which
+stores most of them as a prefix and an integer local identifier. It can
+be used by the indexes of an ontology (see `Ontology.closure`) instead
+of a `list` of identifiers and a `dict` of their positions, so that
+indexes of huge ontologies take less memory.
+
+Example:
+    >>> from pronto.identifiers import IdTable
+    >>> table = IdTable(['GO:0008150', 'GO:0003674', 'CL:0000000', 'owl:Thing'])
+    >>> table[1]
+    'GO:0003674'
+    >>> table.positions['CL:0000000']
+    2
+    >>> table.positions.get('GO:0000001') is None
+    True
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import array
+import bisect
+import collections
+import re
+
+import six
+
+
+class IdTable(collections.Sequence):
+    """An immutable sequence of unique term identifiers.
+
+    Identifiers ending with digits (such as ``GO:0008150``) are split
+    into a prefix (``GO:``) and an integer (``8150``), and only the
+    position of their prefix in a prefix table and their integer are
+    stored, in two `array.array`. Prefixes also record the number of
+    digits, so that zero-padded identifiers are rebuilt exactly. Other
+    identifiers are stored as they are.
+
+    Positions of identifiers are found with a binary search in the
+    sorted integers of their prefix, which is slower than a `dict`
+    lookup, but needs much less memory.
+
+    Attributes:
+        positions (~collections.Mapping): a mapping of the identifiers
+            of the table to their positions.
+
+    """
+
+    _RX_LOCAL = re.compile(r'(.*?)([0-9]{1,18})\Z', re.S)
+
+    def __init__(self, ids):
+        """Create a table from unique identifiers, stored in order.
+
+        Raises:
+            ValueError: when an identifier is given several times.
+
+        """
+        self._prefixes, self._kinds = [], {}
+        self._prefix, local = array.array(str('i')), []
+        self._others, self._other_positions = {}, {}
+
+        for i, id in enumerate(ids):
+            match = self._RX_LOCAL.match(id)
+            if match is None:
+                if id in self._other_positions:
+                    raise ValueError("duplicate identifier: {}".format(id))
+                self._others[i] = id
+                self._other_positions[id] = i
+                self._prefix.append(-1)
+                local.append(0)
+            else:
+                prefix, digits = match.groups()
+                kind = self._kinds.setdefault((prefix, len(digits)), len(self._prefixes))
+                if kind == len(self._prefixes):
+                    self._prefixes.append((prefix, len(digits)))
+                self._prefix.append(kind)
+                local.append(int(digits))
+
+        # most identifiers have less than 10 digits: use 4-byte integers
+        typecode = str('i') if max(local or [0]) < 2**31 else str('l')
+        self._local = array.array(typecode, local)
+        self._sort()
+        self.positions = _Positions(self)
+
+    def __len__(self):
+        return len(self._prefix)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in six.moves.range(*i.indices(len(self)))]
+        kind = self._prefix[i]
+        if kind < 0:
+            return self._others[i % len(self)]
+        prefix, width = self._prefixes[kind]
+        return '{}{:0{}d}'.format(prefix, self._local[i], width)
+
+    def __contains__(self, id):
+        return self.position(id) is not None
+
+    def __repr__(self):
+        return "IdTable({} identifiers, {} prefixes)".format(len(self), len(self._prefixes))
+
+    def index(self, id):
+        """Get the position of an identifier in the table.
+
+        Raises:
+            ValueError: when the identifier is not in the table.
+
+        """
+        position = self.position(id)
+        if position is None:
+            raise ValueError("{!r} is not in table".format(id))
+        return position
+
+    def position(self, id):
+        """Get the position of an identifier in the table, or `None`.
+        """
+        if not isinstance(id, six.string_types):
+            return None
+        match = self._RX_LOCAL.match(id)
+        if match is None:
+            return self._other_positions.get(id)
+        prefix, digits = match.groups()
+        kind = self._kinds.get((prefix, len(digits)))
+        if kind is None:
+            return None
+        local, start, end = int(digits), self._bounds[kind], self._bounds[kind+1]
+        j = bisect.bisect_left(self._sorted, local, start, end)
+        if j < end and self._sorted[j] == local:
+            return self._order[j]
+        return None
+
+    @property
+    def nbytes(self):
+        """int: the number of bytes used by the arrays of the table.
+        """
+        return sum(len(a) * a.itemsize for a in (
+            self._prefix, self._local, self._sorted, self._order, self._bounds))
+
+    def _sort(self):
+        """Sort the positions of the identifiers by prefix and integer.
+        """
+        order = sorted(
+            (i for i in six.moves.range(len(self)) if self._prefix[i] >= 0),
+            key=lambda i: (self._prefix[i], self._local[i]))
+        self._order = array.array(str('i'), order)
+        self._sorted = array.array(self._local.typecode, (self._local[i] for i in order))
+        self._bounds = array.array(str('i'), [0] * (len(self._prefixes) + 1))
+        for i in order:
+            self._bounds[self._prefix[i] + 1] += 1
+        for k in six.moves.range(len(self._prefixes)):
+            self._bounds[k+1] += self._bounds[k]
+        for k in six.moves.range(len(self._prefixes)):
+            start, end = self._bounds[k], self._bounds[k+1]
+            for j in six.moves.range(start + 1, end):
+                if self._sorted[j] == self._sorted[j-1]:
+                    raise ValueError("duplicate identifier: {}".format(self[self._order[j]]))
+
+
+class _Positions(collections.Mapping):
+    """The positions of the identifiers of an `IdTable`, as a mapping.
+    """
+
+    __slots__ = ['_table']
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, id):
+        position = self._table.position(id)
+        if position is None:
+            raise KeyError(id)
+        return position
+
+    def __contains__(self, id):
+        return self._table.position(id) is not None
+
+    def get(self, id, default=None):
+        position = self._table.position(id)
+        return default if position is None else position
+
+    def __iter__(self):
+        return iter(self._table)
+
+    def __len__(self):
+        return len(self._table)
@@ -0,0 +1,398 @@
+# coding: utf-8
+"""Lazy loading of obo ontologies.
+
+This module defines an index of the stanzas of an obo file, recording
+the byte offsets of each term as well as the targets of its ``is_a``
+and ``relationship`` clauses, and a mapping that only builds the `Term`
+objects of an ontology when they are first accessed.
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import array
+import collections
+import io
+import operator
+import os
+import re
+
+import six
+from six.moves import cPickle as pickle
+
+from .parser.obo import OboParser
+from .parser.utils import OboSection
+from .relationship import Relationship
+from .term import Term, TermList
+from .utils import atomic_write, unique_everseen
+
+
+class OboIndex(object):
+    """A compact index of the stanzas of an obo file.
+
+    Terms are identified by their position in the file. Their relations
+    are stored in flat arrays, in which targets are positions in the
+    list of term ids, followed by the ids that are not defined in the
+    file (``external``).
+
+    Attributes:
+        size (int): the size of the indexed file.
+        mtime (float): the modification time of the indexed file.
+        header (int): the offset of the end of the header.
+        typedefs (list): the ``(start, stop)`` offsets of each typedef.
+        ids (list): the id of each term.
+        spans (array.array): the ``start, stop`` offsets of each term.
+        relations (list): the names of the relationships in the file.
+        external (list): the ids of relation targets not in the file.
+        edges (array.array): the offset of the relations of each term
+            in ``edge_relations`` and ``edge_targets``.
+
+    """
+
+    __slots__ = ['size', 'mtime', 'header', 'typedefs', 'ids', 'spans',
+                 'relations', 'external', 'edges', 'edge_relations',
+                 'edge_targets', '_positions', '_reverse']
+
+    _VERSION = 1
+    _RX_TAGS = re.compile(br'^(id|is_a|relationship)[ \t]*:([^\n]*)', re.M)
+
+    def __init__(self, size, mtime, header, typedefs, ids, spans, relations,
+                 external, edges, edge_relations, edge_targets):
+        self.size = size
+        self.mtime = mtime
+        self.header = header
+        self.typedefs = typedefs
+        self.ids = ids
+        self.spans = spans
+        self.relations = relations
+        self.external = external
+        self.edges = edges
+        self.edge_relations = edge_relations
+        self.edge_targets = edge_targets
+        self._positions = {id:i for i,id in enumerate(ids)}
+        self._reverse = None
+
+    def __contains__(self, id):
+        return id in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        return unique_everseen(self.ids)
+
+    @classmethod
+    def scan(cls, mapped, size, mtime):
+        """Index a memory-mapped obo file.
+
+        Only the ``id``, ``is_a`` and ``relationship`` lines of each
+        term are decoded, the rest of the file is scanned at the byte
+        level.
+        """
+        find = mapped.find
+
+        if mapped[:1] == b'[':
+            header = 0
+        else:
+            header = find(b'\n[') + 1 or size
+
+        typedefs, ids, spans = [], [], array.array(str('L'))
+        relations, external = collections.OrderedDict(), collections.OrderedDict()
+        edges = array.array(str('L'), [0])
+        edge_relations, edge_targets = array.array(str('H')), []
+
+        pos = header
+        while pos < size:
+            end = find(b'\n[', pos) + 1 or size
+            eol = find(b'\n', pos, end) + 1 or end
+            section = OboParser._check_section(mapped[pos+1:eol].split(b']', 1)[0].decode('utf-8'))
+
+            if section is OboSection.typedef:
+                typedefs.append((pos, end))
+
+            elif section is OboSection.term:
+                _id = None
+                for tag, value in cls._RX_TAGS.findall(mapped[eol:end]):
+                    value = value.decode('utf-8').strip()
+                    if tag == b'id':
+                        _id = value if _id is None else _id
+                        continue
+                    elif tag == b'is_a':
+                        relname, other = 'is_a', value
+                    else:
+                        relname, other = value.split(' ', 1)
+                    edge_relations.append(relations.setdefault(relname, len(relations)))
+                    edge_targets.append(other.split('!')[0].strip())
+                if _id is not None:
+                    ids.append(_id)
+                    spans.extend((pos, end))
+                    edges.append(len(edge_targets))
+                else:
+                    del edge_relations[edges[-1]:], edge_targets[edges[-1]:]
+
+            pos = end
+
+        # targets are converted to positions once all term ids are known
+        positions = {id:i for i,id in enumerate(ids)}
+        targets = array.array(str('L'))
+        for target in edge_targets:
+            if target in positions:
+                targets.append(positions[target])
+            else:
+                targets.append(len(ids) + external.setdefault(target, len(external)))
+
+        return cls(size, mtime, header, typedefs, ids, spans, list(relations),
+                   list(external), edges, edge_relations, targets)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with `OboIndex.dump`.
+
+        Raises:
+            ValueError: when the index was created by another version
+                of `OboIndex`.
+
+        """
+        with open(path, 'rb') as handle:
+            state = pickle.load(handle)
+        if state[0] != cls._VERSION:
+            raise ValueError("unsupported index version: {}".format(state[0]))
+        return cls(*state[1:])
+
+    def dump(self, path):
+        """Save the index to ``path``, atomically replacing any previous index.
+        """
+        state = (self._VERSION, self.size, self.mtime, self.header,
+                 self.typedefs, self.ids, self.spans, self.relations,
+                 self.external, self.edges, self.edge_relations,
+                 self.edge_targets)
+        with atomic_write(path) as handle:
+            pickle.dump(state, handle, protocol=2)
+
+    def is_valid(self, path):
+        """Check the index matches the current version of ``path``.
+        """
+        stat = os.stat(path)
+        return stat.st_size == self.size and stat.st_mtime == self.mtime
+
+    def span(self, id):
+        """Get the ``(start, stop)`` offsets of the term with the given id.
+        """
+        i = self._positions[id]
+        return self.spans[2*i], self.spans[2*i+1]
+
+    def name(self, target):
+        """Get the id of a term from its position (see `OboIndex.edge_targets`).
+        """
+        if target < len(self.ids):
+            return self.ids[target]
+        return self.external[target - len(self.ids)]
+
+    def parents(self, id):
+        """Iterate over the ``(relation name, id)`` targets of a term.
+        """
+        i = self._positions[id]
+        for j in six.moves.range(self.edges[i], self.edges[i+1]):
+            yield self.relations[self.edge_relations[j]], self.name(self.edge_targets[j])
+
+    def children(self, id):
+        """Iterate over the ``(relation name, id)`` pointing to a term.
+        """
+        if self._reverse is None:
+            self._reverse = collections.defaultdict(list)
+            for i, child in enumerate(self.ids):
+                if self._positions[child] != i:    # term redefined later
+                    continue
+                for j in six.moves.range(self.edges[i], self.edges[i+1]):
+                    self._reverse[self.edge_targets[j]].append((self.edge_relations[j], i))
+        for rel, child in self._reverse.get(self._positions[id], ()):
+            yield self.relations[rel], self.ids[child]
+
+
+class LazyTerm(Term):
+    """A `Term` which relations are resolved when first accessed.
+
+    Accessing the relations of a `LazyTerm` will create the terms it
+    is related to, without resolving their own relations.
+    """
+
+    __slots__ = ['_terms']
+
+    def _get_relations(self):
+        relations = Term.relations.__get__(self)
+        if self._terms is not None:
+            terms, self._terms = self._terms, None
+            relations = terms._resolve(self.id, relations)
+            Term.relations.__set__(self, relations)
+        return relations
+
+    def _set_relations(self, relations):
+        self._terms = None
+        Term.relations.__set__(self, relations)
+
+    relations = property(_get_relations, _set_relations)
+
+
+class LazyTermDict(collections.MutableMapping):
+    """A mapping of terms backed by an `OboIndex`.
+
+    Terms are only parsed from the memory-mapped obo file when they are
+    first accessed. Terms added to the mapping are simply stored, and
+    take precedence over the terms of the file. Use `LazyTermDict.close`
+    to release the memory map once the terms are not needed anymore.
+    """
+
+    def __init__(self, index, mapped):
+        self._index = index
+        self._mapped = mapped
+        self._terms = {}
+        self._deleted = set()
+        self._cached_synonyms = {}
+        self._strings = {}
+
+    def __getitem__(self, id):
+        try:
+            return self._terms[id]
+        except KeyError:
+            if id in self._deleted or id not in self._index:
+                raise
+        self._terms[id] = term = self._load(id)
+        return term
+
+    def __setitem__(self, id, term):
+        self._terms[id] = term
+        self._deleted.discard(id)
+
+    def __delitem__(self, id):
+        if id not in self:
+            raise KeyError(id)
+        self._terms.pop(id, None)
+        self._deleted.add(id)
+
+    def __contains__(self, id):
+        if id in self._terms:
+            return True
+        return id in self._index and id not in self._deleted
+
+    def __iter__(self):
+        for id in self._index:
+            if id not in self._deleted:
+                yield id
+        for id in self._terms:
+            if id not in self._index:
+                yield id
+
+    def __len__(self):
+        extra = sum(1 for id in self._terms if id not in self._index)
+        return len(self._index) - len(self._deleted.intersection(self._index)) + extra
+
+    def close(self):
+        """Close the memory-mapped file.
+
+        The terms already loaded stay available, but the other terms of
+        the file cannot be accessed anymore.
+        """
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def _load(self, id):
+        """Parse the term with the given id from the memory-mapped file.
+
+        Raises:
+            ValueError: when the memory-mapped file was closed.
+
+        """
+        if self._mapped is None:
+            raise ValueError("cannot load {}: the obo file was closed".format(id))
+        start, stop = self._index.span(id)
+        term = OboParser._classify_term(
+            _read_stanza(self._mapped[start:stop]),
+            self._cached_synonyms,
+            self._strings,
+        )
+        term = LazyTerm(term.id, term.name, term.desc, term.relations,
+                        term.synonyms, term.other)
+        term._terms = self
+        return term
+
+    def _resolve(self, id, relations):
+        """Resolve the relations of a term loaded from the file.
+
+        Relations pointing to the term in other terms of the file are
+        added (like `Ontology.adopt` would), and identifiers are replaced
+        with terms (like `Ontology.reference` would).
+        """
+        resolved = collections.OrderedDict()
+        for relation, others in six.iteritems(relations):
+            if not isinstance(relation, Relationship):
+                relation = Relationship(relation)
+            resolved.setdefault(relation, []).extend(others)
+
+        children = sorted(self._index.children(id), key=operator.itemgetter(1))
+        for relname, child in children:
+            relation = Relationship(relname)
+            if relation.complementary and relation.complementary in Relationship._instances:
+                others = resolved.setdefault(relation.complement(), [])
+                if child not in others:
+                    others.append(child)
+
+        return {
+            relation: TermList(self.get(x) or Term(x, '', '') for x in others)
+                for relation, others in six.iteritems(resolved)
+        }
+
+
+def _read_stanza(data):
+    """Extract the ``key: [values]`` mapping of a stanza from its bytes.
+    """
+    tokens = OboParser._tokenize(io.BytesIO(data))
+    for _, stanza in OboParser._iter_stanzas(tokens, {}):
+        return stanza
+
+
+def index_path(path):
+    """Get the path of the index file of an obo file.
+    """
+    return "{}.idx".format(path)
+
+
+def load(path):
+    """Lazily load a local, uncompressed obo file.
+
+    The index of the file is loaded from `index_path` when it exists
+    and matches the file, otherwise the file is scanned again and the
+    new index saved if possible.
+
+    Returns:
+        (dict, LazyTermDict, set): the metadata, the terms and the
+        imports of the ontology.
+
+    Raises:
+        ValueError: when the file cannot be memory-mapped.
+
+    """
+    with open(path, 'rb') as handle:
+        mapped = OboParser._map(handle)
+    if mapped is None:
+        raise ValueError("cannot memory-map {}".format(path))
+
+    try:
+        index = OboIndex.load(index_path(path))
+        if not index.is_valid(path):
+            raise ValueError("outdated index")
+    except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+        stat = os.stat(path)
+        index = OboIndex.scan(mapped, stat.st_size, stat.st_mtime)
+        try:
+            index.dump(index_path(path))
+        except (IOError, OSError):
+            pass
+
+    meta = collections.defaultdict(list)
+    for key, value in OboParser._tokenize(io.BytesIO(mapped[:index.header])):
+        OboParser._parse_metadata(key, value, meta)
+    for start, stop in index.typedefs:
+        OboParser._classify_typedef(_read_stanza(mapped[start:stop]))
+
+    imports = set(meta['import']) if 'import' in meta else set()
+    return dict(meta), LazyTermDict(index, mapped), imports
@@ -0,0 +1,190 @@
+# coding: utf-8
+"""Secondary indexes of the terms of an ontology.
+
+This module defines `LookupIndex`, which finds the terms of an ontology
+from their name, their synonyms, their alternative identifiers, their
+cross-references, their subsets or their namespace, without scanning
+all the terms.
+
+Example:
+    >>> index = uo.lookup_index()
+    >>> index.find('kg')
+    ['UO:0000009']
+    >>> index.find('M', ['synonym'])
+    ['UO:0000062', 'UO:0000293']
+    >>> index.find('M', ['synonym'], casefold=True)
+    ['UO:0000008', 'UO:0000062', 'UO:0000068', 'UO:0000293', 'UO:0000297']
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import collections
+
+import six
+
+
+_casefold = getattr(six.text_type, 'casefold', six.text_type.lower)
+
+
+def _keys(term, field):
+    """Iterate over the keys of a term for one field of a `LookupIndex`.
+    """
+    if field == 'name':
+        if term.name:
+            yield term.name
+    elif field == 'synonym':
+        for synonym in term.synonyms:
+            yield synonym.desc
+    elif field == 'xref':
+        # obo cross-references may be followed by a quoted description
+        for xref in term.other.get('xref', ()):
+            yield xref.split(' ', 1)[0]
+    else:
+        for value in term.other.get(field, ()):
+            yield value
+
+
+class LookupIndex(object):
+    """Secondary indexes of the terms of an ontology.
+
+    For each of its fields, the index maps the values found in the
+    terms (such as their names for the ``'name'`` field) to the
+    identifiers of the terms, both as they are and case-folded. Values
+    found in a single term (most names and synonyms) are mapped to its
+    identifier directly, and other values to an ordered set of identifiers
+    (the keys of an `~collections.OrderedDict`), so that values shared
+    by many terms (such as a namespace) are indexed in linear time.
+
+    The index of an ontology (see `Ontology.lookup_index`) is updated by
+    `Ontology.include` and `Ontology.merge`. Terms edited in place are
+    not reindexed: use `LookupIndex.remove` before editing them and
+    `LookupIndex.add` afterwards.
+
+    Attributes:
+        fields (tuple): the indexed fields, among `LookupIndex.FIELDS`.
+
+    """
+
+    #: The fields that can be indexed: ``name`` (`Term.name`),
+    #: ``synonym`` (the description of `Term.synonyms`), and the
+    #: ``alt_id``, ``xref``, ``subset`` and ``namespace`` values of
+    #: `Term.other`.
+    FIELDS = ('name', 'synonym', 'alt_id', 'xref', 'subset', 'namespace')
+
+    def __init__(self, terms=(), fields=None):
+        """Create an index of some terms.
+
+        Arguments:
+            terms (iterable): the `Term` instances to index.
+            fields (iterable, optional): the fields to index. Leave to
+                `None` to index all of `LookupIndex.FIELDS`.
+
+        Raises:
+            ValueError: when a field is not supported.
+
+        """
+        self.fields = self.FIELDS if fields is None else tuple(fields)
+        for field in self.fields:
+            if field not in self.FIELDS:
+                raise ValueError("unsupported field: {!r}".format(field))
+        self._exact = {field: {} for field in self.fields}
+        self._folded = {field: {} for field in self.fields}
+        self.add(terms)
+
+    def __repr__(self):
+        return "LookupIndex({})".format(", ".join(
+            "{}={}".format(field, len(self._exact[field])) for field in self.fields))
+
+    def add(self, terms):
+        """Index some terms.
+        """
+        for term in terms:
+            for field in self.fields:
+                exact, folded = self._exact[field], self._folded[field]
+                for key in _keys(term, field):
+                    _insert(exact, key, term.id)
+                    _insert(folded, _fold(key), term.id)
+
+    def remove(self, terms):
+        """Remove some terms from the index.
+
+        The terms must not have changed since they were indexed.
+        """
+        for term in terms:
+            for field in self.fields:
+                exact, folded = self._exact[field], self._folded[field]
+                for key in _keys(term, field):
+                    _delete(exact, key, term.id)
+                    _delete(folded, _fold(key), term.id)
+
+    def find(self, value, fields=None, casefold=False):
+        """Find the terms with a value in some fields.
+
+        Arguments:
+            value (str): the value to look for.
+            fields (iterable, optional): the fields to look into (such as
+                ``['name', 'synonym']``). Leave to `None` to look into all
+                the fields of the index.
+            casefold (bool): ignore the case of the value.
+
+        Returns:
+            list: the identifiers of the matching terms, without duplicates,
+            by field and in the order they were indexed.
+
+        Raises:
+            KeyError: when a field is not part of the index.
+
+        """
+        indexes = self._folded if casefold else self._exact
+        key = _fold(value) if casefold else value
+        found, seen = [], set()
+        for field in self.fields if fields is None else fields:
+            ids = indexes[field].get(key)
+            if ids is None:
+                continue
+            for id in (ids,) if isinstance(ids, six.string_types) else ids:
+                if id not in seen:
+                    seen.add(id)
+                    found.append(id)
+        return found
+
+    def items(self, field, casefold=False):
+        """Iterate over the values of a field and the terms having them.
+
+        Yields:
+            tuple: a value, and the `list` of the identifiers of the
+            terms with that value.
+
+        """
+        for key, ids in six.iteritems((self._folded if casefold else self._exact)[field]):
+            yield key, [ids] if isinstance(ids, six.string_types) else list(ids)
+
+
+def _fold(key):
+    folded = _casefold(key)
+    return key if folded == key else folded
+
+
+def _insert(index, key, id):
+    ids = index.get(key)
+    if ids is None:
+        index[key] = id
+    elif isinstance(ids, six.string_types):
+        if ids != id:
+            index[key] = collections.OrderedDict.fromkeys([ids, id])
+    else:
+        ids[id] = None
+
+
+def _delete(index, key, id):
+    ids = index.get(key)
+    if ids is None:
+        return
+    elif isinstance(ids, six.string_types):
+        if ids == id:
+            del index[key]
+    elif id in ids:
+        del ids[id]
+        if len(ids) == 1:
+            index[key] = next(iter(ids))
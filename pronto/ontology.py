@@ -6,6 +6,7 @@ from __future__ import absolute_import
 
 import io
 import json
+import array
 import os
 import warnings
 import operator
@@ -15,12 +16,28 @@ import datetime
 import contextlib
 import collections
 
+from multiprocessing.pool import ThreadPool
 from six.moves.urllib.error import URLError, HTTPError
 
 from . import __version__
-from .term import Term, TermList
-from .parser import BaseParser
+from .term import Term, TermList, _iter_relations
+from .description import Description
+from .synonym import Synonym
+from . import fetch as _fetch
+from . import lazy as _lazy
+from .cache import OntologyCache
+from .catalog import Catalog
+from .closure import ClosureIndex
+from .graph import TermGraph
+from .identifiers import IdTable
+from .similarity import SimilarityIndex
+from .annotation import AnnotationIndex
+from .lookup import LookupIndex
+from .search import SearchIndex
+from .annotator import Annotator
+from .parser import BaseParser, OboParser
 from .parser.owl import etree as _etree
+from .parser import obojson as _obojson
 from .utils import ProntoWarning, output_str
 from .relationship import Relationship
 
@@ -67,11 +84,23 @@ class Ontology(collections.Mapping):
             >>> cl = Ontology("tests/resources/cl.ont.gz",
             ...               parser='OwlXMLParser')
 
+        Use several processes to parse a large obo ontology::
+
+            >>> hpo = Ontology("tests/resources/hpo.obo.gz", workers=4)
+
+        Save the parsed ontology to load it faster next time::
+
+            >>> hpo = Ontology("tests/resources/hpo.obo.gz", cache=True) # doctest: +SKIP
+
     """
 
-    __slots__ = ("path", "meta", "terms", "imports", "_parsed_by")
+    __slots__ = ("path", "meta", "terms", "imports", "_parsed_by", "_sources",
+                 "_dangling", "_closures", "_lookups", "_search")
+    _STATE_VERSION = 1
 
-    def __init__(self, handle=None, imports=True, import_depth=-1, timeout=2, parser=None):
+    def __init__(self, handle=None, imports=True, import_depth=-1, timeout=2,
+                 parser=None, workers=None, lazy=False, cache=None, threads=None,
+                 catalog=None):
         """Create an `Ontology` instance from a file handle or a path.
 
         Arguments:
@@ -89,12 +118,59 @@ class Ontology(collections.Mapping):
                 operations.
             parser (~pronto.parser.BaseParser, optional): A parser
                 instance to use. Leave to `None` to autodetect.
+            workers (int, optional): The number of processes to use to
+                parse the ontology and its imports, if the parser
+                supports it. Leave to `None` to parse in the current
+                process.
+            lazy (bool, optional): if `True`, only index the ontology
+                and build each term when it is first accessed. This is
+                only supported for local, uncompressed obo files: other
+                ontologies are parsed entirely. The index is saved next
+                to the ontology file to be reused later.
+            cache (bool, str or ~pronto.cache.OntologyCache, optional):
+                if given, load the ontology from a cache of parsed
+                ontologies when neither the ontology file nor its
+                imports changed, and store it in the cache otherwise.
+                Use `True` for the default cache directory, or the
+                path to another directory. Ignored for lazy ontologies.
+            threads (int, optional): The number of threads to use to
+                fetch and parse imports concurrently. Leave to `None`
+                to load the imports one after the other.
+            catalog (str, dict or ~pronto.catalog.Catalog, optional): a
+                catalog mapping IRIs to local files, used to resolve
+                the ontology and its imports before any network access.
+                Give either the path to an XML catalog, or a mapping of
+                IRIs to paths. Leave to `None` to use the
+                ``catalog-v001.xml`` file next to the ontology, if any.
+
+        Note:
+            Merging or including terms into a lazy ontology, including
+            when resolving its imports, will build all of its terms.
 
         """
         self.meta = {}
         self.terms = {}
         self.imports = ()
         self._parsed_by = None
+        self._sources = []
+        self._dangling = None
+        self._closures = {}
+        self._lookups = None
+        self._search = None
+
+        if catalog is not None:
+            catalog = Catalog._coerce(catalog)
+            if isinstance(handle, six.string_types):
+                handle = catalog.resolve(handle) or handle
+
+        if cache and not lazy and isinstance(handle, six.string_types):
+            cache = OntologyCache._coerce(cache)
+            if catalog is None and imports and import_depth:
+                catalog = Catalog._find(handle)
+            if cache.load(self, handle, imports, import_depth, parser, catalog):
+                return
+        else:
+            cache = None
 
         if handle is None:
             self.path = None
@@ -102,11 +178,15 @@ class Ontology(collections.Mapping):
             self.path = getattr(handle, 'name', None) \
                      or getattr(handle, 'url', None) \
                      or getattr(handle, 'geturl', lambda: None)()
-            self.parse(handle, parser)
+            self.parse(handle, parser, workers)
         elif isinstance(handle, six.string_types):
             self.path = handle
-            with self._get_handle(handle, timeout) as handle:
-                self.parse(handle, parser)
+            self._sources.append(handle)
+            if lazy:
+                lazy = self._parse_lazy(handle, parser)
+            if not lazy:
+                with self._get_handle(handle, timeout) as handle:
+                    self.parse(handle, parser, workers)
         else:
             actual = type(handle).__name__
             raise TypeError("Invalid type for 'handle': expected None, file "
@@ -115,9 +195,13 @@ class Ontology(collections.Mapping):
         if handle is not None and self._parsed_by is None:
             raise ValueError("Could not find a suitable parser to parse {}".format(handle))
 
-        self.adopt()
-        self.resolve_imports(imports, import_depth, parser)
-        self.reference()
+        lazy = isinstance(self.terms, _lazy.LazyTermDict)
+        if self._merge_imports(imports, import_depth, parser, workers, timeout,
+                               threads, catalog) or not lazy:
+            self.adopt()
+            self.reference()
+        if cache is not None:
+            cache.store(self, imports, import_depth, parser, catalog)
 
     def __repr__(self):
         if self.path is not None:
@@ -188,20 +272,98 @@ class Ontology(collections.Mapping):
         return len(self.terms)
 
     def __getstate__(self):
-        meta = frozenset( (k, frozenset(v)) for k,v in six.iteritems(self.meta) )
-        imports = self.imports
-        path = self.path
-        terms = frozenset(term for term in self)
-        return (meta, imports, path, terms)
+        """Encode the ontology in a compact state preserving term order.
+
+        Relation targets are stored as positions in a list of ids (the
+        terms of the ontology, followed by the targets which are not
+        part of it), and the relations of all terms are flattened into
+        arrays, like in `~pronto.lazy.OboIndex`. Equal strings and
+        cross-reference tuples are replaced by a single instance, so
+        that they are only pickled once and shared again after
+        unpickling.
+        """
+        strings = {}
+        def intern(x):
+            if isinstance(x, tuple):
+                if x not in strings:
+                    strings[x] = tuple(intern(y) for y in x)
+                return strings[x]
+            return strings.setdefault(x, x) if isinstance(x, six.string_types) else x
+
+        terms = list(six.itervalues(self.terms))
+        ids = [term.id for term in terms]
+        positions = {id:i for i,id in enumerate(ids)}
+        relations = collections.OrderedDict()
+        groups, kinds = array.array(str('L'), [0]), array.array(str('H'))
+        bounds, targets = array.array(str('L'), [0]), array.array(str('L'))
+        records = []
+
+        for term in terms:
+            for relation, others in _iter_relations(term.relations):
+                kinds.append(relations.setdefault(relation, len(relations)))
+                for other in others:
+                    other = getattr(other, 'id', other)
+                    if other not in positions:
+                        positions[other] = len(ids)
+                        ids.append(other)
+                    targets.append(positions[other])
+                bounds.append(len(targets))
+            groups.append(len(kinds))
+
+            xref = getattr(term.desc, 'xref', None)
+            records.append((
+                term.name,
+                (six.text_type(term.desc), intern(tuple(xref))) if xref else six.text_type(term.desc),
+                [(intern(k), [intern(x) for x in v] if isinstance(v, list) else intern(v))
+                    for k,v in six.iteritems(term.other)],
+                [(s.desc, intern(s.scope), s.syn_type, intern(tuple(s.xref)))
+                    for s in term.synonyms],
+            ))
+
+        return (self._STATE_VERSION, self.path, self.meta, self.imports,
+                self._parsed_by, self._sources, ids, list(relations),
+                groups, kinds, bounds, targets, records)
 
     def __setstate__(self, state):
-        self.meta = {k:list(v) for (k,v) in state[0] }
-        self.imports = state[1]
-        self.path = state[2]
-        self.terms = {t.id:t for t in state[3]}
-        self.reference()
+        """Rebuild the ontology from a state created by `Ontology.__getstate__`.
 
-    def parse(self, stream, parser=None):
+        The relation arrays are used as they are to create the
+        `~pronto.graph.TermGraph` of the terms, so `Ontology.reference`
+        is not needed.
+
+        Raises:
+            ValueError: when the state was created by another version
+                of `Ontology.__getstate__`.
+
+        """
+        if state[0] != self._STATE_VERSION:
+            raise ValueError("unsupported state version: {}".format(state[0]))
+        (_, self.path, self.meta, self.imports, self._parsed_by, self._sources,
+         ids, relations, groups, kinds, bounds, targets, records) = state
+
+        terms = []
+        for id, (name, desc, other, synonyms) in six.moves.zip(ids, records):
+            term = Term.__new__(Term)
+            term.id, term.name, term.other = id, name, dict(other)
+            term.desc = Description(*desc) if isinstance(desc, tuple) else Description(desc)
+            term.synonyms = set()
+            for desc, scope, syn_type, xref in synonyms:
+                synonym = Synonym.__new__(Synonym)
+                synonym.__setstate__((desc, scope, syn_type, tuple(xref)))
+                term.synonyms.add(synonym)
+            term._empty_cache()
+            terms.append(term)
+        terms.extend(Term(id, '', '') for id in ids[len(records):])
+
+        TermGraph(terms, relations, groups, kinds, bounds, targets).attach()
+
+        self.terms = collections.OrderedDict((term.id, term) for term in terms[:len(records)])
+        self._dangling = None
+        self._closures = {}
+        self._lookups = None
+        self._search = None
+
+    def parse(self, stream, parser=None, workers=None):
         """Parse the given file using available `BaseParser` instances.
 
         Raises:
@@ -221,10 +383,33 @@ class Ontology(collections.Mapping):
 
         for p in parsers:
             if p.hook(path=self.path, force=force, lookup=lookup):
-                self.meta, self.terms, self.imports = p.parse(stream)
+                self.meta, self.terms, self.imports = p.parse(stream, workers)
                 self._parsed_by = p.__name__
                 break
 
+    def _parse_lazy(self, path, parser=None):
+        """Lazily load the given obo file using a stanza index.
+
+        Returns:
+            bool: `True` if the ontology was loaded lazily, or `False`
+            if the file cannot be loaded lazily and should be parsed.
+
+        """
+        force, parsers = self._get_parsers(parser)
+        if not any(p is OboParser for p in parsers) \
+                or not os.path.isfile(path) or path.endswith('gz'):
+            warnings.warn("cannot load {} lazily, parsing it entirely".format(path),
+                          ProntoWarning)
+            return False
+        try:
+            self.meta, self.terms, self.imports = _lazy.load(path)
+        except ValueError as e:
+            warnings.warn("cannot load {} lazily ({}), parsing it entirely".format(path, e),
+                          ProntoWarning)
+            return False
+        self._parsed_by = OboParser.__name__
+        return True
+
     def _get_parsers(self, name):
         """Return the appropriate parser asked by the user.
 
@@ -250,6 +435,242 @@ class Ontology(collections.Mapping):
         return not forced, parserlist
 
 
+    def closure(self, relationships=None, compact=None):
+        """Get the transitive closure index of the ontology.
+
+        The index is built when first requested, and kept until the
+        ontology is modified with `Ontology.include`, `Ontology.merge`,
+        `Ontology.adopt` or `Ontology.reference`. While the default
+        index (with ``relationships`` left to `None`) is available, it
+        is used by `Term.rparents` and `Term.rchildren` to get all the
+        ancestors or descendants of a term.
+
+        Arguments:
+            relationships (iterable, optional): the relationships to
+                follow from a term to its ancestors. Leave to `None`
+                to use all the bottomup relationships.
+            compact (bool, optional): whether the index stores the
+                identifiers of the terms in a compact
+                `~pronto.identifiers.IdTable` (see `ClosureIndex`).
+                An index already built is rebuilt if it does not match.
+                Leave to `None` to use any index already built, or
+                to build a non-compact one.
+
+        Returns:
+            ~pronto.closure.ClosureIndex: the closure index.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> cl.closure().is_descendant('CL:0000540', 'CL:0000000')
+            True
+            >>> cl.closure(compact=True).ids
+            IdTable(2359 identifiers, 8 prefixes)
+
+        """
+        key = None if relationships is None else tuple(
+            getattr(r, 'obo_name', r) for r in relationships)
+        index = self._closures.get(key)
+        if index is None or compact is not None and compact != isinstance(index.ids, IdTable):
+            index = self._closures[key] = ClosureIndex(self, relationships, bool(compact))
+            if key is None:
+                index._attach()
+        return index
+
+    def batch_is_descendant(self, terms, others, relationships=None):
+        """Check whether each term is a (strict) descendant of another term.
+
+        This uses the closure index of the given ``relationships`` (see
+        `Ontology.closure`), so the relationships to follow can be
+        restricted, for instance to ``['is_a']``.
+
+        See Also:
+            `~pronto.closure.ClosureIndex.batch_is_descendant`.
+
+        """
+        return self.closure(relationships).batch_is_descendant(terms, others)
+
+    def batch_ancestors(self, terms, relationships=None):
+        """Get the ancestors of several terms, as a CSR-like pair of arrays.
+
+        See Also:
+            `~pronto.closure.ClosureIndex.batch_ancestors`.
+
+        """
+        return self.closure(relationships).batch_ancestors(terms)
+
+    def batch_descendants(self, terms, relationships=None):
+        """Get the descendants of several terms, as a CSR-like pair of arrays.
+
+        See Also:
+            `~pronto.closure.ClosureIndex.batch_descendants`.
+
+        """
+        return self.closure(relationships).batch_descendants(terms)
+
+    def similarity(self, annotations=None, relationships=None):
+        """Get a semantic similarity index of the ontology.
+
+        The index is not kept by the ontology: keep the returned index
+        to compare many terms, and create a new one after modifying the
+        ontology.
+
+        Arguments:
+            annotations (dict or iterable, optional): an annotation
+                corpus used to compute the information content of the
+                terms, as a mapping of items to their terms. Leave to
+                `None` to use the number of descendants of each term.
+            relationships (iterable, optional): the relationships to
+                follow from a term to its ancestors (see
+                `Ontology.closure`).
+
+        Returns:
+            ~pronto.similarity.SimilarityIndex: the similarity index.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> cl.similarity().mica('CL:0000540', 'CL:0000127')
+            'CL:0002319'
+
+        """
+        return SimilarityIndex(self, annotations, relationships)
+
+    def annotate(self, annotations, relationships=None):
+        """Propagate annotations of items to the terms of the ontology.
+
+        Like `Ontology.similarity`, the index is not kept by the
+        ontology, and must be created again after modifying it.
+
+        Arguments:
+            annotations (iterable or dict): the annotations, as an
+                iterable of ``(item, term)`` pairs (for instance from
+                `~pronto.annotation.read_table`), or as a mapping of
+                items to their terms.
+            relationships (iterable, optional): the relationships to
+                propagate the annotations along (see `Ontology.closure`).
+
+        Returns:
+            ~pronto.annotation.AnnotationIndex: the annotation index.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> index = cl.annotate({'a': ['CL:0000540']}, ['is_a'])
+            >>> index.count('CL:0000000')
+            1
+
+        """
+        return AnnotationIndex(self, annotations, relationships)
+
+    def lookup_index(self):
+        """Get the secondary lookup indexes of the ontology.
+
+        The index is built when first requested, and then updated when
+        terms are added with `Ontology.include` or `Ontology.merge`.
+
+        Returns:
+            ~pronto.lookup.LookupIndex: the index of all the fields of
+            `LookupIndex.FIELDS`.
+
+        """
+        if self._lookups is None:
+            self._lookups = LookupIndex(six.itervalues(self.terms))
+        return self._lookups
+
+    def lookup(self, value, fields=None, casefold=False):
+        """Find the terms with a name, a synonym or another value.
+
+        Arguments:
+            value (str): the value to look for.
+            fields (iterable, optional): the fields to look into, among
+                ``name``, ``synonym``, ``alt_id``, ``xref``, ``subset``
+                and ``namespace``. Leave to `None` to look into all of
+                them.
+            casefold (bool): ignore the case of the value.
+
+        Returns:
+            ~pronto.TermList: the matching terms.
+
+        Example:
+            >>> uo.lookup('Kilogram', casefold=True)
+            [<UO:0000009: kilogram>]
+            >>> len(uo.lookup('unit_slim', ['subset']))
+            217
+
+        """
+        index = self.lookup_index()
+        return TermList(self.terms[id] for id in index.find(value, fields, casefold))
+
+    def search_index(self, fields=None):
+        """Get the prefix and approximate search index of the ontology.
+
+        The index is built when first requested, and kept until terms
+        are added with `Ontology.include` or `Ontology.merge`.
+
+        Arguments:
+            fields (iterable, optional): the fields to index, among
+                ``name``, ``synonym`` and ``desc``. An index already
+                built is rebuilt if its fields do not match. Leave to
+                `None` to use any index already built, or to index
+                names and synonyms.
+
+        Returns:
+            ~pronto.search.SearchIndex: the search index.
+
+        """
+        if self._search is None or fields is not None and tuple(fields) != self._search.fields:
+            fields = ('name', 'synonym') if fields is None else fields
+            self._search = SearchIndex(six.itervalues(self.terms), fields)
+        return self._search
+
+    def search(self, text, k=10, prefix=False, threshold=0.3):
+        """Find the terms with a label similar to, or starting with, a text.
+
+        Arguments:
+            text (str): the text to look for, in any case.
+            k (int): the maximum number of terms to find.
+            prefix (bool): find the labels starting with the text,
+                instead of the labels similar to the text.
+            threshold (float): the minimum similarity of a label to the
+                text (see `~pronto.search.SearchIndex.fuzzy`).
+
+        Returns:
+            ~pronto.TermList: the best matching terms, best first. Use
+            `Ontology.search_index` to get the matching labels and their
+            scores as well.
+
+        Example:
+            >>> uo.search('kilogramm', 2)
+            [<UO:0000009: kilogram>, <UO:0000087: kilogram per mole>]
+            >>> uo.search('Microm', 2, prefix=True)
+            [<UO:0000039: micromole>, <UO:0000017: micrometer>]
+
+        """
+        index = self.search_index()
+        hits = index.prefix(text, k) if prefix else index.fuzzy(text, k, threshold)
+        return TermList(self.terms[hit.id] for hit in hits)
+
+    def annotator(self, scopes=None, names=True, casefold=True):
+        """Get a text annotator finding the labels of the terms.
+
+        Like `Ontology.similarity`, the annotator is not kept by the
+        ontology, and must be created again after modifying it.
+
+        Arguments:
+            scopes (iterable, optional): the scopes of the synonyms used
+                as labels. Leave to `None` to use all synonyms.
+            names (bool): whether to use the names of the terms as labels.
+            casefold (bool): whether to ignore the case of labels.
+
+        Returns:
+            ~pronto.annotator.Annotator: the annotator.
+
+        Example:
+            >>> annotator = uo.annotator(scopes=['EXACT'])
+            >>> annotator.annotate('10 kg')
+            [Match(start=3, end=5, id='UO:0000009')]
+
+        """
+        return Annotator(six.itervalues(self.terms), scopes, names, casefold)
+
     def adopt(self):
         """Make terms aware of their children.
 
@@ -259,13 +680,15 @@ class Ontology(collections.Mapping):
         parents or children of a `Term`.
 
         """
+        self._dangling = None
+        self._drop_closures()
         valid_relationships = set(Relationship._instances.keys())
 
         relationships = [
             (parent, relation.complement(), term.id)
                 for term in six.itervalues(self.terms)
-                    for relation in term.relations
-                        for parent in term.relations[relation]
+                    for relation, parents in _iter_relations(term.relations)
+                        for parent in parents
                             if relation.complementary
                                 and relation.complementary in valid_relationships
         ]
@@ -297,33 +720,134 @@ class Ontology(collections.Mapping):
         This is done automatically when using the :obj:`merge` and :obj:`include`
         methods as well as the :obj:`__init__` method, but it should be called in
         case of manual changes of the relationships of a Term.
+
+        The relations of all the terms are then stored in a single
+        `~pronto.graph.TermGraph`, which `Term.relations` are views of.
         """
-        for termkey, termval in six.iteritems(self.terms):
-            termval.relations.update(
-                (relkey, TermList(
-                    (self.terms.get(x) or Term(x, '', '')
-                    if not isinstance(x, Term) else x) for x in relval
-                )) for relkey, relval in six.iteritems(termval.relations)
-            )
+        self._dangling = None
+        self._drop_closures()
+        TermGraph.from_terms(self.terms).attach()
 
-    def resolve_imports(self, imports, import_depth, parser=None):
+    def resolve_imports(self, imports, import_depth, parser=None, workers=None,
+                        timeout=2, threads=None, catalog=None):
         """Import required ontologies.
+
+        The whole import graph is explored first, so that every ontology
+        is only parsed once even if it is imported several times. The
+        terms of all the imported ontologies are then merged, and linked
+        in a single pass.
+
+        Imports of the same depth do not depend on each other: if
+        ``threads`` is given, they are fetched and parsed concurrently
+        by a pool of that many threads.
+
+        Imports found in the ``catalog`` (see `Ontology`) are loaded from
+        their local copy, and never fetched from the network.
         """
-        if imports and import_depth:
-            for i in list(self.imports):
-                try:
+        if catalog is not None:
+            catalog = Catalog._coerce(catalog)
+        if self._merge_imports(imports, import_depth, parser, workers, timeout,
+                               threads, catalog):
+            self._empty_cache()
+            self.adopt()
+            self.reference()
+
+    def _merge_imports(self, imports, import_depth, parser=None, workers=None,
+                       timeout=2, threads=None, catalog=None):
+        """Merge the terms of the imported ontologies without linking them.
+
+        Imports are explored breadth-first, in sorted order at each level,
+        and merged in the order they were found, so that terms defined
+        by deeper imports replace the terms they redefine.
 
-                    if os.path.exists(i) or i.startswith(('http', 'ftp')):
-                        self.merge(Ontology(i, import_depth=import_depth-1, parser=parser))
+        Returns:
+            bool: `True` if any ontology was merged.
 
+        """
+        if not imports or not import_depth:
+            return False
+        if catalog is None:
+            catalog = Catalog._find(self.path)
+
+        def key(location):
+            return location if location.startswith(('http', 'ftp')) else os.path.abspath(location)
+
+        def load(location):
+            return self._load_import(location, parser, workers, timeout)
+
+        seen = {key(self.path)} if self.path else set()
+        level = [(self.path, i) for i in sorted(self.imports)]
+        depth, merged = 1, []
+        pool = ThreadPool(threads) if threads and threads > 1 else None
+
+        try:
+            while level:
+
+                locations = []
+                for parent, i in level:
+                    local = catalog.resolve(i) if catalog is not None else None
+                    if local is not None:
+                        location = local
+                    elif os.path.exists(i) or i.startswith(('http', 'ftp')) or parent is None:
+                        location = i
                     else: # try to look at neighbouring ontologies
-                        self.merge(Ontology( os.path.join(os.path.dirname(self.path), i),
-                                             import_depth=import_depth-1, parser=parser))
+                        location = os.path.join(os.path.dirname(parent), i)
+                    if key(location) not in seen:
+                        seen.add(key(location))
+                        locations.append((i, location))
+
+                if pool is not None and len(locations) > 1:
+                    results = pool.map(load, [location for _, location in locations])
+                else:
+                    results = [load(location) for _, location in locations]
+
+                level = []
+                for (i, location), other in six.moves.zip(locations, results):
+                    if isinstance(other, Exception):
+                        warnings.warn("{} occured during import of "
+                                      "{}".format(type(other).__name__, i),
+                                      ProntoWarning)
+                        continue
+                    merged.append(other)
+                    self._sources.append(location)
+                    if import_depth < 0 or depth < import_depth:
+                        level.extend((location, x) for x in sorted(other.imports))
+                depth += 1
+
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        for other in merged:
+            if self._lookups is not None:
+                self._lookups.remove(self.terms[id] for id in other.terms if id in self.terms)
+                self._lookups.add(six.itervalues(other.terms))
+            self.terms.update(other.terms)
+        if merged:
+            self._search = None
+        return bool(merged)
+
+    def _load_import(self, location, parser=None, workers=None, timeout=2):
+        """Parse an imported ontology, without linking its terms.
+
+        Returns:
+            Ontology or Exception: the parsed ontology, or the exception
+            raised while fetching or parsing it.
 
-                except (IOError, OSError, URLError, HTTPError, _etree.ParseError) as e:
-                    warnings.warn("{} occured during import of "
-                                  "{}".format(type(e).__name__, i),
-                                  ProntoWarning)
+        Raises:
+            ValueError: when no parser can parse the imported ontology.
+
+        """
+        other = Ontology()
+        other.path = location
+        try:
+            with self._get_handle(location, timeout) as handle:
+                other.parse(handle, parser, workers)
+        except (IOError, OSError, URLError, HTTPError, _etree.ParseError) as e:
+            return e
+        if other._parsed_by is None:
+            raise ValueError("Could not find a suitable parser to parse {}".format(location))
+        return other
 
     def include(self, *terms):
         """Add new terms to the current ontology.
@@ -356,19 +880,26 @@ class Ontology(collections.Mapping):
             [<ONT:002: my 2nd term>]
 
         """
-        ref_needed = False
+        added, replaced = [], False
+        self._get_dangling()    # must be built before adding the new terms
 
         for term in terms:
 
             if isinstance(term, TermList):
-                ref_needed = ref_needed or self._include_term_list(term)
+                replaced = any(t.id in self.terms for t in term) or replaced
+                self._include_term_list(term, added)
             elif isinstance(term, Term):
-                ref_needed = ref_needed or self._include_term(term)
+                replaced = term.id in self.terms or replaced
+                self._include_term(term, added)
             else:
                 raise TypeError('include only accepts <Term> or <TermList> as arguments')
 
-        self.adopt()
-        self.reference()
+        if replaced:
+            self._empty_cache()
+            self.adopt()
+            self.reference()
+        else:
+            self._link(added)
 
     def merge(self, other):
         """Merge another ontology into the current one.
@@ -393,10 +924,20 @@ class Ontology(collections.Mapping):
             raise TypeError("'merge' requires an Ontology as argument,"
                             " not {}".format(type(other)))
 
+        replaced = any(id in self.terms for id in other.terms)
+        if not replaced:
+            self._get_dangling()    # must be built before adding the new terms
+        if self._lookups is not None:
+            self._lookups.remove(self.terms[id] for id in other.terms if id in self.terms)
+            self._lookups.add(six.itervalues(other.terms))
+        self._search = None
         self.terms.update(other.terms)
-        self._empty_cache()
-        self.adopt()
-        self.reference()
+        if replaced:
+            self._empty_cache()
+            self.adopt()
+            self.reference()
+        else:
+            self._link(list(six.itervalues(other.terms)))
 
     @staticmethod
     @contextlib.contextmanager
@@ -406,14 +947,9 @@ class Ontology(collections.Mapping):
         ZIPPED = path.endswith('gz')
 
         if REMOTE:
-            req = six.moves.urllib.request.Request(path, headers={'HTTP_CONNECTION': 'keep-alive'})
-            if not ZIPPED or (ZIPPED and six.PY3):
-                handle = six.moves.urllib.request.urlopen(req, timeout=timeout)
-                if ZIPPED:
-                    handle = gzip.GzipFile(fileobj=handle)
-            else:
-                raise io.UnsupportedOperation("Cannot parse a remote zipped file (this is an urllib2 limitation)")
-
+            handle = raw = _fetch.default_fetcher.open(path, timeout)
+            if ZIPPED:
+                handle = gzip.GzipFile(fileobj=raw, mode='rb')
         elif os.path.exists(path):
             handle = gzip.GzipFile(path) if ZIPPED else open(path, 'rb')
         else:
@@ -423,16 +959,16 @@ class Ontology(collections.Mapping):
             yield handle
         finally:
             handle.close()
+            if REMOTE:
+                raw.close()
 
-    def _include_term_list(self, termlist):
+    def _include_term_list(self, termlist, added):
         """Add terms from a TermList to the ontology.
         """
-        ref_needed = False
         for term in termlist:
-            ref_needed = ref_needed or self._include_term(term)
-        return ref_needed
+            self._include_term(term, added)
 
-    def _include_term(self, term):
+    def _include_term(self, term, added):
         """Add a single term to the current ontology.
 
         It is needed to dereference any term in the term's relationship
@@ -440,9 +976,9 @@ class Ontology(collections.Mapping):
         terms referenced in the term's relations are the one contained
         in the ontology (to make sure changes to one term in the ontology
         will be applied to every other term related to that term).
-        """
-        ref_needed = False
 
+        Every term added to the ontology is appended to ``added``.
+        """
         if term.relations:
 
             for k,v in six.iteritems(term.relations):
@@ -452,17 +988,141 @@ class Ontology(collections.Mapping):
                     try:
 
                         if t.id not in self:
-                            self._include_term(t)
+                            self._include_term(t, added)
 
                         v[i] = t.id
 
                     except AttributeError:
                         pass
 
-                    ref_needed = True
-
+        if self._lookups is not None:
+            if term.id in self.terms:
+                self._lookups.remove([self.terms[term.id]])
+            self._lookups.add([term])
+        self._search = None
         self.terms[term.id] = term
-        return ref_needed
+        added.append(term)
+
+    def _link(self, terms):
+        """Adopt and reference new terms without processing the whole ontology.
+
+        The relations of the new terms are referenced, and complementary
+        relations are added to the terms they point to. Terms that were
+        pointing to the new terms before they were defined are linked to
+        them as well. Only the caches of the terms which ancestors or
+        descendants changed are emptied.
+
+        Note:
+            The terms must already be in `Ontology.terms`, and must not
+            replace other terms of the ontology: use `Ontology.adopt`
+            and `Ontology.reference` in that case. `Ontology._get_dangling`
+            must have been called before adding them.
+
+        """
+        dangling = self._get_dangling()
+        valid_relationships = set(Relationship._instances.keys())
+        adopted, down, up = [], [], []
+
+        def changed(term, relation):
+            if relation.direction == 'bottomup':
+                down.append(term)
+            elif relation.direction == 'topdown':
+                up.append(term)
+
+        for term in terms:
+            for relation, others in list(six.iteritems(term.relations)):
+                linked = []
+                for other in others:
+                    id = getattr(other, 'id', other)
+                    target = self.terms.get(id)
+                    if target is None:
+                        target = other if isinstance(other, Term) else Term(id, '', '')
+                        dangling.setdefault(id, []).append((term, relation))
+                    linked.append(target)
+                term.relations[relation] = TermList(linked)
+                changed(term, relation)
+                if relation.complementary and relation.complementary in valid_relationships:
+                    adopted.extend((x.id, relation.complement(), term.id) for x in linked)
+
+        for term in terms:
+            for referrer, relation in dangling.pop(term.id, ()):
+                others = referrer.relations.get(relation)
+                if others is None or self.terms.get(referrer.id) is not referrer:
+                    continue
+                linked = [term if getattr(x, 'id', x) == term.id else x for x in others]
+                if isinstance(others, TermList):    # else not referenced yet
+                    linked = TermList(linked)
+                referrer.relations[relation] = linked
+                changed(referrer, relation)
+                if relation.complementary and relation.complementary in valid_relationships:
+                    adopted.append((term.id, relation.complement(), referrer.id))
+
+        adopted.sort(key=operator.itemgetter(2))
+        for parent, relation, child in adopted:
+            parent = self.terms.get(parent)
+            if parent is None:
+                continue
+            others = parent.relations.get(relation)
+            if others is None:
+                parent.relations[relation] = TermList([self.terms[child]])
+            elif child not in others:
+                others.append(self.terms[child])
+            else:
+                continue
+            changed(parent, relation)
+
+        self._invalidate(down, up)
+
+    def _get_dangling(self):
+        """Get the relations pointing to terms that are not in the ontology.
+
+        Returns:
+            dict: a mapping of undefined ids to the ``(term, relation)``
+            pairs pointing to them. It is built when first needed, then
+            updated by `Ontology._link`, and discarded by `Ontology.adopt`
+            and `Ontology.reference`.
+
+        """
+        if self._dangling is None:
+            self._dangling = dangling = {}
+            for term in six.itervalues(self.terms):
+                for relation, others in _iter_relations(term.relations):
+                    for other in others:
+                        id = getattr(other, 'id', other)
+                        if id not in self.terms:
+                            dangling.setdefault(id, []).append((term, relation))
+        return self._dangling
+
+    def _drop_closures(self):
+        """Drop the closure indexes, detaching the terms from them.
+        """
+        index = self._closures.get(None)
+        if index is not None:
+            index._detach()
+        self._closures = {}
+
+    def _invalidate(self, down=(), up=()):
+        """Empty the cache of some terms, their descendants and ancestors.
+
+        Arguments:
+            down (list): terms which parents changed: the cache of all
+                their descendants is emptied as well.
+            up (list): terms which children changed: the cache of all
+                their ancestors is emptied as well.
+
+        """
+        self._drop_closures()
+        for start, direction in ((down, 'topdown'), (up, 'bottomup')):
+            stack, seen = list(start), set()
+            while stack:
+                term = stack.pop()
+                if id(term) in seen:
+                    continue
+                seen.add(id(term))
+                term._empty_cache()
+                for relation, others in _iter_relations(term.relations):
+                    if relation.direction == direction:
+                        stack.extend(x for x in others if isinstance(x, Term))
 
     def _empty_cache(self, termlist=None):
         """Empty the cache associated with each `Term` instance.
@@ -471,8 +1131,10 @@ class Ontology(collections.Mapping):
         new terms in the Ontology to make sure the cache of each
         term is cleaned and avoid returning wrong memoized values
         (such as Term.rchildren() TermLists, which get memoized for
-        performance concerns)
+        performance concerns), as well as the closure indexes of the
+        ontology.
         """
+        self._drop_closures()
         if termlist is None:
             for term in six.itervalues(self.terms):
                 term._empty_cache()
@@ -531,24 +1193,125 @@ class Ontology(collections.Mapping):
     @property
     def json(self):
         """str: the ontology serialized in json format.
+
+        See `Ontology.dump` to serialize the ontology in the OBO Graphs
+        JSON format instead, which can be parsed back.
         """
-        return json.dumps(self.terms, indent=4, sort_keys=True,
+        return json.dumps(dict(self.terms), indent=4, sort_keys=True,
                           default=operator.attrgetter("__deref__"))
 
     @property
     def obo(self):
         """str: the ontology serialized in obo format.
         """
-        meta = self._obo_meta()
-        meta = [meta] if meta else []
         newline = "\n\n" if six.PY3 else "\n\n".encode('utf-8')
+        return newline[:0].join(self.iter_obo())
+
+    def iter_obo(self, buffer_size=io.DEFAULT_BUFFER_SIZE * 8):
+        """Iterate over chunks of the ontology serialized in obo format.
+
+        Stanzas are serialized one at a time, and gathered into chunks
+        of about ``buffer_size`` characters, so that the whole ontology
+        never needs to be held in memory: joined, the chunks are the
+        same as `Ontology.obo`.
+
+        Arguments:
+            buffer_size (int): the approximate size of each chunk.
+
+        Yields:
+            str: a chunk of the serialized ontology.
+
+        """
+        newline = "\n\n" if six.PY3 else "\n\n".encode('utf-8')
+        return self._iter_chunks(self._iter_obo_stanzas(), buffer_size, newline)
+
+    def iter_obojson(self, buffer_size=io.DEFAULT_BUFFER_SIZE * 8):
+        """Iterate over chunks of the ontology serialized in OBO Graphs JSON.
+
+        Each term is serialized as a node, and each of its relations to
+        another term as an edge, with one node or edge per line. The
+        serialized ontology can be loaded back with `OboJSONParser`.
+
+        Arguments:
+            buffer_size (int): the approximate size of each chunk.
+
+        Yields:
+            str: a chunk of the serialized ontology.
 
+        Example:
+            >>> import json
+            >>> graph = json.loads(''.join(uo.iter_obojson()))['graphs'][0]
+            >>> graph['nodes'][0]['id'], graph['nodes'][0]['lbl']
+            ('http://purl.obolibrary.org/obo/UO_0000000', 'unit')
+
+        """
+        pieces = _obojson._iter_graph(self.meta, self)
+        return self._iter_chunks(pieces, buffer_size, '')
+
+    @staticmethod
+    def _iter_chunks(pieces, buffer_size, separator):
+        """Gather pieces of a serialized ontology into chunks.
+        """
+        buffer, size = [], 0
+        for i, piece in enumerate(pieces):
+            if i and separator:
+                buffer.append(separator)
+            buffer.append(piece)
+            size += len(piece) + len(separator)
+            if size >= buffer_size:
+                yield separator[:0].join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield separator[:0].join(buffer)
+
+    def dump(self, fp, format='obo', buffer_size=io.DEFAULT_BUFFER_SIZE * 8):
+        """Serialize the ontology to a file-like object, one chunk at a time.
+
+        Arguments:
+            fp (file-like object): the file to write to, opened either in
+                text mode or in binary mode (such as a `gzip.GzipFile`,
+                or a socket file), in which case the ontology is encoded
+                in UTF-8.
+            format (str): the serialization format, either ``obo`` or
+                ``obojson`` (OBO Graphs JSON, see `Ontology.iter_obojson`).
+            buffer_size (int): the approximate size of each write.
+
+        Raises:
+            ValueError: when the format is not supported.
+
+        Example:
+            >>> import gzip, io
+            >>> buffer = io.BytesIO()
+            >>> with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+            ...     uo.dump(f)
+            >>> gzip.GzipFile(fileobj=io.BytesIO(buffer.getvalue())).readline()
+            b'format-version: 1.2\\n'
+
+        """
+        if format == 'obo':
+            chunks = self.iter_obo(buffer_size)
+        elif format == 'obojson':
+            chunks = self.iter_obojson(buffer_size)
+        else:
+            raise ValueError("unsupported format: {!r}".format(format))
+        binary = not isinstance(fp, io.TextIOBase)
+        for chunk in chunks:
+            if binary and isinstance(chunk, six.text_type):
+                chunk = chunk.encode('utf-8')
+            elif not binary and isinstance(chunk, six.binary_type):
+                chunk = chunk.decode('utf-8')
+            fp.write(chunk)
+
+    def _iter_obo_stanzas(self):
+        """Iterate over the obo header and the obo stanzas of the terms.
+        """
+        meta = self._obo_meta()
+        if meta:
+            yield meta
         try: # if 'namespace' in self.meta:
-            return newline.join( meta + [
-                t.obo for t in self
-                    if t.id.startswith(self.meta['namespace'][0])
-            ])
+            namespace = self.meta['namespace'][0]
         except KeyError:
-            return newline.join( meta + [
-                t.obo for t in self
-            ])
+            namespace = None
+        for t in self:
+            if namespace is None or t.id.startswith(namespace):
+                yield t.obo
@@ -7,8 +7,9 @@ This module defines the Parser virtual class.
 """
 from __future__ import absolute_import
 
-__all__ = ["BaseParser", "OboParser", "OwlXMLParser"]
+__all__ = ["BaseParser", "OboParser", "OwlXMLParser", "OboJSONParser"]
 
 from .base import BaseParser
 from .obo import OboParser
 from .owl import OwlXMLParser
+from .obojson import OboJSONParser
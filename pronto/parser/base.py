@@ -22,12 +22,14 @@ class BaseParser(object):
 
     @classmethod
     @abc.abstractmethod
-    def parse(self, stream):
+    def parse(self, stream, workers=None):
         """
         Parse the ontology file.
 
         Parameters
             stream (io.StringIO): A stream of ontologic data.
+            workers (int, optional): The number of processes to use
+                to parse the stream, if the parser supports it.
 
         Returns:
             (dict, dict, list): a tuple of metadata, dict, and imports.
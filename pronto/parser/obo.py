@@ -4,7 +4,10 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import io
 import collections
+import mmap
+import multiprocessing
 import string
 import six
 
@@ -18,6 +21,12 @@ from ..term import Term
 _obo_synonyms_map = {'exact_synonym': 'EXACT', 'broad_synonym': 'BROAD',
                     'narrow_synonym': 'NARROW', 'synonym': 'RELATED'}
 
+# tags with values that are seldom shared by several terms
+_FREE_TEXT_TAGS = frozenset({'comment'})
+
+# streams that are backed by an actual file (`file` only exists in Python 2)
+_mappable_types = (io.BufferedReader, io.FileIO, getattr(six.moves.builtins, 'file', io.FileIO))
+
 class OboParser(BaseParser):
 
     extensions = (".obo", ".obo.gz")
@@ -39,63 +48,234 @@ class OboParser(BaseParser):
         return False
 
     @classmethod
-    def parse(cls, stream):  # noqa: D102
+    def parse(cls, stream, workers=None):  # noqa: D102
 
-        _section    = OboSection.meta
-        meta        = collections.defaultdict(list)
-        _rawterms   = []
-        _rawtypedef = []
+        if workers is not None and workers > 1:
+            return cls._parse_parallel(stream, workers)
 
-        _term_parser = cls._parse_term(_rawterms)
-        next(_term_parser)
+        meta = collections.defaultdict(list)
+        terms = collections.OrderedDict()
 
-        for streamline in stream:
+        _pending = []
+        _cached_synonyms, _strings = {}, {}
+
+        for section, stanza in cls._iter_stanzas(cls._tokenize(stream), meta):
+            if section is OboSection.term:
+                term = cls._classify_term(stanza, _cached_synonyms, _strings)
+                if not all(isinstance(r, Relationship) for r in term.relations):
+                    _pending.append(term)
+                terms[term.id] = term
+            elif section is OboSection.typedef:
+                cls._classify_typedef(stanza)
+
+        # relationships only declared in a later [Typedef] are now registered
+        cls._resolve_pending(_pending)
+        imports = set(meta['import']) if 'import' in meta else set()
+
+        return dict(meta), terms, imports
+
+    @classmethod
+    def _parse_parallel(cls, stream, workers):
+        """Parse the stream using a pool of ``workers`` processes.
+
+        The whole stream is read (and decompressed if needed), and split
+        on stanza boundaries into chunks that are parsed independently
+        by the workers. All typedefs are registered before the relations
+        of the terms are resolved, and terms are merged back following
+        the order of the file.
+        """
+        header, chunks = cls._split_stanzas(stream.read(), workers * 4)
+        meta = cls._parse_header(header)
+
+        pool = multiprocessing.Pool(workers, _init_worker, (header,))
+        try:
+            results = pool.map(_parse_chunk, chunks)
+        finally:
+            pool.terminate()
+
+        for _rawtypedef, _ in results:
+            for _typedef in _rawtypedef:
+                cls._classify_typedef(_typedef)
+
+        terms = collections.OrderedDict()
+        for _, _rawterms in results:
+            for _id, name, desc, relations, synonyms, other in _rawterms:
+                for synonym in synonyms:
+                    if synonym.syn_type is not None:   # use registered instances
+                        synonym.syn_type = SynonymType._instances.get(
+                            synonym.syn_type.name, synonym.syn_type)
+                terms[_id] = Term(_id, name, desc, relations, synonyms, other)
+
+        cls._resolve_pending(six.itervalues(terms))
+        imports = set(meta['import']) if 'import' in meta else set()
+
+        return meta, terms, imports
+
+    @staticmethod
+    def _split_stanzas(data, n):
+        """Split obo data into its header and about ``n`` chunks of stanzas.
+
+        Returns:
+            (bytes, list): the header of the file, and a list of chunks
+            each starting with a stanza header.
+
+        """
+        if data.startswith(b'['):
+            start = 0
+        else:
+            start = data.find(b'\n[') + 1
+            if not start:
+                return data, []
+
+        size = max(1, (len(data) - start) // n)
+        bounds = [start]
+        while True:
+            end = data.find(b'\n[', bounds[-1] + size)
+            if end == -1:
+                break
+            bounds.append(end + 1)
+        bounds.append(len(data))
+
+        return data[:start], [data[i:j] for i, j in zip(bounds, bounds[1:])]
+
+    @classmethod
+    def _parse_header(cls, header):
+        """Parse the metadata of the obo header.
+
+        This also registers the synonym types declared in the header,
+        which is required before parsing any synonym.
+        """
+        meta = collections.defaultdict(list)
+        for _ in cls._iter_stanzas(cls._tokenize(io.BytesIO(header)), meta):
+            pass
+        return dict(meta)
+
+    @classmethod
+    def _parse_chunk(cls, chunk):
+        """Parse a chunk of stanzas into picklable values.
+
+        Returns:
+            (list, list): the raw typedefs found in the chunk, and
+            the arguments needed to create each `Term`, with relations
+            stored with their names as keys.
+
+        """
+        _rawtypedef, _rawterms = [], []
+        _cached_synonyms, _strings = {}, {}
+
+        for section, stanza in cls._iter_stanzas(cls._tokenize(io.BytesIO(chunk)), {}):
+            if section is OboSection.term:
+                term = cls._classify_term(stanza, _cached_synonyms, _strings)
+                relations = {getattr(r, 'obo_name', r): others
+                                for r, others in six.iteritems(term.relations)}
+                _rawterms.append((term.id, term.name, term.desc, relations,
+                                  term.synonyms, term.other))
+            elif section is OboSection.typedef:
+                _rawtypedef.append(dict(stanza))
+
+        return _rawtypedef, _rawterms
 
+    @staticmethod
+    def _map(stream):
+        """Memory-map the file behind ``stream``, if possible.
+
+        This is used by `pronto.lazy` to read the stanzas of a local
+        file on demand.
+
+        Returns:
+            mmap.mmap: a read-only memory map of the file if ``stream``
+            is a local uncompressed file, or `None` otherwise (gzip
+            files, remote files, in-memory buffers, empty files...).
+
+        """
+        if not isinstance(stream, _mappable_types):
+            return None
+        try:
+            return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError, io.UnsupportedOperation):
+            return None
+
+    @staticmethod
+    def _tokenize(stream):
+        """Iterate over the ``(key, value)`` pairs of a line stream.
+
+        Stanza headers (such as ``[Term]``) are yielded with `None`
+        as a key and the name of the stanza as a value, while lines
+        starting with a whitespace are skipped.
+
+        Arguments:
+            stream (io.IOBase): a binary stream of obo data.
+
+        """
+        for streamline in stream:
             # manage encoding && cleaning of line
             streamline = streamline.decode('utf-8')
             if streamline[0] in string.whitespace:
                 continue
             elif streamline[0] == "[":
-                _section = cls._check_section(streamline, _section)
+                yield None, streamline[1:].split(']', 1)[0]
+            else:
+                key, value = streamline.split(':', 1)
+                yield key.strip(), value.strip()
 
-            if _section is OboSection.meta:
-                cls._parse_metadata(streamline, meta)
-            elif _section is OboSection.typedef:
-                cls._parse_typedef(streamline, _rawtypedef)
-            elif _section is OboSection.term:
-                _term_parser.send(streamline)
-                #_rawterms = cls._parse_term(streamline, _rawterms)
+    @classmethod
+    def _iter_stanzas(cls, tokens, meta):
+        """Group tokens into stanzas, yielding each one once complete.
 
-        terms = cls._classify(_rawtypedef, _rawterms)
-        imports = set(meta['import']) if 'import' in meta else set()
+        Metadata found before the first stanza is directly stored in
+        ``meta``, and the lines of stanzas other than ``[Term]`` and
+        ``[Typedef]`` are ignored. Only the stanza currently being read
+        is kept in memory.
 
-        return dict(meta), terms, imports
+        Yields:
+            (OboSection, collections.defaultdict): the section of the
+            stanza, and its content as a ``key: [values]`` mapping.
+
+        """
+        section, stanza = OboSection.meta, None
+
+        for key, value in tokens:
+            if key is None:
+                if stanza is not None:
+                    yield section, stanza
+                section = cls._check_section(value)
+                stanza = collections.defaultdict(list) if section is not None else None
+            elif stanza is not None:
+                stanza[key].append(value)
+            elif section is OboSection.meta:
+                cls._parse_metadata(key, value, meta)
+
+        if stanza is not None:
+            yield section, stanza
 
     @staticmethod
-    def _check_section(line, section):
-        """Update the section being parsed.
+    def _check_section(header):
+        """Get the section corresponding to a stanza header.
 
-        The parser starts in the `OboSection.meta` section but once
-        it reaches the first ``[Typedef]``, it will enter the
-        `OboSection.typedef` section, and/or when it reaches the first
-        ``[Term]``, it will enter the `OboSection.term` section.
+        Returns:
+            OboSection: `OboSection.term` for ``[Term]`` stanzas,
+            `OboSection.typedef` for ``[Typedef]`` stanzas, or
+            `None` for any other stanza.
 
         """
-        if "[Term]" in line:
-            section = OboSection.term
-        elif "[Typedef]" in line:
-            section = OboSection.typedef
-        return section
+        if header == "Term":
+            return OboSection.term
+        elif header == "Typedef":
+            return OboSection.typedef
+        return None
 
     @classmethod
-    def _parse_metadata(cls, line, meta, parse_remarks=True):
+    def _parse_metadata(cls, key, value, meta, parse_remarks=True):
         """Parse a metadata line.
 
         The metadata is organized as a ``key: value`` statement which
-        is split into the proper key and the proper value.
+        is split into the proper key and the proper value by the
+        tokenizer before reaching this method.
 
         Arguments:
-            line (str): the line containing the metadata
+            key (str): the key of the metadata line
+            value (str): the value of the metadata line
+            meta (dict): the metadata dictionary to update
             parse_remarks(bool, optional): set to `False` to avoid
                 parsing the remarks.
 
@@ -114,122 +294,116 @@ class OboParser(BaseParser):
             that *20 chars long*.
 
         """
-        key, value = line.split(':', 1)
-        key, value = key.strip(), value.strip()
-        if parse_remarks and "remark" in key:                        # Checking that the ':' is not
-            if 0<value.find(': ')<20:                                # not too far avoid parsing a sentence
-                try:                                                 # containing a ':' as a key: value
-                    cls._parse_metadata(value, meta, parse_remarks)  # obo statement nested in a remark
-                except ValueError:                                   # (20 is arbitrary, it may require
-                    pass                                             # tweaking)
+        if parse_remarks and "remark" in key:          # Checking that the ':' is not
+            if 0<value.find(': ')<20:                  # not too far avoid parsing a sentence
+                key, value = value.split(':', 1)       # containing a ':' as a key: value
+                cls._parse_metadata(key.strip(),       # obo statement nested in a remark
+                                    value.strip(),     # (20 is arbitrary, it may require
+                                    meta,              # tweaking)
+                                    parse_remarks)
+        elif key == 'synonymtypedef':
+            meta[key].append(SynonymType.from_obo(value))
         else:
             meta[key].append(value)
-            try:
-                syn_type_def = []
-                for m in meta['synonymtypedef']:
-                    if not isinstance(m, SynonymType):
-                        x = SynonymType.from_obo(m)
-                        syn_type_def.append(x)
-                    else:
-                        syn_type_def.append(m)
-            except KeyError:
-                pass
-            else:
-                meta['synonymtypedef'] = syn_type_def
 
     @staticmethod
-    def _parse_typedef(line, _rawtypedef):
-        """Parse a typedef line.
-
-        The typedef is organized as a succesion of ``key:value`` pairs
-        that are extracted into the same dictionnary until a new
-        header is encountered
+    def _classify_typedef(_typedef):
+        """Register a new `Relationship` out of a typedef stanza.
 
-        Arguments:
-            line (str): the line containing a typedef statement
+        New Relationship objects are instantiated with the help of
+        the `Relationship._from_obo_dict` alternate constructor.
         """
-        if "[Typedef]" in line:
-            _rawtypedef.append(collections.defaultdict(list))
-        else:
-            key, value = line.split(':', 1)
-            _rawtypedef[-1][key.strip()].append(value.strip())
-        #return _rawtypedef
+        return Relationship._from_obo_dict( # instantiate a new Relationship
+            {k:v for k,lv in six.iteritems(_typedef) for v in lv}
+        )
 
     @staticmethod
-    def _parse_term(_rawterms):
-        """Parse a term line.
-
-        The term is organized as a succesion of ``key:value`` pairs
-        that are extracted into the same dictionnary until a new
-        header is encountered
-
-        Arguments:
-            line (str): the line containing a term statement
+    def _classify_term(_term, _cached_synonyms, _strings=None):
+        """Create a proper `Term` out of an extracted stanza.
+
+        The new `Term` is instantiated by manually extracting id,
+        name, desc and relationships out of the ``_term`` dictionnary,
+        and then calling the default constructor.
+
+        Relationships that have not been registered yet (because their
+        ``[Typedef]`` appears later in the file) are stored under their
+        name, and must be resolved with `OboParser._resolve_pending`.
+
+        ``_cached_synonyms`` maps the synonym headers already parsed to
+        their `Synonym`, and the cross-references already parsed to a
+        single `tuple`, so that both are shared by all terms. In the same
+        way, ``_strings`` maps the identifiers, tags and tag values
+        already parsed (except comments) to a single instance.
         """
-        line = yield
-        _rawterms.append(collections.defaultdict(list))
-        while True:
-            line = yield
-            if "[Term]" in line:
-                _rawterms.append(collections.defaultdict(list))
-            else:
-                key, value = line.split(':', 1)
-                _rawterms[-1][key.strip()].append(value.strip())
-            #_rawterms
+        synonyms = set()
+        if _strings is None:
+            _strings = {}
+
+        def intern(x):
+            return _strings.setdefault(x, x)
+
+        def share(xref):
+            if xref not in _cached_synonyms:
+                _cached_synonyms[xref] = tuple(intern(x) for x in xref)
+            return _cached_synonyms[xref]
+
+        _id   = intern(_term['id'][0])
+        _name = _term.pop('name', ('',))[0]
+        _desc = _term.pop('def', ('',))[0]
+
+        _relations = collections.defaultdict(list)
+        try:
+            for other in _term.get('is_a', ()):
+                _relations[Relationship('is_a')].append(intern(other.split('!')[0].strip()))
+        except IndexError:
+            pass
+        try:
+            for relname, other in ( x.split(' ', 1) for x in _term.pop('relationship', ())):
+                relation = Relationship._instances.get(relname, intern(relname))
+                _relations[relation].append(intern(other.split('!')[0].strip()))
+        except IndexError:
+            pass
+
+        for key, scope in six.iteritems(_obo_synonyms_map):
+            for obo_header in _term.pop(key, ()):
+                try:
+                    s = _cached_synonyms[obo_header]
+                except KeyError:
+                     s = Synonym.from_obo(obo_header, scope)
+                     s.xref = share(s.xref)
+                     _cached_synonyms[obo_header] = s
+                finally:
+                    synonyms.add(s)
+
+        desc = Description.from_obo(_desc) if _desc else Description("")
+        desc.xref = share(desc.xref)
+
+        other = {intern(k): v if k in _FREE_TEXT_TAGS else [intern(x) for x in v]
+                    for k, v in six.iteritems(_term)}
+
+        return Term(_id, _name, desc, dict(_relations), synonyms, other)
 
     @staticmethod
-    def _classify(_rawtypedef, _rawterms):
-        """Create proper objects out of extracted dictionnaries.
+    def _resolve_pending(terms):
+        """Replace relationship names with actual `Relationship` instances.
+        """
+        for term in terms:
+            relations = collections.defaultdict(list)
+            for relation, others in six.iteritems(term.relations):
+                if not isinstance(relation, Relationship):
+                    relation = Relationship(relation)
+                relations[relation].extend(others)
+            term.relations = dict(relations)
 
-        New Relationship objects are instantiated with the help of
-        the `Relationship._from_obo_dict` alternate constructor.
 
-        New `Term` objects are instantiated by manually extracting id,
-        name, desc and relationships out of the ``_rawterm``
-        dictionnary, and then calling the default constructor.
-        """
-        terms = collections.OrderedDict()
-        _cached_synonyms = {}
-
-        for _typedef in _rawtypedef:
-            Relationship._from_obo_dict( # instantiate a new Relationship
-                {k:v for k,lv in six.iteritems(_typedef) for v in lv}
-            )
-
-
-        for _term in _rawterms:
-            synonyms = set()
-
-            _id   = _term['id'][0]
-            _name = _term.pop('name', ('',))[0]
-            _desc = _term.pop('def', ('',))[0]
-
-            _relations = collections.defaultdict(list)
-            try:
-                for other in _term.get('is_a', ()):
-                    _relations[Relationship('is_a')].append(other.split('!')[0].strip())
-            except IndexError:
-                pass
-            try:
-                for relname, other in ( x.split(' ', 1) for x in _term.pop('relationship', ())):
-                    _relations[Relationship(relname)].append(other.split('!')[0].strip())
-            except IndexError:
-                pass
-
-            for key, scope in six.iteritems(_obo_synonyms_map):
-                for obo_header in _term.pop(key, ()):
-                    try:
-                        s = _cached_synonyms[obo_header]
-                    except KeyError:
-                         s = Synonym.from_obo(obo_header, scope)
-                         _cached_synonyms[obo_header] = s
-                    finally:
-                        synonyms.add(s)
-
-            desc = Description.from_obo(_desc) if _desc else Description("")
-
-            terms[_id] = Term(_id, _name, desc, dict(_relations), synonyms, dict(_term))
-        return terms
+
+def _init_worker(header):
+    """Prepare a worker process of `OboParser._parse_parallel`.
+    """
+    OboParser._parse_header(header)
+
+def _parse_chunk(chunk):
+    return OboParser._parse_chunk(chunk)
 
 
 OboParser()
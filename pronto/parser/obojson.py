@@ -0,0 +1,425 @@
+# coding: utf-8
+"""Definition of the OBO Graphs JSON parser and serializer.
+
+`OBO Graphs <https://github.com/geneontology/obographs>`_ is the JSON
+format used by the OBO Foundry tools to exchange ontologies. A document
+stores a list of graphs, each with a list of nodes (the terms) and a
+list of edges (the relationships between terms)::
+
+    {"graphs": [{"id": "http://purl.obolibrary.org/obo/hp.owl",
+                 "meta": {"basicPropertyValues": [...]},
+                 "nodes": [{"id": "http://purl.obolibrary.org/obo/HP_0000001",
+                            "lbl": "All", "type": "CLASS", "meta": {...}}],
+                 "edges": [{"sub": "http://purl.obolibrary.org/obo/HP_0000118",
+                            "pred": "is_a",
+                            "obj": "http://purl.obolibrary.org/obo/HP_0000001"}]}]}
+
+Both the parser and the serializer process nodes and edges one at a
+time, so that the document never needs to be held in memory at once.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import codecs
+import collections
+import io
+import json
+import re
+
+import six
+
+from .base import BaseParser
+from .utils import owl_ns, owl_synonyms, obo_to_obojson, obojson_to_obo, obojson_synonyms
+from ..description import Description
+from ..relationship import Relationship
+from ..synonym import Synonym, SynonymType, _get_synonym_type
+from ..term import Term, _iter_relations
+from ..utils import nowarnings
+
+
+_OBO_PURL = owl_ns['obo']
+_OBO_IN_OWL = owl_ns['oboInOwl']
+_RX_CURIE = re.compile(r'^([A-Za-z][A-Za-z0-9]*):(?!//)(\S+)$')
+_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+# tags of `Term.other` which are not serialized as property values
+_NODE_TAGS = frozenset({'id', 'name', 'def', 'synonym', 'is_a', 'relationship',
+                        'comment', 'subset', 'xref', 'is_obsolete'})
+
+
+class OboJSONParser(BaseParser):
+    """An OBO Graphs JSON parser.
+
+    The document is decoded incrementally from the stream, one node or
+    edge at a time, with the `json` module of the standard library.
+    """
+
+    extensions = ('.json', '.json.gz')
+    chunk_size = io.DEFAULT_BUFFER_SIZE * 8
+
+    @classmethod
+    def hook(cls, force=False, path=None, lookup=None):  # noqa: D102
+        if force:
+            return True
+        if path is not None and path.endswith(cls.extensions):
+            return True
+        if lookup is not None and lookup.lstrip().startswith(b'{') and b'"graphs"' in lookup:
+            return True
+        return False
+
+    @classmethod
+    @nowarnings
+    def parse(cls, stream, workers=None):  # noqa: D102
+
+        meta, terms = collections.defaultdict(list), collections.OrderedDict()
+        edges, properties, strings, ids = [], {}, {}, []
+        reader = _JSONReader(stream, cls.chunk_size)
+
+        for key in reader.object():
+            if key != 'graphs':
+                reader.value()
+                continue
+            for _ in reader.array():
+                for key in reader.object():
+                    if key == 'nodes':
+                        for _ in reader.array():
+                            cls._add_node(reader.value(), terms, properties, strings)
+                    elif key == 'edges':
+                        for _ in reader.array():
+                            edge = reader.value()
+                            sub, obj = _curie(edge['sub']), _curie(edge['obj'])
+                            edges.append((strings.setdefault(sub, sub), edge['pred'],
+                                          strings.setdefault(obj, obj)))
+                    elif key == 'meta':
+                        cls._add_meta(reader.value(), meta)
+                    elif key == 'id':
+                        ids.append(reader.value())
+                    else:
+                        reader.value()
+
+        cls._add_edges(terms, edges, properties)
+        if 'ontology' not in meta:
+            meta['ontology'].extend(_ontology_name(x) for x in ids if x.startswith(_OBO_PURL))
+            if not meta['ontology']:
+                del meta['ontology']
+        imports = set(meta['import']) if 'import' in meta else set()
+        return dict(meta), terms, imports
+
+    @staticmethod
+    def _add_meta(graph_meta, meta):
+        """Add the property values of a graph to the ontology metadata.
+        """
+        for value in graph_meta.get('basicPropertyValues', ()):
+            tag = _tag(value['pred'])
+            if tag == 'synonymtypedef':
+                # reuse the synonym types already registered, if identical
+                match = SynonymType._RX_OBO_EXTRACTER.search(value['val'])
+                name, desc, scope = (x.strip() if x else None for x in match.groups())
+                meta[tag].append(_get_synonym_type(name, desc, scope))
+            else:
+                meta[tag].append(value['val'])
+
+    @classmethod
+    def _add_node(cls, node, terms, properties, strings):
+        """Create a `Term` from a class node.
+
+        The shorthands of property nodes are recorded in ``properties``,
+        to name the relationships of the edges using them as predicates.
+        """
+        node_meta = node.get('meta', {})
+        if node.get('type', 'CLASS') != 'CLASS':
+            for value in node_meta.get('basicPropertyValues', ()):
+                if _tag(value['pred']) == 'shorthand':
+                    properties[node['id']] = value['val']
+            return
+
+        other = collections.defaultdict(list)
+        for value in node_meta.get('basicPropertyValues', ()):
+            other[_tag(value['pred'])].append(value['val'])
+        if node_meta.get('comments'):
+            other['comment'].extend(node_meta['comments'])
+        if node_meta.get('subsets'):
+            other['subset'].extend(map(_curie, node_meta['subsets']))
+        if node_meta.get('xrefs'):
+            other['xref'].extend(x['val'] for x in node_meta['xrefs'])
+        if node_meta.get('deprecated'):
+            other['is_obsolete'].append('true')
+
+        definition = node_meta.get('definition') or {}
+        id = _curie(node['id'])
+        terms[id] = Term(
+            strings.setdefault(id, id),
+            node.get('lbl', ''),
+            Description(definition.get('val', ''), definition.get('xrefs')),
+            None,
+            set(map(cls._extract_synonym, node_meta.get('synonyms', ()))),
+            dict(other),
+        )
+
+    @staticmethod
+    def _extract_synonym(value):
+        """Create a `Synonym` from a synonym property value.
+        """
+        scope = owl_synonyms.get(_tag(value.get('pred', '')), 'RELATED')
+        syn_type = value.get('synonymType')
+        if syn_type is not None:
+            syn_type = _curie(syn_type)
+            if syn_type not in SynonymType._instances:
+                syn_type = None
+        return Synonym(value['val'], scope, syn_type, value.get('xrefs'))
+
+    @staticmethod
+    def _add_edges(terms, edges, properties):
+        """Add the edges between class nodes to the relations of terms.
+        """
+        relationships = {'is_a': Relationship('is_a')}
+        for sub, pred, obj in edges:
+            term = terms.get(sub)
+            if term is None:
+                continue
+            relation = relationships.get(pred)
+            if relation is None:
+                name = properties.get(pred) or _curie(pred)
+                relation = relationships[pred] = Relationship(name)
+            term.relations.setdefault(relation, []).append(obj)
+
+
+class _JSONReader(object):
+    """A reader decoding a JSON document from a stream, piece by piece.
+
+    Objects and arrays can be walked through one member at a time with
+    `~_JSONReader.object` and `~_JSONReader.array`, and any other value
+    is decoded at once with `~_JSONReader.value`, so that only a chunk
+    of the stream and the value being decoded are held in memory.
+    """
+
+    _RX_WHITESPACE = re.compile(r'[ \t\n\r]*')
+    _NUMBER_TAIL = frozenset(['', '.', 'e', 'E', '+', '-']).union('0123456789')
+
+    def __init__(self, stream, chunk_size):
+        self.stream, self.chunk_size = stream, chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.buffer, self.pos, self.eof = '', 0, False
+
+    def _fill(self, size=None):
+        """Read the next chunk of the stream into the buffer.
+
+        Returns:
+            bool: `False` if the end of the stream was already reached.
+
+        """
+        if self.eof:
+            return False
+        data = self.stream.read(max(size or 0, self.chunk_size))
+        self.eof = not data
+        if isinstance(data, six.binary_type):
+            data = self.text_decoder.decode(data, self.eof)
+        self.buffer, self.pos = self.buffer[self.pos:] + data, 0
+        return True
+
+    def peek(self):
+        """Skip whitespace, and return the next character, or ``''``.
+        """
+        while True:
+            self.pos = self._RX_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of ``chars``.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError("expected one of {!r}, found {!r}".format(chars, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # the value is not complete: read a chunk at least as
+                # large as the buffer, to decode large values in a few
+                # attempts only
+                if not self._fill(len(self.buffer)):
+                    raise
+                continue
+            # a number may continue in the next chunk
+            if isinstance(value, six.integer_types + (float,)) and self.buffer[end:end+1] in self._NUMBER_TAIL \
+                    and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def object(self):
+        """Iterate over the keys of the next object.
+
+        The value of each key must be consumed before the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def array(self):
+        """Iterate over the next array, once per element.
+
+        Each element must be consumed before the next one.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.expect(',]') == ']':
+                return
+
+
+def _iri(id):
+    """Expand an identifier to an IRI if it is a CURIE (such as HP:0000001).
+    """
+    match = _RX_CURIE.match(id)
+    if match is None:
+        return id
+    return '{}{}_{}'.format(_OBO_PURL, *match.groups())
+
+
+def _curie(iri):
+    """Compact an IRI to an identifier, reversing `_iri`.
+    """
+    if iri.startswith(_OBO_PURL):
+        local = iri[len(_OBO_PURL):]
+        if '#' in local:
+            return local.rsplit('#', 1)[-1]
+        if '_' in local and '/' not in local:
+            return local.replace('_', ':', 1)
+    elif '#' in iri and iri.startswith(('http:', 'https:')):
+        return iri.rsplit('#', 1)[-1]
+    return iri
+
+
+def _tag(pred):
+    """Get the obo tag of the IRI of an annotation property.
+    """
+    if pred in obojson_to_obo:
+        return obojson_to_obo[pred]
+    if pred.startswith(_OBO_PURL):
+        return _curie(pred)
+    return pred.rsplit('#', 1)[-1].rsplit('/', 1)[-1]
+
+
+def _ontology_name(iri):
+    """Get the name of an ontology from its IRI (such as hp from .../hp.owl).
+    """
+    name = iri.rsplit('/', 1)[-1]
+    return name[:-4] if name.endswith('.owl') else name
+
+
+def _values(values):
+    return values if isinstance(values, (list, tuple)) else [values]
+
+
+def _property_values(tags):
+    """Build the property values of obo tags, from ``(tag, values)`` pairs.
+    """
+    return [
+        {'pred': obo_to_obojson.get(tag) or _OBO_IN_OWL + tag,
+         'val': x.obo.split(' ', 1)[1] if isinstance(x, SynonymType) else x}
+            for tag, values in tags
+                for x in _values(values)
+    ]
+
+
+def _node(term):
+    """Build the node of a `Term`.
+    """
+    other, meta = term.other, {}
+    if term.desc:
+        meta['definition'] = {'val': six.text_type(term.desc), 'xrefs': list(term.desc.xref)}
+    if 'comment' in other:
+        meta['comments'] = list(_values(other['comment']))
+    if 'subset' in other:
+        meta['subsets'] = list(_values(other['subset']))
+    if term.synonyms:
+        meta['synonyms'] = [_synonym(s) for s in sorted(term.synonyms, key=str)]
+    if 'xref' in other:
+        meta['xrefs'] = [{'val': x} for x in _values(other['xref'])]
+    if 'true' in _values(other.get('is_obsolete', ())):
+        meta['deprecated'] = True
+    values = _property_values(
+        (k, v) for k, v in sorted(six.iteritems(other)) if k not in _NODE_TAGS)
+    if values:
+        meta['basicPropertyValues'] = values
+
+    node = {'id': _iri(term.id), 'lbl': term.name, 'type': 'CLASS'}
+    if meta:
+        node['meta'] = meta
+    return node
+
+
+def _synonym(synonym):
+    """Build the property value of a `Synonym`.
+    """
+    value = {'pred': obojson_synonyms.get(synonym.scope, 'hasRelatedSynonym'),
+             'val': synonym.desc, 'xrefs': list(synonym.xref)}
+    if synonym.syn_type is not None:
+        value['synonymType'] = _iri(synonym.syn_type.name)
+    return value
+
+
+def _edges(term):
+    """Iterate over the edges of the relations of a `Term`.
+
+    Topdown relationships (such as *can_be*) are left out, since they
+    are the complements of the bottomup relationships of other terms.
+    """
+    sub = _iri(term.id)
+    for relation, companions in _iter_relations(term.relations):
+        if relation.direction != 'topdown':
+            for companion in companions:
+                obj = _iri(getattr(companion, 'id', companion))
+                yield {'sub': sub, 'pred': relation.obo_name, 'obj': obj}
+
+
+def _iter_graph(meta, terms):
+    """Iterate over the pieces of an OBO Graphs document.
+
+    Arguments:
+        meta (dict): the metadata of the ontology.
+        terms (iterable): the terms to serialize, iterated twice: once
+            for their nodes, and once for their edges.
+
+    Yields:
+        str: a piece of the document, with one node or edge per line.
+
+    """
+    encode = _ENCODER.encode
+    graph = {}
+    if 'ontology' in meta:
+        graph['id'] = '{}{}.owl'.format(_OBO_PURL, meta['ontology'][0])
+    graph['meta'] = {'basicPropertyValues': _property_values(sorted(six.iteritems(meta)))}
+
+    yield '{"graphs":[' + encode(graph)[:-1] + ',"nodes":['
+    for i, term in enumerate(terms):
+        yield (',\n' if i else '\n') + encode(_node(term))
+    yield '\n],"edges":['
+    sep = '\n'
+    for term in terms:
+        for edge in _edges(term):
+            yield sep + encode(edge)
+            sep = ',\n'
+    yield '\n]}]}\n'
@@ -33,6 +33,9 @@ OWL_AXIOM = "{{{}}}{}".format(owl_ns['owl'], 'Axiom')
 OWL_CLASS = "{{{}}}{}".format(owl_ns['owl'], 'Class')
 OWL_ONTOLOGY = "{{{}}}{}".format(owl_ns['owl'], 'Ontology')
 
+# tags with values that are seldom shared by several terms
+_FREE_TEXT_TAGS = frozenset({'definition', 'IAO_0000115', 'comment'})
+
 
 
 class OwlXMLParser(BaseParser):
@@ -58,53 +61,77 @@ class OwlXMLParser(BaseParser):
 
     @classmethod
     @nowarnings
-    def parse(cls, stream):  # noqa: D102
-
-        tree = etree.parse(stream)
-
-        meta = cls._extract_resources(tree.find(OWL_ONTOLOGY))
-        terms = collections.OrderedDict()
-
-        for rawterm in cls._iter_rawterms(tree):
-            term = Term(
-                rawterm.pop('id'),
-                rawterm.pop('label', [''])[0],
-                rawterm.pop('definition', '') or rawterm.pop('IAO_0000115', ''),
-                cls._extract_obo_relation(rawterm),
-                cls._extract_obo_synonyms(rawterm),
-                cls._relabel_to_obo(rawterm),
-            )
-            terms[term.id] = term
-            # TODO: extract axioms through targeted XPaths
-
-        terms = cls._annotate(terms, tree)
+    def parse(cls, stream, workers=None):  # noqa: D102
+
+        meta, terms, axioms = {}, collections.OrderedDict(), {}
+        strings = {}
+
+        for elem in cls._iter_toplevel(stream):
+            if elem.tag == OWL_CLASS:
+                rawterm = cls._extract_rawterm(elem, strings)
+                if rawterm is None:
+                    continue
+                term = Term(
+                    rawterm.pop('id'),
+                    rawterm.pop('label', [''])[0],
+                    rawterm.pop('definition', '') or rawterm.pop('IAO_0000115', ''),
+                    cls._extract_obo_relation(rawterm, strings),
+                    cls._extract_obo_synonyms(rawterm),
+                    cls._relabel_to_obo(rawterm),
+                )
+                terms[term.id] = term
+                # apply the axiom found before the term itself, if any
+                if term.id in axioms:
+                    term.desc = axioms.pop(term.id)
+            elif elem.tag == OWL_AXIOM:
+                cls._annotate(terms, axioms, cls._extract_resources(elem))
+            elif elem.tag == OWL_ONTOLOGY:
+                meta = cls._extract_resources(elem)
+
         meta = cls._relabel_to_obo(meta)
         meta.setdefault('imports', [])
 
         return meta, terms, set(meta['imports'])
 
-    @classmethod
-    def _annotate(cls, terms, tree):
-
-        for axiom in map(cls._extract_resources, tree.iterfind(OWL_AXIOM)):
+    @staticmethod
+    def _iter_toplevel(stream):
+        """Iterate through the children of the root element of a document.
 
-            if not 'annotatedSource' in axiom:
+        Each element is yielded once it was entirely parsed, and then
+        cleared and detached from the root, so that only one of them
+        is in memory at any time.
+        """
+        depth, root = 0, None
+        for event, elem in etree.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                depth += 1
                 continue
+            depth -= 1
+            if depth == 1:
+                yield elem
+                elem.clear()
+                root.remove(elem)
 
-            prop = cls._get_id_from_url(axiom['annotatedProperty'][0])
-            src = cls._get_id_from_url(axiom['annotatedSource'][0])
-            target = axiom.get('annotatedTarget')
-
-            # annotated description with xrefs
-            if prop == 'IAO:0000115':
-                if src in terms:
-                    terms[src].desc = Description(
-                        ''.join(target or []), axiom.get('hasDbXref', [])
-                    )
-
-        return terms
+    @classmethod
+    def _annotate(cls, terms, axioms, axiom):
+        """Apply an axiom to its term, or keep it until the term is parsed.
+        """
+        if not 'annotatedSource' in axiom:
+            return
 
+        prop = cls._get_id_from_url(axiom['annotatedProperty'][0])
+        src = cls._get_id_from_url(axiom['annotatedSource'][0])
+        target = axiom.get('annotatedTarget')
 
+        # annotated description with xrefs
+        if prop == 'IAO:0000115':
+            desc = Description(''.join(target or []), axiom.get('hasDbXref', []))
+            if src in terms:
+                terms[src].desc = desc
+            else:
+                axioms[src] = desc
 
     @staticmethod
     def _get_basename(tag):
@@ -120,33 +147,39 @@ class OwlXMLParser(BaseParser):
         return _id.replace('_', ':')
 
     @staticmethod
-    def _extract_resources(elem):
+    def _extract_resources(elem, strings=None):
         """Extract the children of an element as a key/value mapping.
+
+        If ``strings`` is given, keys and values already found in other
+        elements are replaced by the instance stored in ``strings``,
+        except for free text such as definitions and comments.
         """
         resources = collections.defaultdict(list)
+        intern = (lambda x: x) if strings is None else (lambda x: strings.setdefault(x, x))
         for child in itertools.islice(elem.iter(), 1, None):
             try:
-                basename = child.tag.split('}', 1)[-1]
+                basename = intern(child.tag.split('}', 1)[-1])
                 if child.text is not None:
                     child.text = child.text.strip()
                 if child.text:
-                    resources[basename].append(child.text)
+                    text = child.text if basename in _FREE_TEXT_TAGS else intern(child.text)
+                    resources[basename].append(text)
                 elif child.get(RDF_RESOURCE) is not None:
-                    resources[basename].append(child.get(RDF_RESOURCE))
+                    resources[basename].append(intern(child.get(RDF_RESOURCE)))
             except AttributeError:
                 pass
         return dict(resources)
 
     @classmethod
-    def _iter_rawterms(cls, tree):
-        """Iterate through the raw terms (Classes) in the ontology.
+    def _extract_rawterm(cls, elem, strings=None):
+        """Extract a raw term from a Class, or `None` for anonymous classes.
         """
-        for elem in tree.iterfind(OWL_CLASS):
-            if RDF_ABOUT not in elem.keys():   # This avoids parsing a class
-                continue                       # created by restriction
-            rawterm = cls._extract_resources(elem)
-            rawterm['id'] = cls._get_id_from_url(elem.get(RDF_ABOUT))
-            yield rawterm
+        if RDF_ABOUT not in elem.keys():   # This avoids parsing a class
+            return None                    # created by restriction
+        rawterm = cls._extract_resources(elem, strings)
+        id = cls._get_id_from_url(elem.get(RDF_ABOUT))
+        rawterm['id'] = id if strings is None else strings.setdefault(id, id)
+        return rawterm
 
     @staticmethod
     def _extract_obo_synonyms(rawterm):
@@ -161,13 +194,15 @@ class OwlXMLParser(BaseParser):
         return synonyms
 
     @classmethod
-    def _extract_obo_relation(cls, rawterm):
+    def _extract_obo_relation(cls, rawterm, strings=None):
         """Extract the relationships defined in the rawterm.
         """
         relations = {}
         if 'subClassOf' in rawterm:
             relations[Relationship('is_a')] = l = []
             l.extend(map(cls._get_id_from_url, rawterm.pop('subClassOf')))
+            if strings is not None:
+                l[:] = [strings.setdefault(x, x) for x in l]
         return relations
 
     @staticmethod
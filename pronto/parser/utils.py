@@ -2,7 +2,7 @@
 """miscellaneous parsing utilities.
 
 This module defines mapping to convert metadata from obo to owl and
-owl to obo, as well as enums to state the section of the ontology
+owl to obo, or between obo and OBO Graphs JSON, as well as enums to state the section of the ontology
 the parser is currently looking at.
 """
 from __future__ import unicode_literals
@@ -69,3 +69,23 @@ owl_synonyms = {
     "hasRelatedSynonym": "RELATED",
     "hasSynonym": "RELATED"
 }
+
+obo_to_obojson = {
+    'alt_id': owl_ns['oboInOwl'] + 'hasAlternativeId',
+    'namespace': owl_ns['oboInOwl'] + 'hasOBONamespace',
+    'default-namespace': owl_ns['oboInOwl'] + 'hasDefaultNamespace',
+    'format-version': owl_ns['oboInOwl'] + 'hasOBOFormatVersion',
+    'data-version': owl_ns['owl'] + 'versionInfo',
+    'replaced_by': owl_ns['obo'] + 'IAO_0100001',
+}
+
+obojson_to_obo = {
+    v:k for k,v in six.iteritems(obo_to_obojson)
+}
+
+obojson_synonyms = {
+    "EXACT": "hasExactSynonym",
+    "NARROW": "hasNarrowSynonym",
+    "BROAD": "hasBroadSynonym",
+    "RELATED": "hasRelatedSynonym",
+}
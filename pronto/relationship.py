@@ -45,6 +45,9 @@ class Relationship(object):
 
     """
 
+    __slots__ = ['obo_name', 'symmetry', 'transitivity', 'reflexivity',
+                 'complementary', 'prefix', 'direction', 'comment', 'aliases',
+                 '__weakref__']
     _instances = collections.OrderedDict()
 
     def __init__(self, obo_name, symmetry=None, transitivity=None,
@@ -201,8 +204,12 @@ class Relationship(object):
         """
         return tuple(unique_everseen(r for r in cls._instances.values() if r.direction=='bottomup'))
 
-    def __getnewargs__(self):
-        return (self.obo_name,)
+    def __reduce__(self):
+        # unpickling goes through `__new__`, which either returns the
+        # existing instance or creates and registers a complete one
+        return Relationship, (self.obo_name, self.symmetry, self.transitivity,
+                              self.reflexivity, self.complementary, self.prefix,
+                              self.direction, self.comment, self.aliases)
 
     @classmethod
     def _from_obo_dict(cls, d):
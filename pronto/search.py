@@ -0,0 +1,335 @@
+# coding: utf-8
+"""Prefix and approximate search of terms from their labels.
+
+This module defines `SearchIndex`, which finds the terms of an ontology
+from a partial or misspelled label, ranked by similarity, without
+comparing the query to every label:
+
+* prefix search looks up a `list` of all the labels, case-folded and
+  sorted, with a binary search;
+* approximate search uses an inverted index of the character trigrams
+  of the labels, and scores the labels sharing trigrams with the query.
+
+Example:
+    >>> from pronto.search import SearchIndex
+    >>> index = SearchIndex(uo)
+    >>> [hit.label for hit in index.prefix('kilog', 3)]
+    ['kilogram', 'kilogram per mole', 'kilogram per liter']
+    >>> hit = index.fuzzy('kilogramm', 1)[0]
+    >>> hit.id, hit.label, hit.field
+    ('UO:0000009', 'kilogram', 'name')
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+from __future__ import division
+
+import array
+import bisect
+import collections
+import sys
+
+import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .lookup import _casefold, _fold
+
+
+#: A term found by a search: ``label`` is the label of the term with
+#: identifier ``id`` matching the query, in a ``field`` among
+#: `SearchIndex.FIELDS`, with a similarity ``score`` between 0 and 1.
+Hit = collections.namedtuple('Hit', ['id', 'label', 'field', 'score'])
+
+
+class SearchIndex(object):
+    """An index of the labels of terms for prefix and approximate search.
+
+    Labels are indexed case-folded. Each label is stored once in a
+    sorted `list`, with the position of its term and its field stored
+    in parallel `array.array`. The inverted index maps each trigram of
+    the labels (padded with a space on both sides, so that the start
+    and the end of labels weigh more) to an `array.array` of the
+    labels containing it.
+
+    Approximate search counts the trigrams each label shares with the
+    query (with `numpy` if available) and scores names and synonyms
+    with the Sørensen–Dice coefficient of their trigrams. Definitions
+    are long texts, and are scored with the fraction of the trigrams of
+    the query they contain, halved, so that a label close to the query
+    ranks before a definition merely mentioning it.
+
+    Attributes:
+        fields (tuple): the indexed fields, among `SearchIndex.FIELDS`.
+        ids (list): the identifiers of the indexed terms.
+
+    """
+
+    #: The fields that can be indexed: ``name`` (`Term.name`),
+    #: ``synonym`` (the description of `Term.synonyms`) and ``desc``
+    #: (the definition of the term, `Term.desc`).
+    FIELDS = ('name', 'synonym', 'desc')
+
+    _MAXCHAR = six.unichr(sys.maxunicode)
+
+    def __init__(self, terms, fields=('name', 'synonym')):
+        """Create an index of the labels of some terms.
+
+        Arguments:
+            terms (iterable): the `Term` instances to index.
+            fields (iterable): the fields to index. Definitions are not
+                indexed by default, since their trigrams take far more
+                memory than the ones of names and synonyms.
+
+        Raises:
+            ValueError: when a field is not supported.
+
+        """
+        self.fields = tuple(fields)
+        for field in self.fields:
+            if field not in self.FIELDS:
+                raise ValueError("unsupported field: {!r}".format(field))
+
+        self.ids, keys, labels = [], [], []
+        owners, kinds = array.array(str('i')), array.array(str('b'))
+        for term in terms:
+            position = len(self.ids)
+            self.ids.append(term.id)
+            for field, label in _labels(term, self.fields):
+                keys.append(_fold(label))
+                labels.append(label)
+                owners.append(position)
+                kinds.append(field)
+        order = sorted(six.moves.range(len(keys)), key=keys.__getitem__)
+
+        self._keys = [keys[i] for i in order]
+        self._labels = [labels[i] for i in order]
+        self._owners = array.array(str('i'), [owners[i] for i in order])
+        self._fields = array.array(str('b'), [kinds[i] for i in order])
+        self._build_postings()
+
+    def __repr__(self):
+        return "SearchIndex({} terms, {} labels, {} trigrams)".format(
+            len(self.ids), len(self._keys),
+            len(self._grams if self._postings is None else self._postings))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def prefix(self, text, k=10):
+        """Find the terms with a label starting with some text.
+
+        Definitions are never matched by a prefix search. Labels are
+        ranked by length, so that a label equal to the text comes first,
+        then names before synonyms, and then in alphabetical order.
+
+        Arguments:
+            text (str): the start of the labels to find, in any case.
+            k (int): the maximum number of terms to find.
+
+        Returns:
+            list: a `Hit` for each of the (at most) ``k`` best terms,
+            with the score of the best of its labels, which is the
+            length of the text divided by the length of the label.
+
+        """
+        key = _casefold(text)
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + self._MAXCHAR, start)
+        desc = self.FIELDS.index('desc')
+
+        if numpy is not None:
+            found = numpy.arange(start, end)
+            fields = self._array(self._fields)[start:end]
+            found, fields = found[fields != desc], fields[fields != desc]
+            lengths = self._array(self._lengths)[found]
+            order = found[numpy.lexsort((found, fields, lengths))].tolist()
+        else:
+            order = sorted((i for i in six.moves.range(start, end) if self._fields[i] != desc),
+                           key=lambda i: (self._lengths[i], self._fields[i], i))
+        return self._hits(order, k, lambda i: len(key) / max(self._lengths[i], 1))
+
+    def fuzzy(self, text, k=10, threshold=0.3):
+        """Find the terms with a label similar to some text.
+
+        Arguments:
+            text (str): the text to compare to the labels, in any case.
+            k (int): the maximum number of terms to find.
+            threshold (float): the minimum score of a label.
+
+        Returns:
+            list: a `Hit` for each of the (at most) ``k`` best terms,
+            with the best of the scores of its labels.
+
+        """
+        rows, size = self._rows(_casefold(text))
+        if not rows:
+            return []
+        desc = self.FIELDS.index('desc')
+
+        if numpy is not None:
+            # a label sharing c trigrams with the query scores at most 2c/size
+            counts = numpy.bincount(numpy.concatenate(rows))
+            found = numpy.flatnonzero(counts >= max(threshold * size / 2, 1))
+            common = counts[found].astype(numpy.float64)
+            scores = numpy.where(
+                self._array(self._fields)[found] == desc, common / size / 2,
+                2 * common / (size + self._array(self._sizes)[found]))
+            keep = scores >= threshold
+            found, scores = found[keep], scores[keep]
+            # rank the best labels first, and all of them only when the
+            # best ones belong to less than k terms
+            if len(scores) > 4 * k:
+                cutoff = numpy.partition(scores, len(scores) - 4 * k)[len(scores) - 4 * k]
+                hits = self._ranked_hits(found[scores >= cutoff], scores[scores >= cutoff], k)
+                if len(hits) == k:
+                    return hits
+            return self._ranked_hits(found, scores, k)
+        else:
+            counts = collections.Counter()
+            for row in rows:
+                counts.update(row)
+            scores = {i: c / size / 2 if self._fields[i] == desc else 2 * c / (size + self._sizes[i])
+                      for i, c in six.iteritems(counts)}
+            order = sorted((i for i in scores if scores[i] >= threshold),
+                           key=lambda i: (-scores[i], self._lengths[i], i))
+        return self._hits(order, k, scores.__getitem__)
+
+    def _ranked_hits(self, found, scores, k):
+        """Get the hits of the best distinct terms among scored labels.
+        """
+        ranks = numpy.lexsort((found, self._array(self._lengths)[found], -scores))
+        order = found[ranks].tolist()
+        return self._hits(order, k, dict(zip(order, scores[ranks].tolist())).__getitem__)
+
+    def _hits(self, order, k, score):
+        """Get the hits of the best distinct terms among ranked labels.
+        """
+        hits, seen = [], set()
+        for i in order:
+            if len(hits) == k:
+                break
+            if self._owners[i] not in seen:
+                seen.add(self._owners[i])
+                hits.append(Hit(self.ids[self._owners[i]], self._labels[i],
+                                self.FIELDS[self._fields[i]], score(i)))
+        return hits
+
+    @staticmethod
+    def _array(values):
+        """View an `array.array` as a `numpy.ndarray`, without copying.
+        """
+        return numpy.frombuffer(values, dtype=numpy.dtype(values.typecode))
+
+    def _rows(self, key):
+        """Get the labels containing each trigram of a case-folded query.
+
+        Returns:
+            (list, int): the positions of the labels containing each
+            trigram of the query also found in some label, and the
+            number of distinct trigrams of the query.
+
+        """
+        if self._postings is not None:
+            grams = _trigrams(key)
+            return [self._postings[gram] for gram in grams if gram in self._postings], len(grams)
+        chars = _chars([key])
+        dense = numpy.searchsorted(self._alphabet, chars)
+        dense[dense == len(self._alphabet)] = 0
+        known = self._alphabet[dense] == chars
+        known = known[:-2] & known[1:-1] & known[2:]
+        codes = numpy.unique(_codes(dense, len(self._alphabet))[known])
+        rows = numpy.searchsorted(self._grams, codes)
+        found = rows < len(self._grams)
+        rows, codes = rows[found], codes[found]
+        rows = rows[self._grams[rows] == codes]
+        return [self._indices[self._offsets[r]:self._offsets[r+1]] for r in rows.tolist()], \
+            len(_trigrams(key))
+
+    def _build_postings(self):
+        """Build the inverted index of the trigrams of the labels.
+
+        With `numpy`, the characters of the labels are numbered, so that
+        each trigram of a label is encoded as an integer, and the pairs
+        of a trigram and a label are all sorted at once. The index is
+        stored in CSR form: the sorted trigrams, and an array of offsets
+        into the positions of the labels. Otherwise, the index is a
+        `dict` mapping each trigram to an `array.array`.
+        """
+        self._lengths = array.array(str('i'), list(map(len, self._keys)))
+        if numpy is None:
+            postings = collections.defaultdict(lambda: array.array(str('i')))
+            self._sizes = array.array(str('i'))
+            for i, key in enumerate(self._keys):
+                grams = _trigrams(key)
+                self._sizes.append(len(grams))
+                for gram in grams:
+                    postings[gram].append(i)
+            self._postings = dict(postings)
+            return
+
+        # trigrams of each padded label, as integers, with their label
+        self._postings, size = None, len(self._keys)
+        chars = _chars(self._keys)
+        self._alphabet = numpy.flatnonzero(numpy.bincount(chars))
+        table = numpy.zeros(self._alphabet[-1] + 1, dtype=numpy.int64)
+        table[self._alphabet] = numpy.arange(len(self._alphabet))
+        counts = numpy.frombuffer(self._lengths, dtype=numpy.intc).astype(numpy.intp)
+        starts = numpy.cumsum(counts + 2) - counts - 2
+        owners = numpy.repeat(numpy.arange(size), counts)
+        positions = numpy.arange(len(owners)) + numpy.repeat(starts - (numpy.cumsum(counts) - counts), counts)
+        codes = _codes(table[chars], len(self._alphabet))[positions]
+
+        # unique pairs of a trigram and a label, sorted by trigram
+        if len(self._alphabet) ** 3 * size >= 2 ** 63:
+            # too many distinct characters: number the trigrams first
+            grams, codes = numpy.unique(codes, return_inverse=True)
+        else:
+            grams = None
+        pairs = numpy.unique(codes.ravel() * size + owners)
+        rows, self._indices = pairs // size, (pairs % size).astype(numpy.intc)
+        first = numpy.ones(len(rows), dtype=bool)
+        numpy.not_equal(rows[1:], rows[:-1], out=first[1:])
+        self._grams = rows[first] if grams is None else grams[rows[first]]
+        self._offsets = numpy.append(numpy.flatnonzero(first), len(rows))
+        self._sizes = array.array(str('i'), numpy.bincount(
+            self._indices, minlength=size).astype(numpy.intc).tobytes())
+
+
+def _labels(term, fields):
+    """Iterate over the fields and the labels of a term.
+    """
+    if 'name' in fields and term.name:
+        yield 0, term.name
+    if 'synonym' in fields:
+        for synonym in term.synonyms:
+            yield 1, synonym.desc
+    if 'desc' in fields and term.desc:
+        yield 2, six.text_type(term.desc)
+
+
+def _trigrams(key):
+    """Get the set of the trigrams of a case-folded label.
+    """
+    padded = ' {} '.format(key)
+    return {padded[i:i+3] for i in six.moves.range(len(padded) - 2)}
+
+
+def _chars(keys):
+    """Get the code points of case-folded labels, padded and joined.
+
+    Each label is padded with a space on both sides, so that the
+    trigram of the joined labels starting at the position of each
+    character of a label is the trigram of the padded label.
+    """
+    text = ' {} '.format('  '.join(keys)).encode('utf-32-le')
+    return numpy.frombuffer(text, dtype=numpy.dtype(str('<u4'))).astype(numpy.int64)
+
+
+def _codes(chars, base):
+    """Encode the trigrams of numbered characters as integers.
+    """
+    return (chars[:-2] * base + chars[1:-1]) * base + chars[2:]
@@ -0,0 +1,466 @@
+# coding: utf-8
+"""Information content and semantic similarity of terms.
+
+This module defines `SimilarityIndex`, which computes the information
+content of every term of an ontology once, and uses the ancestors
+stored in a `~pronto.closure.ClosureIndex` to find the most informative
+common ancestor of two terms without walking the ontology graph.
+
+The Resnik, Lin and Jiang-Conrath similarities are available for pairs
+of terms and, with `numpy`, as full matrices between sets of terms. The
+best-match average of these similarities compares sets of terms, such
+as the phenotypes of a patient and the phenotypes of a disease.
+
+Example:
+    >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+    >>> index = cl.similarity()
+    >>> index.mica('CL:0000540', 'CL:0000127')
+    'CL:0002319'
+    >>> index.resnik('CL:0000540', 'CL:0000127') == index.information_content('CL:0002319')
+    True
+    >>> index.lin('CL:0000540', 'CL:0000540')
+    1.0
+
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+from __future__ import division
+
+import array
+import collections
+import math
+import multiprocessing
+import warnings
+
+import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .utils import ProntoWarning
+
+
+class SimilarityIndex(object):
+    """The information content of the terms of an ontology.
+
+    The information content of a term *t* is ``-log(p(t))``, where
+    *p(t)* is the probability to find *t* or one of its descendants:
+
+    * without an annotation corpus, *p(t)* is the number of descendants
+      of *t* (including *t* itself) divided by the number of terms;
+    * with an annotation corpus, *p(t)* is the fraction of the annotated
+      items with *t* or one of its descendants among their terms. Terms
+      that annotate no item are given the information content of a
+      term annotating a single item.
+
+    Terms are numbered as in the closure index used to build the index.
+    The ancestors of each term, including the term itself, are stored
+    as a CSR-like pair of `array.array` (an array of offsets and an
+    array of positions), which can be sent to other processes cheaply.
+
+    Attributes:
+        closure (~pronto.closure.ClosureIndex): the closure index used
+            to find the ancestors of the terms.
+        ids (list): the identifier of each term, by position.
+        ic (numpy.ndarray or array.array): the information content of
+            each term, by position.
+
+    Note:
+        The index is not updated when the ontology is modified: create
+        a new index with `Ontology.similarity` afterwards.
+
+    """
+
+    methods = ('resnik', 'lin', 'jiang_conrath')
+
+    def __init__(self, ontology, annotations=None, relationships=None):
+        """Compute the information content of the terms of an ontology.
+
+        Arguments:
+            ontology (~pronto.Ontology): the ontology to index.
+            annotations (dict or iterable, optional): an annotation
+                corpus, as a mapping of items (for instance genes or
+                diseases) to the terms annotating them, or as an
+                iterable of collections of terms. Terms can be given
+                as `Term` instances or as identifiers. Leave to `None`
+                to compute the information content from the number of
+                descendants of each term.
+            relationships (iterable, optional): the relationships to
+                follow from a term to its ancestors (see
+                `Ontology.closure`). Leave to `None` to use all the
+                bottomup relationships.
+
+        """
+        self.closure = ontology.closure(relationships)
+        self.ids = self.closure.ids
+        self._offsets, self._indices = self._lineage()
+        if annotations is None:
+            counts, total = self._descendant_counts(), len(self.ids)
+        else:
+            counts, total = self._annotation_counts(annotations)
+        self.ic = array.array(str('d'), (
+            -math.log(max(count, 1) / total) if total else 0.0 for count in counts))
+        if numpy is not None:
+            self.ic = numpy.frombuffer(self.ic, dtype=numpy.float64)
+
+    def __repr__(self):
+        return "SimilarityIndex({} terms)".format(len(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def information_content(self, term):
+        """Get the information content of a term.
+
+        Raises:
+            KeyError: when the term is not in the index.
+
+        """
+        return float(self.ic[self.closure.position(term)])
+
+    def mica(self, term, other):
+        """Get the most informative common ancestor of two terms.
+
+        Terms are considered to be their own ancestors, so the most
+        informative common ancestor of a term and of one of its
+        descendants is the term itself.
+
+        Returns:
+            str: the identifier of the most informative common ancestor,
+            or `None` if the terms have no common ancestor.
+
+        Raises:
+            KeyError: when either term is not in the index.
+
+        """
+        position = self._mica(self.closure.position(term), self.closure.position(other))
+        return None if position is None else self.ids[position]
+
+    def resnik(self, term, other):
+        """Get the Resnik similarity of two terms.
+
+        This is the information content of their most informative
+        common ancestor, or 0 if they have no common ancestor.
+        """
+        i, j = self.closure.position(term), self.closure.position(other)
+        return self._resnik(i, j)
+
+    def lin(self, term, other):
+        """Get the Lin similarity of two terms.
+
+        This is twice the Resnik similarity of the terms, divided by the
+        sum of their information content. It is 1 for two terms with
+        no information content.
+        """
+        i, j = self.closure.position(term), self.closure.position(other)
+        total = float(self.ic[i] + self.ic[j])
+        return 2 * self._resnik(i, j) / total if total else 1.0
+
+    def jiang_conrath(self, term, other):
+        """Get the Jiang-Conrath similarity of two terms.
+
+        This is ``1 / (1 + d)``, where *d* is the Jiang-Conrath distance
+        ``IC(term) + IC(other) - 2 * IC(mica)``.
+        """
+        i, j = self.closure.position(term), self.closure.position(other)
+        return 1 / (1 + float(self.ic[i] + self.ic[j]) - 2 * self._resnik(i, j))
+
+    def similarity_matrix(self, terms, others=None, method='resnik'):
+        """Get the similarity of every term of ``terms`` to every term of ``others``.
+
+        Arguments:
+            terms (iterable): terms or term identifiers, or an integer
+                `numpy` array of positions in the index.
+            others (iterable, optional): other terms, in the same format
+                as ``terms``. Leave to `None` to compare ``terms`` with
+                themselves.
+            method (str): the similarity to compute, among ``'resnik'``,
+                ``'lin'`` and ``'jiang_conrath'``.
+
+        Returns:
+            numpy.ndarray: a matrix of shape ``(len(terms), len(others))``.
+
+        Raises:
+            KeyError: when a term is not in the index.
+            ValueError: when ``method`` is unknown.
+            ImportError: when `numpy` is not available.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> matrix = cl.similarity().similarity_matrix(
+            ...     ['CL:0000540', 'CL:0000127'], method='lin')
+            >>> matrix.shape
+            (2, 2)
+            >>> [float(x) for x in matrix.diagonal()]
+            [1.0, 1.0]
+
+        """
+        rows = self._positions(terms)
+        cols = rows if others is None else self._positions(others)
+        return self._kernel(method).matrix(rows, cols)
+
+    def best_match_average(self, terms, others, method='resnik'):
+        """Get the best-match average similarity of two sets of terms.
+
+        The best match of a term is its highest similarity to the terms
+        of the other set. The best-match average is the mean of the
+        average best match of each set.
+
+        Raises:
+            KeyError: when a term is not in the index.
+            ValueError: when either set is empty, or when ``method`` is
+                unknown.
+            ImportError: when `numpy` is not available.
+
+        """
+        return float(self.group_similarity([terms], [others], method)[0, 0])
+
+    def group_similarity(self, groups, others=None, method='resnik', processes=None):
+        """Get the best-match average similarity of every pair of groups of terms.
+
+        The similarities of the terms of a group to the terms of all the
+        other groups are computed at once, so comparing thousands of
+        patients to thousands of diseases does not require to compare
+        each pair of groups separately.
+
+        Arguments:
+            groups (iterable): collections of terms or term identifiers,
+                for instance the phenotypes of several patients.
+            others (iterable, optional): other collections of terms, for
+                instance the phenotypes of several diseases. Leave to
+                `None` to compare ``groups`` with themselves.
+            method (str): the similarity of terms to use, among
+                ``'resnik'``, ``'lin'`` and ``'jiang_conrath'``.
+            processes (int, optional): the number of processes to split
+                ``groups`` between. Leave to `None` to compute all the
+                similarities in the current process.
+
+        Returns:
+            numpy.ndarray: a matrix of shape ``(len(groups), len(others))``
+            with the best-match average similarity of each pair of groups.
+
+        Raises:
+            KeyError: when a term is not in the index.
+            ValueError: when a group is empty, or when ``method`` is
+                unknown.
+            ImportError: when `numpy` is not available.
+
+        Example:
+            >>> cl = Ontology('tests/resources/cl.ont.gz', False)
+            >>> scores = cl.similarity().group_similarity(
+            ...     [['CL:0000540', 'CL:0000127'], ['CL:0000236']])
+            >>> scores.shape
+            (2, 2)
+            >>> bool(scores[0, 0] > scores[0, 1])
+            True
+
+        """
+        kernel = self._kernel(method)
+        groups = [self._positions(group) for group in groups]
+        others = groups if others is None else [self._positions(group) for group in others]
+        if not all(len(group) for group in groups) or not all(len(group) for group in others):
+            raise ValueError("cannot compare empty groups of terms")
+        if not groups or not others:
+            return numpy.zeros((len(groups), len(others)))
+
+        columns = _Columns(others)
+        if processes is None or processes <= 1 or len(groups) < 2:
+            return kernel.best_match_average(groups, columns)
+
+        size = -(-len(groups) // (processes * 4))
+        chunks = [groups[i:i+size] for i in six.moves.range(0, len(groups), size)]
+        pool = multiprocessing.Pool(processes, _init_worker, (kernel, columns))
+        try:
+            results = pool.map(_score_chunk, chunks)
+        finally:
+            pool.terminate()
+        return numpy.concatenate(results)
+
+    def _positions(self, terms):
+        if numpy is None:
+            raise ImportError("numpy is required to compare sets of terms")
+        return self.closure.batch_positions(terms)
+
+    def _kernel(self, method):
+        if method not in self.methods:
+            raise ValueError("unknown similarity method: {!r}".format(method))
+        if numpy is None:
+            raise ImportError("numpy is required to compare sets of terms")
+        return _Kernel(self.ic, self._offsets, self._indices, method)
+
+    def _lineage(self):
+        """Get the ancestors of each term, starting with the term itself.
+        """
+        up_offsets, up_indices = self.closure._up_offsets, self.closure._up_indices
+        offsets, indices = array.array(str('l'), [0]), array.array(str('l'))
+        for i in six.moves.range(len(self.ids)):
+            indices.append(i)
+            indices.extend(up_indices[up_offsets[i]:up_offsets[i+1]])
+            offsets.append(len(indices))
+        return offsets, indices
+
+    def _ancestors(self, i):
+        return self._indices[self._offsets[i]:self._offsets[i+1]]
+
+    def _descendant_counts(self):
+        """Count the descendants of each term, including the term itself.
+        """
+        closure, offsets = self.closure, self.closure._down_offsets
+        return [offsets[i+1] - offsets[i] + (not closure._is_descendant(i, i))
+                for i in six.moves.range(len(self.ids))]
+
+    def _annotation_counts(self, annotations):
+        """Count the items annotated with each term or its descendants.
+        """
+        if isinstance(annotations, collections.Mapping):
+            annotations = six.itervalues(annotations)
+        counts, total, missing = [0] * len(self.ids), 0, set()
+        positions = self.closure._positions
+        for terms in annotations:
+            found = set()
+            for term in terms:
+                i = positions.get(getattr(term, 'id', term))
+                if i is None:
+                    missing.add(getattr(term, 'id', term))
+                else:
+                    found.update(self._ancestors(i))
+            for i in found:
+                counts[i] += 1
+            total += bool(found)
+        if missing:
+            warnings.warn("{} annotation terms are not in the ontology and were "
+                          "ignored".format(len(missing)), ProntoWarning)
+        return counts, total
+
+    def _mica(self, i, j):
+        common = set(self._ancestors(i)).intersection(self._ancestors(j))
+        return max(sorted(common), key=self.ic.__getitem__) if common else None
+
+    def _resnik(self, i, j):
+        k = self._mica(i, j)
+        return 0.0 if k is None else float(self.ic[k])
+
+
+class _Columns(object):
+    """The terms of several groups, gathered as positions in their union.
+    """
+
+    def __init__(self, groups):
+        self.terms, inverse = numpy.unique(numpy.concatenate(groups), return_inverse=True)
+        self.sizes = numpy.array([len(group) for group in groups])
+        self.bounds = numpy.zeros(len(groups), dtype=numpy.intp)
+        numpy.cumsum(self.sizes[:-1], out=self.bounds[1:])
+        self.members = inverse.ravel()
+
+
+class _Kernel(object):
+    """The arrays needed to compute a similarity with `numpy`.
+
+    Instances only hold arrays, so that they can be sent to the
+    worker processes of `SimilarityIndex.group_similarity`.
+    """
+
+    # the number of values in the temporary matrices built at once
+    _BLOCK = 1 << 22
+
+    def __init__(self, ic, offsets, indices, method):
+        self.ic = numpy.asarray(ic, dtype=numpy.float64)
+        self.offsets = numpy.frombuffer(offsets, dtype=numpy.dtype(str('l')))
+        self.indices = numpy.frombuffer(indices, dtype=numpy.dtype(str('l')))
+        self.method = method
+
+    def __getstate__(self):
+        return self.ic, self.offsets.tobytes(), self.indices.tobytes(), self.method
+
+    def __setstate__(self, state):
+        ic, offsets, indices, method = state
+        self.__init__(ic, bytearray(offsets), bytearray(indices), method)
+
+    def lineage(self, positions):
+        """Get the ancestors of several terms, with the index of their term.
+        """
+        starts = self.offsets[positions]
+        counts = self.offsets[positions + 1] - starts
+        bounds = numpy.cumsum(counts) - counts
+        ancestors = self.indices[numpy.repeat(starts - bounds, counts) + numpy.arange(counts.sum())]
+        return numpy.repeat(numpy.arange(len(positions)), counts), ancestors
+
+    def matrix(self, rows, cols):
+        """Get the similarity of the terms at positions ``rows`` and ``cols``.
+
+        The columns are first indexed by their ancestors. Then, for each
+        ancestor *a* of a row, the information content of *a* is written
+        to the columns that descend from *a*, keeping the highest value
+        written to each cell: this is the Resnik similarity.
+        """
+        owners, ancestors = self.lineage(cols)
+        order = numpy.argsort(ancestors, kind='mergesort')
+        below = owners[order]
+        first = numpy.zeros(len(self.ic) + 1, dtype=numpy.intp)
+        numpy.cumsum(numpy.bincount(ancestors, minlength=len(self.ic)), out=first[1:])
+
+        result = numpy.zeros((len(rows), len(cols)))
+        step = max(1, self._BLOCK // max(len(cols), 1))
+        for start in six.moves.range(0, len(rows), step):
+            block = result[start:start+step].reshape(-1)
+            owners, ancestors = self.lineage(rows[start:start+step])
+            starts = first[ancestors]
+            counts = first[ancestors + 1] - starts
+            bounds = numpy.cumsum(counts) - counts
+            targets = below[numpy.repeat(starts - bounds, counts) + numpy.arange(counts.sum())]
+            targets += numpy.repeat(owners * len(cols), counts)
+            numpy.maximum.at(block, targets, numpy.repeat(self.ic[ancestors], counts))
+        return self._finish(result, rows, cols)
+
+    def _finish(self, resnik, rows, cols):
+        if self.method == 'resnik':
+            return resnik
+        ic_rows, ic_cols = self.ic[rows][:, None], self.ic[cols][None, :]
+        if self.method == 'lin':
+            total = ic_rows + ic_cols
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                return numpy.where(total > 0, 2 * resnik / total, 1.0)
+        return 1 / (1 + ic_rows + ic_cols - 2 * resnik)
+
+    def best_match_average(self, groups, columns):
+        """Get the best-match average of each group against all the columns.
+
+        Groups are scored by chunks: the best match of every term of a
+        chunk in each column group, and the best match of every column
+        term in each group of the chunk, are reduced at once. The
+        similarity is symmetric, so the table is built with a row for
+        each column term, to gather and reduce contiguous rows.
+        """
+        result = numpy.empty((len(groups), len(columns.sizes)))
+        width = max(len(columns.members), len(columns.terms), 1)
+        start = 0
+        while start < len(groups):
+            end, size = start + 1, len(groups[start])
+            while end < len(groups) and (size + len(groups[end])) * width <= self._BLOCK:
+                size += len(groups[end])
+                end += 1
+            sizes = numpy.array([len(group) for group in groups[start:end]])
+            bounds = numpy.cumsum(sizes) - sizes
+
+            table = self.matrix(columns.terms, numpy.concatenate(groups[start:end]))
+            best_rows = numpy.maximum.reduceat(table[columns.members], columns.bounds, axis=0)
+            best_rows = numpy.add.reduceat(best_rows, bounds, axis=1) / sizes
+            best_cols = numpy.maximum.reduceat(table, bounds, axis=1)[columns.members]
+            best_cols = numpy.add.reduceat(best_cols, columns.bounds, axis=0) / columns.sizes[:, None]
+            result[start:end] = ((best_rows + best_cols) / 2).T
+            start = end
+        return result
+
+
+def _init_worker(kernel, columns):
+    """Store the state shared by all the chunks of a worker process.
+    """
+    global _worker_state
+    _worker_state = kernel, columns
+
+
+def _score_chunk(groups):
+    kernel, columns = _worker_state
+    return kernel.best_match_average(groups, columns)
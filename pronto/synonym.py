@@ -11,6 +11,9 @@ import collections
 from .utils import output_str
 
 
+_SCOPES = {scope: scope for scope in ('EXACT', 'BROAD', 'NARROW', 'RELATED')}
+
+
 class SynonymType(object):
     """A synonym type in an ontology.
 
@@ -75,11 +78,37 @@ class SynonymType(object):
     def __hash__(self):
         return hash((self.name, self.desc, self.scope))
 
+    def __reduce__(self):
+        return _get_synonym_type, (self.name, self.desc, self.scope)
+
+
+def _get_synonym_type(name, desc, scope=None):
+    """Get a registered synonym type, or create and register it.
+
+    This is used to unpickle `SynonymType` instances, so that unpickled
+    synonyms share the synonym types of the current process when they
+    are identical.
+    """
+    existing = SynonymType._instances.get(name)
+    if existing is not None and existing.desc == desc and existing.scope == scope:
+        return existing
+    return SynonymType(name, desc, scope)
+
 
 class Synonym(object):
     """A synonym in an ontology.
+
+    Synonyms are hashed with all their attributes, and their hash is
+    cached until one of them is set again. Cross-references are stored
+    in a `tuple`, which can be shared by several synonyms: assign a new
+    ``xref`` sequence instead of editing it in place.
+
+    Note:
+        ``xref`` used to be a `list`. Code appending to it must now
+        assign a new sequence, e.g. ``synonym.xref += ('PMID:1',)``.
     """
 
+    __slots__ = ['_desc', '_scope', '_syn_type', '_xref', '_hash']
     _RX_OBO_EXTRACTER = re.compile(r'\"(?P<desc>.*)\" *(?P<scope>EXACT|BROAD|NARROW|RELATED)? *(?P<syn_type>[^ ]+)? \[(?P<xref>.*)\]')
 
     def __init__(self, desc, scope=None, syn_type=None, xref=None):
@@ -92,8 +121,8 @@ class Synonym(object):
             syn_type (SynonymType, optional): the type of synonym if
                 relying on a synonym type defined in the *Typedef*
                 section of the ontology.
-            xref (list, optional): a list of cross-references for the
-                synonym.
+            xref (iterable, optional): the cross-references of the
+                synonym, stored as a `tuple`.
 
         """
         if isinstance(desc, six.binary_type):
@@ -122,7 +151,56 @@ class Synonym(object):
         if self.scope not in {'EXACT', 'BROAD', 'NARROW', 'RELATED', None}:
             raise ValueError("scope must be 'NARROW', 'BROAD', 'EXACT', 'RELATED' or None")
 
-        self.xref = xref or []
+        self.scope = _SCOPES.get(self.scope, self.scope)
+        self.xref = xref
+
+    @property
+    def desc(self):
+        """str: the description of the synonym.
+        """
+        return self._desc
+
+    @desc.setter
+    def desc(self, desc):
+        self._desc, self._hash = desc, None
+
+    @property
+    def xref(self):
+        """tuple: the cross-references of the synonym.
+        """
+        return self._xref
+
+    @xref.setter
+    def xref(self, xref):
+        self._xref = xref if isinstance(xref, tuple) else tuple(xref or ())
+        self._hash = None
+
+    @property
+    def scope(self):
+        """str: the scope of the synonym.
+        """
+        return self._scope
+
+    @scope.setter
+    def scope(self, scope):
+        self._scope, self._hash = scope, None
+
+    @property
+    def syn_type(self):
+        """SynonymType: the type of the synonym, if any.
+        """
+        return self._syn_type
+
+    @syn_type.setter
+    def syn_type(self, syn_type):
+        self._syn_type, self._hash = syn_type, None
+
+    def __getstate__(self):
+        return self._desc, self._scope, self._syn_type, self._xref
+
+    def __setstate__(self, state):
+        self._desc, self._scope, self._syn_type, self._xref = state
+        self._hash = None
 
     @classmethod
     def from_obo(cls, obo_header, scope='RELATED'):
@@ -161,4 +239,6 @@ class Synonym(object):
         return self.desc==other.desc and self.scope==other.scope and self.syn_type==other.syn_type and self.xref==other.xref
 
     def __hash__(self):
-        return hash((self.desc, self.scope, self.syn_type, tuple(self.xref)))
+        if self._hash is None:
+            self._hash = hash((self._desc, self._scope, self._syn_type, self._xref))
+        return self._hash
@@ -4,6 +4,8 @@
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import collections
+
 import six
 
 from .description import Description
@@ -20,9 +22,9 @@ class Term(object):
 
     """
 
-    __slots__ = ['id', 'name', 'desc', 'relations', 'other', 'synonyms',
+    __slots__ = ['id', 'name', 'desc', '_relations', 'other', 'synonyms',
                  '_children', '_parents', '_rchildren', '_rparents',
-                 '__weakref__']
+                 '_closure', '__weakref__']
 
     def __init__(self, id, name='', desc='', relations=None, synonyms=None, other=None):
         """Create a new Term.
@@ -63,6 +65,7 @@ class Term(object):
         self._rparents = {}
         self._children = None
         self._parents = None
+        self._closure = None
 
     @output_str
     def __repr__(self):
@@ -73,18 +76,7 @@ class Term(object):
         """~TermList: The direct parents of the `Term`.
         """
         if self._parents is None:
-            bottomups = tuple(Relationship.bottomup())
-
-            self._parents = TermList()
-            self._parents.extend(
-                [ other
-                    for rship,others in six.iteritems(self.relations)
-                        for other in others
-                            if rship in bottomups
-                ]
-
-            )
-
+            self._parents = TermList(_direct(self, 'bottomup'))
         return self._parents
 
     @property
@@ -92,15 +84,7 @@ class Term(object):
         """~TermList: The direct children of the `Term`.
         """
         if self._children is None:
-            topdowns = tuple(Relationship.topdown())
-            self._children = TermList()
-            self._children.extend(
-                [ other
-                    for rship,others in six.iteritems(self.relations)
-                        for other in others
-                            if rship in topdowns
-                ]
-            )
+            self._children = TermList(_direct(self, 'topdown'))
         return self._children
 
     @property
@@ -127,6 +111,7 @@ class Term(object):
         #             "relationship","created_by","creation_date","is_obsolete",
         #             "replaced_by", "consider"]
 
+        relations = dict(_iter_relations(self.relations))
         stanza_list = ["[Term]"]
 
         # id
@@ -155,18 +140,18 @@ class Term(object):
         add_tags(stanza_list, ['xref'])
 
         # is_a
-        if Relationship('is_a') in self.relations:
-            for companion in self.relations[Relationship('is_a')]:
+        if Relationship('is_a') in relations:
+            for companion in relations[Relationship('is_a')]:
                 stanza_list.append("is_a: {} ! {}".format(companion.id, companion.name))
 
         add_tags(stanza_list, ['intersection_of', 'union_of', 'disjoint_from'])
 
-        for relation in self.relations:
+        for relation in relations:
             if relation.direction=="bottomup" and relation is not Relationship('is_a'):
                 stanza_list.extend(
                     "relationship: {} {} ! {}".format(
                         relation.obo_name, companion.id, companion.name
-                    ) for companion in self.relations[relation]
+                    ) for companion in relations[relation]
                 )
 
         add_tags(stanza_list, ['is_obsolete', 'replaced_by', 'consider',
@@ -183,7 +168,8 @@ class Term(object):
             'name': self.name,
             'other': self.other,
             'desc': self.desc,
-            'relations': {k.obo_name:v.id for k,v in six.iteritems(self.relations)}
+            'relations': {k.obo_name:[getattr(x, 'id', x) for x in v]
+                            for k,v in _iter_relations(self.relations)}
          }
 
     def __getstate__(self):
@@ -192,16 +178,32 @@ class Term(object):
             self.name,
             tuple((k,v) for k,v in six.iteritems(self.other)),
             self.desc,
-            tuple((k.obo_name,v.id) for k,v in six.iteritems(self.relations)),
+            tuple((k,[getattr(x, 'id', x) for x in v]) for k,v in _iter_relations(self.relations)),
             frozenset(self.synonyms),
         )
 
+    @property
+    def relations(self):
+        """dict: the other terms the term is in a relationship with.
+
+        Replacing the `Relations` view of a term marks the graph it
+        reads from as stale, like modifying it does.
+        """
+        return self._relations
+
+    @relations.setter
+    def relations(self, relations):
+        current = getattr(self, '_relations', None)
+        if isinstance(current, Relations) and current is not relations:
+            current._replaced()
+        self._relations = relations
+
     def __setstate__(self, state):
         self.id = state[0]
         self.name = state[1]
         self.other = {k:v for (k,v) in state[2]}
         self.desc = state[3]
-        self.relations = {Relationship(k):v for k,v in state[4]}
+        self.relations = dict(state[4])
         self.synonyms = set(state[5])
         self._empty_cache()
 
@@ -210,8 +212,9 @@ class Term(object):
         """
         self._children, self._parents = None, None
         self._rchildren, self._rparents = {}, {}
+        self._closure = None
 
-    def rchildren(self, level=-1, intermediate=True):
+    def rchildren(self, level=-1, intermediate=True, relationships=None):
         """Create a recursive list of children.
 
         Parameters:
@@ -219,33 +222,37 @@ class Term(object):
                 (default is -1, to get children to the utter depths)
             intermediate (bool): Also include the intermediate children
                 (default is True)
+            relationships (iterable, optional): The relationships to follow
+                (see `Term.iter_rchildren`). Leave to `None` to follow all
+                the topdown relationships.
 
         Returns:
             :obj:`pronto.TermList`:
             The recursive children of the Term following the parameters
 
+        Note:
+            When the closure index of the ontology was built (see
+            `Ontology.closure`), the children of the term are gathered
+            from the memoized children of its own children, in the same
+            order as without the index.
+
         """
+        key = _cache_key(level, intermediate, relationships)
         try:
-            return self._rchildren[(level, intermediate)]
+            return self._rchildren[key]
 
         except KeyError:
 
-            rchildren = []
-
-            if self.children and level:
-
-                if intermediate or level==1:
-                    rchildren.extend(self.children)
-
-                for child in self.children:
-                    rchildren.extend(child.rchildren(level=level-1,
-                                                     intermediate=intermediate))
-
-            rchildren = TermList(unique_everseen(rchildren))
-            self._rchildren[(level, intermediate)] = rchildren
+            rchildren = None
+            if level < 0 and intermediate and relationships is None \
+                    and self._closure is not None:
+                rchildren = self._closure._ordered_terms(self, 'topdown')
+            if rchildren is None:
+                rchildren = TermList(self.iter_rchildren(level, intermediate, relationships))
+            self._rchildren[key] = rchildren
             return rchildren
 
-    def rparents(self, level=-1, intermediate=True):
+    def rparents(self, level=-1, intermediate=True, relationships=None):
         """Create a recursive list of children.
 
         Note that the :param:`intermediate` can be used to include every
@@ -256,31 +263,325 @@ class Term(object):
                 (default is -1, to get parents to the utter depths)
             intermediate (bool): Also include the intermediate parents
                 (default is True)
+            relationships (iterable, optional): The relationships to follow
+                (see `Term.iter_rparents`). Leave to `None` to follow all
+                the bottomup relationships.
 
         Returns:
             :obj:`pronto.TermList`:
             The recursive children of the Term following the parameters
 
+        Note:
+            When the closure index of the ontology was built (see
+            `Ontology.closure`), the parents of the term are gathered
+            from the memoized parents of its own parents, in the same
+            order as without the index.
+
         """
+        key = _cache_key(level, intermediate, relationships)
         try:
-            return self._rparents[(level, intermediate)]
+            return self._rparents[key]
 
         except KeyError:
 
-            rparents = []
+            rparents = None
+            if level < 0 and intermediate and relationships is None \
+                    and self._closure is not None:
+                rparents = self._closure._ordered_terms(self, 'bottomup')
+            if rparents is None:
+                rparents = TermList(self.iter_rparents(level, intermediate, relationships))
+            self._rparents[key] = rparents
+            return rparents
+
+    def iter_rchildren(self, level=-1, intermediate=True, relationships=None):
+        """Iterate over the recursive children of the term.
+
+        Children are yielded as they are found, in the same order as
+        `Term.rchildren`, without building intermediate lists. Each
+        term is only explored once, so cycles in the ontology graph
+        are supported (a term in a cycle is one of its own children).
+
+        Parameters:
+            level (int): The depth level to continue fetching children from
+                (default is -1, to get children to the utter depths)
+            intermediate (bool): Also include the intermediate children
+                (default is True)
+            relationships (iterable, optional): The relationships to
+                follow, as `Relationship` instances or names. Bottomup
+                relationships (such as ``is_a``) are followed through
+                their topdown complement (such as ``can_be``). Leave to
+                `None` to follow all the topdown relationships.
+
+        Yields:
+            `Term`: the recursive children of the term.
+
+        Example:
+            >>> ms = Ontology('tests/resources/psi-ms.obo', False)
+            >>> for term in ms['MS:1000031'].iter_rchildren(relationships=['is_a']):
+            ...     if term.id == 'MS:1000121':
+            ...         print(term)
+            <MS:1000121: SCIEX instrument model>
 
-            if self.parents and level:
+        """
+        if level < 0 and intermediate and relationships is None:
+            walk = _graph_walk(self, 'topdown')
+            if walk is not None:
+                return walk
+        return _walk([self], _neighbours('topdown', relationships), level, intermediate)
 
-                if intermediate or level==1:
-                    rparents.extend(self.parents)
+    def iter_rparents(self, level=-1, intermediate=True, relationships=None):
+        """Iterate over the recursive parents of the term.
 
-                for parent in self.parents:
-                    rparents.extend(parent.rparents(level=level-1,
-                                                     intermediate=intermediate))
+        Parents are yielded as they are found, in the same order as
+        `Term.rparents`, without building intermediate lists. Each
+        term is only explored once, so cycles in the ontology graph
+        are supported (a term in a cycle is one of its own parents).
 
-            rparents = TermList(unique_everseen(rparents))
-            self._rparents[(level, intermediate)] = rparents
-            return rparents
+        Parameters:
+            level (int): The depth level to continue fetching parents from
+                (default is -1, to get parents to the utter depths)
+            intermediate (bool): Also include the intermediate parents
+                (default is True)
+            relationships (iterable, optional): The relationships to
+                follow, as `Relationship` instances or names. Topdown
+                relationships (such as ``can_be``) are followed through
+                their bottomup complement (such as ``is_a``). Leave to
+                `None` to follow all the bottomup relationships.
+
+        Yields:
+            `Term`: the recursive parents of the term.
+
+        """
+        if level < 0 and intermediate and relationships is None:
+            walk = _graph_walk(self, 'bottomup')
+            if walk is not None:
+                return walk
+        return _walk([self], _neighbours('bottomup', relationships), level, intermediate)
+
+
+class Relations(collections.MutableMapping):
+    """The relations of a `Term`, read from the graph of its ontology.
+
+    This mapping behaves like the `dict` of `TermList` it replaces, but
+    only creates the `TermList` of a relation when it is accessed. The
+    list is then kept by the mapping, and once it is modified (or when
+    relations are set or deleted in the mapping), the changed relations
+    take precedence over the `~pronto.graph.TermGraph`, which is marked
+    as stale. Reading the relations does not mark the graph as stale.
+    """
+
+    __slots__ = ('_graph', '_position', '_changed', '_read')
+
+    def __init__(self, graph, position):
+        self._graph = graph
+        self._position = position
+        self._changed = None
+        self._read = None
+
+    def __repr__(self):
+        return repr(dict(self._iter()))
+
+    def __getitem__(self, relation):
+        if self._changed is not None and relation in self._changed:
+            others = self._changed[relation]
+        elif self._read is not None and relation in self._read:
+            others = self._read[relation]
+        else:
+            others = self._graph.get(self._position, relation)
+            if others is not None:
+                if self._read is None:
+                    self._read = {}
+                others = self._read[relation] = _RelationList(others, self, relation)
+        if others is None:
+            raise KeyError(relation)
+        return others
+
+    def __setitem__(self, relation, others):
+        self._change(relation, others)
+
+    def __delitem__(self, relation):
+        if relation not in self:
+            raise KeyError(relation)
+        self._change(relation, None)
+
+    def __contains__(self, relation):
+        if self._changed is not None and relation in self._changed:
+            return self._changed[relation] is not None
+        return relation in self._graph.kinds(self._position)
+
+    def __iter__(self):
+        return (relation for relation, _ in self._iter())
+
+    def __len__(self):
+        return sum(1 for _ in self._iter())
+
+    def _change(self, relation, others):
+        if self._read is not None and relation in self._read:
+            self._read.pop(relation)._relations = None
+        if self._changed is None:
+            self._changed = {}
+            self._graph._stale = True
+        self._changed[relation] = others
+        return others
+
+    def _replaced(self):
+        """Mark the graph as stale once the mapping is replaced in its term.
+        """
+        if self._read is not None:
+            for others in six.itervalues(self._read):
+                others._relations = None
+            self._read = None
+        self._graph._stale = True
+
+    def _iter(self):
+        """Iterate over the relations, without creating any `TermList`.
+        """
+        changed = self._changed
+        if changed is None:
+            for item in self._graph.items(self._position):
+                yield item
+            return
+        kinds = self._graph.kinds(self._position)
+        for relation, others in self._graph.items(self._position):
+            others = changed.get(relation, others)
+            if others is not None:
+                yield relation, others
+        for relation, others in six.iteritems(changed):
+            if others is not None and relation not in kinds:
+                yield relation, others
+
+
+def _iter_relations(relations):
+    """Iterate over the items of `Term.relations`, without creating `TermList`.
+    """
+    if isinstance(relations, Relations):
+        return relations._iter()
+    return six.iteritems(relations)
+
+
+def _graph_walk(term, direction):
+    """Get the recursive parents or children of a term from its graph, if possible.
+    """
+    relations = term.relations
+    if isinstance(relations, Relations):
+        return relations._graph.walk(relations._position, direction)
+    return None
+
+
+def _direct(term, direction):
+    """Get the parents (``'bottomup'``) or the children (``'topdown'``) of a term.
+    """
+    relations = term.relations
+    if isinstance(relations, Relations) and relations._changed is None:
+        if direction == 'bottomup':
+            return relations._graph.parents(relations._position)
+        return relations._graph.children(relations._position)
+    followed = set(Relationship.bottomup() if direction == 'bottomup' else Relationship.topdown())
+    found = TermList()
+    found.extend(other for relation, others in _iter_relations(relations)
+                    if relation in followed for other in others)
+    return found
+
+
+def _cache_key(level, intermediate, relationships):
+    """Get the key of the memoized results of `Term.rparents` or `Term.rchildren`.
+    """
+    if relationships is None:
+        return (level, intermediate)
+    return (level, intermediate, tuple(getattr(r, 'obo_name', r) for r in relationships))
+
+
+def _neighbours(direction, relationships=None):
+    """Get a function returning the parents or the children of a term.
+
+    Arguments:
+        direction (str): either ``'bottomup'`` for parents or
+            ``'topdown'`` for children.
+        relationships (iterable, optional): the relationships to follow,
+            or `None` to use `Term.parents` or `Term.children`.
+
+    """
+    if relationships is None:
+        return lambda term: _direct(term, direction)
+
+    followed = set()
+    for relation in relationships:
+        if not isinstance(relation, Relationship):
+            relation = Relationship(relation)
+        if relation.direction not in (direction, '') and relation.complementary:
+            relation = relation.complement()
+        followed.add(relation)
+
+    def neighbours(term):
+        return list(unique_everseen(
+            other
+                for relation, others in _iter_relations(term.relations)
+                    if relation in followed
+                        for other in others
+        ))
+
+    return neighbours
+
+
+def _walk(starts, neighbours, level=-1, intermediate=True):
+    """Iterate over the terms reachable from ``starts``.
+
+    The terms are explored depth-first with an explicit stack, and the
+    neighbours of a term are yielded before the terms reachable from
+    them, which gives the order of the former recursive implementation
+    of `Term.rparents`. A term is only explored again if it is found
+    with more levels left to explore (or, when ``intermediate`` is
+    `False`, with a different number of levels left), so the traversal
+    always ends, even when the graph contains cycles.
+
+    Arguments:
+        starts (iterable): the terms to start from.
+        neighbours (callable): a function returning the list of terms
+            next to a term.
+        level (int): the maximum depth, or a negative number for no limit.
+        intermediate (bool): if `False`, only yield the terms found at
+            exactly ``level`` steps from a start term.
+
+    """
+    if not level or (level < 0 and not intermediate):
+        return
+
+    emitted, explored = set(), {}
+
+    def explore(term, remaining):
+        """Check if a term must be explored, and record it as explored.
+        """
+        if level < 0:
+            key, done = term, term in explored
+        elif intermediate:
+            key, done = term, explored.get(term, 0) >= remaining
+        else:
+            key, done = (term, remaining), (term, remaining) in explored
+        if not done:
+            explored[key] = remaining
+        return not done
+
+    for start in starts:
+        if not explore(start, level):
+            continue
+        term, remaining, stack = start, level, []
+        while True:
+            others = neighbours(term)
+            if intermediate or remaining == 1:
+                for other in others:
+                    if other not in emitted:
+                        emitted.add(other)
+                        yield other
+            if remaining != 1:
+                stack.append((iter(others), remaining - 1))
+            while stack:
+                others, remaining = stack[-1]
+                term = next((x for x in others if explore(x, remaining)), None)
+                if term is not None:
+                    break
+                stack.pop()
+            else:
+                break
 
 
 class TermList(list):
@@ -342,15 +643,25 @@ class TermList(list):
         for element in sequence:
             self.append(element)
 
-    def rparents(self, level=-1, intermediate=True):
-        return TermList(unique_everseen(
-            y for x in self for y in x.rparents(level, intermediate)
-        ))
+    def rparents(self, level=-1, intermediate=True, relationships=None):
+        """~TermList: the recursive parents of all the terms in the list.
 
-    def rchildren(self, level=-1, intermediate=True):
-        return TermList(unique_everseen(
-            y for x in self for y in x.rchildren(level, intermediate)
-        ))
+        See Also:
+            `Term.iter_rparents` for a description of the arguments.
+
+        """
+        return TermList(_walk(self, _neighbours('bottomup', relationships),
+                              level, intermediate))
+
+    def rchildren(self, level=-1, intermediate=True, relationships=None):
+        """~TermList: the recursive children of all the terms in the list.
+
+        See Also:
+            `Term.iter_rchildren` for a description of the arguments.
+
+        """
+        return TermList(_walk(self, _neighbours('topdown', relationships),
+                              level, intermediate))
 
     @property
     def children(self):
@@ -426,3 +737,42 @@ class TermList(list):
             _id = term
         return _id in self._contents
         #return any((t.id==_id if isinstance(t, Term) else t==_id for t in self))
+
+
+class _RelationList(TermList):
+    """The `TermList` of a relation read from a `Relations` mapping.
+
+    The list records itself as a change of the mapping the first time
+    it is modified in place.
+    """
+
+    def __init__(self, elements, relations, relation):
+        super(_RelationList, self).__init__(elements)
+        self._relations = relations
+        self._relation = relation
+
+    def _modified(self):
+        if self._relations is not None:
+            relations, self._relations = self._relations, None
+            relations._change(self._relation, self)
+
+    def __reduce__(self):
+        return TermList, (list(self),)
+
+
+def _modifying(method):
+    """Wrap a method of `list` to call `_RelationList._modified` first.
+    """
+    def modifying(self, *args, **kwargs):
+        self._modified()
+        return method(self, *args, **kwargs)
+    modifying.__name__ = method.__name__
+    return modifying
+
+
+for _name in ('append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort',
+              'reverse', '__setitem__', '__delitem__', '__iadd__', '__imul__',
+              '__setslice__', '__delslice__'):
+    if hasattr(TermList, _name):
+        setattr(_RelationList, _name, _modifying(getattr(TermList, _name)))
+del _name
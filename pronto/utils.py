@@ -7,9 +7,12 @@ of the pronto library, as well as the definition of `ProntoWarning`.
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import os
 import six
 import functools
+import tempfile
 import warnings
+import contextlib
 
 
 class ProntoWarning(Warning):
@@ -61,3 +64,22 @@ def nowarnings(func):
             warnings.simplefilter('ignore')
             return func(*args, **kwargs)
     return new_func
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Open a binary file that atomically replaces ``path`` once closed.
+
+    The data is written to a temporary file in the same directory, which
+    is removed if an exception is raised before the end of the context.
+    """
+    fd, tmp = tempfile.mkstemp(prefix='.', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            yield handle
+        if os.path.exists(path):    # `os.rename` does not overwrite on Windows
+            os.remove(path)
+        os.rename(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
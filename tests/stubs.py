@@ -1,27 +1,69 @@
 # coding: utf-8
 import threading
+import time
 import os
 
 try:
     from http.server import HTTPServer
     from http.server import SimpleHTTPRequestHandler
+    from socketserver import ThreadingMixIn
 except ImportError:
     from BaseHTTPServer import HTTPServer
     from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
 
 class StubHTTPServer(threading.Thread):
     daemon = True
 
+    # seconds to wait before answering each request
+    delay = 0
+    # send an ETag header and honor If-None-Match
+    etags = False
+    # (path, status, client port) of each answered request
+    requests = []
+
+    class _Server(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
     class _RequestHandler(SimpleHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        _etag = None
         def translate_path(self, path):
             return self._datadir + path
         def log_message(self, format, *args):
             pass
+        def log_request(self, code='-', size='-'):
+            StubHTTPServer.requests.append((self.path, int(code), self.client_address[1]))
+        def parse_request(self):
+            if StubHTTPServer.delay:
+                time.sleep(StubHTTPServer.delay)
+            return SimpleHTTPRequestHandler.parse_request(self)
+        def send_head(self):
+            if self.path.startswith('/redirect/'):
+                self.send_response(302)
+                self.send_header('Location', self.path[len('/redirect'):])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+            path = self.translate_path(self.path)
+            if StubHTTPServer.etags and os.path.isfile(path):
+                stat = os.stat(path)
+                self._etag = '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+                if self.headers.get('If-None-Match') == self._etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return None
+            return SimpleHTTPRequestHandler.send_head(self)
+        def end_headers(self):
+            if self._etag is not None:
+                self.send_header('ETag', self._etag)
+                self._etag = None
+            SimpleHTTPRequestHandler.end_headers(self)
 
     def __init__(self, datadir):
         super(StubHTTPServer, self).__init__()
         self._RequestHandler._datadir = datadir
-        self.server = HTTPServer(("localhost", 8080), self._RequestHandler)
+        self.server = self._Server(("localhost", 8080), self._RequestHandler)
 
     def run(self):
         self.server.serve_forever()
@@ -0,0 +1,165 @@
+# coding: utf-8
+from __future__ import absolute_import
+from __future__ import division
+
+### DEPS
+import fractions
+import gzip
+import io
+import math
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import warnings
+
+from . import utils
+import pronto
+import pronto.annotation
+
+
+def hypergeometric_sf(k, N, K, n):
+    """Compute the hypergeometric tail exactly, with rationals.
+    """
+    def comb(a, b):
+        if b < 0 or b > a:
+            return 0
+        return math.factorial(a) // (math.factorial(b) * math.factorial(a - b))
+    tail = sum(comb(K, i) * comb(N - K, n - i) for i in range(k, min(K, n) + 1))
+    return float(fractions.Fraction(tail, comb(N, n)))
+
+
+### TESTS
+class TestProntoAnnotationIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.simplefilter('ignore')
+        cls.ms = pronto.Ontology(os.path.join(utils.DATADIR, "psi-ms.obo"), False)
+        rng = random.Random(0)
+        ids = list(cls.ms.terms)
+        cls.annotations = [("gene{}".format(rng.randrange(300)), rng.choice(ids))
+                           for _ in range(2000)]
+
+    @classmethod
+    def tearDownClass(cls):
+        warnings.simplefilter(warnings.defaultaction)
+
+    def naive(self, annotations, relationships=None):
+        found = {}
+        for item, term in annotations:
+            for other in [self.ms[term]] + list(self.ms[term].rparents(relationships=relationships)):
+                found.setdefault(other.id, set()).add(item)
+        return found
+
+    def check_propagation(self, index, expected):
+        for term in self.ms:
+            self.assertEqual(sorted(index.items(term)), sorted(expected.get(term.id, ())))
+            self.assertEqual(index.count(term.id), len(expected.get(term.id, ())))
+        for item in index.names:
+            self.assertEqual(
+                sorted(index.terms(item)),
+                sorted(id for id, items in expected.items() if item in items))
+
+    def test_propagation(self):
+        self.check_propagation(self.ms.annotate(iter(self.annotations)),
+                               self.naive(self.annotations))
+
+    def test_propagation_relationships(self):
+        is_a = [pronto.Relationship('is_a')]
+        self.check_propagation(self.ms.annotate(self.annotations, ['is_a']),
+                               self.naive(self.annotations, is_a))
+
+    def test_propagation_blocks(self):
+        with utils.mock.patch.object(pronto.annotation.AnnotationIndex, '_BLOCK', 7):
+            index = self.ms.annotate(self.annotations)
+        self.check_propagation(index, self.naive(self.annotations))
+
+    @unittest.skipIf(pronto.annotation.numpy is None, "numpy unavailable")
+    def test_propagation_wide(self):
+        numpy = pronto.annotation.numpy
+        index = self.ms.annotate(self.annotations)
+        index.names.extend("extra{}".format(i) for i in range(2**20))
+        items = numpy.array([0, 1, 2**20], dtype=numpy.int32)
+        terms = numpy.array([len(index.ids) - 1] * 3, dtype=numpy.int32)
+        offsets, found = index._propagate(items, terms)
+        self.assertEqual(sorted(found[offsets[-2]:offsets[-1]]), [0, 1, 2**20])
+
+    def test_propagation_without_numpy(self):
+        with utils.mock.patch.object(pronto.annotation, 'numpy', None):
+            index = self.ms.annotate(self.annotations)
+            self.check_propagation(index, self.naive(self.annotations))
+            self.assertRaises(ImportError, index.enrichment, [['gene1']])
+
+    def test_mapping(self):
+        mapping = {}
+        for item, term in self.annotations:
+            mapping.setdefault(item, []).append(self.ms[term])
+        index = self.ms.annotate(mapping)
+        self.assertEqual(index.counts.tolist(), self.ms.annotate(self.annotations).counts.tolist())
+
+    def test_missing_terms(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            index = self.ms.annotate([('a', 'MS:1000031'), ('b', 'XX:0000000')])
+        self.assertTrue(any(issubclass(x.category, pronto.utils.ProntoWarning) for x in w))
+        self.assertIn('a', index)
+        self.assertNotIn('b', index)
+
+    @unittest.skipIf(pronto.annotation.numpy is None, "numpy unavailable")
+    def test_enrichment(self):
+        index = self.ms.annotate(self.annotations)
+        expected = self.naive(self.annotations)
+        names = sorted(index.names)
+        studies = [names[:20], names[10:60:3] + ['unknown'], names[::7]]
+        counts, pvalues = index.enrichment(studies)
+        self.assertEqual(counts.shape, (len(studies), len(index.ids)))
+        for s, study in enumerate(studies):
+            study = set(study) & set(names)
+            for i, id in enumerate(index.ids):
+                items = expected.get(id, set())
+                k = len(items & study)
+                self.assertEqual(counts[s, i], k)
+                self.assertAlmostEqual(pvalues[s, i], hypergeometric_sf(
+                    k, len(names), len(items), len(study)), places=12)
+
+    @unittest.skipIf(pronto.annotation.numpy is None, "numpy unavailable")
+    def test_enrichment_population(self):
+        index = self.ms.annotate(self.annotations)
+        expected = self.naive(self.annotations)
+        population = set(sorted(index.names)[:150])
+        study = sorted(population)[:30] + sorted(index.names)[-5:]
+        counts, pvalues = index.enrichment([study], population)
+        for i, id in enumerate(index.ids):
+            items = expected.get(id, set()) & population
+            k = len(items.intersection(study))
+            self.assertEqual(counts[0, i], k)
+            self.assertAlmostEqual(pvalues[0, i], hypergeometric_sf(
+                k, len(population), len(items), 30), places=12)
+
+
+class TestProntoReadTable(unittest.TestCase):
+
+    TABLE = u"!gaf-version: 2.1\n" \
+            u"UniProtKB\tP1\tabc\t\tMS:1000031\n" \
+            u"\n" \
+            u"UniProtKB\tP2\tdef\t\tMS:1000121\n" \
+            u"UniProtKB\tP3\n"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_handle(self):
+        pairs = list(pronto.annotation.read_table(io.StringIO(self.TABLE), 1, 4))
+        self.assertEqual(pairs, [('P1', 'MS:1000031'), ('P2', 'MS:1000121')])
+
+    def test_gzip(self):
+        path = os.path.join(self.tmpdir, "table.gaf.gz")
+        with gzip.open(path, 'wb') as f:
+            f.write(self.TABLE.encode('utf-8'))
+        pairs = list(pronto.annotation.read_table(path, 1, 4))
+        self.assertEqual(pairs, [('P1', 'MS:1000031'), ('P2', 'MS:1000121')])
@@ -0,0 +1,119 @@
+# coding: utf-8
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+### DEPS
+import io
+import os
+import pickle
+import random
+import unittest
+import warnings
+
+from . import utils
+import pronto
+import pronto.annotator
+from pronto.annotator import Annotator, Match
+
+
+def scan(terms, text, casefold=True):
+    """Find the labels of terms in a text by searching each label.
+    """
+    fold = pronto.lookup._casefold if casefold else (lambda x: x)
+    words = [(m.start(), m.end(), fold(m.group())) for m in Annotator._RX_WORD.finditer(text)]
+    starts = {}
+    for i, word in enumerate(words):
+        starts.setdefault(word[2], []).append(i)
+    found = set()
+    for term in terms:
+        labels = [term.name] if term.name else []
+        labels.extend(s.desc for s in term.synonyms)
+        for label in labels:
+            pattern = [fold(w) for w in Annotator._RX_WORD.findall(label)]
+            if not pattern:
+                continue
+            for i in starts.get(pattern[0], ()):
+                if i + len(pattern) <= len(words) and all(words[i+j][2] == w for j, w in enumerate(pattern)):
+                    found.add(Match(words[i][0], words[i+len(pattern)-1][1], term.id))
+    return sorted(found)
+
+
+### TESTS
+class TestProntoAnnotator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.simplefilter('ignore')
+        cls.hpo = pronto.Ontology(os.path.join(utils.DATADIR, "hpo.obo.gz"), False)
+        cls.terms = [
+            pronto.Term('TST:001', 'arm', synonyms={pronto.Synonym('upper limb', 'EXACT')}),
+            pronto.Term('TST:002', 'left arm', synonyms={pronto.Synonym('Arm', 'RELATED')}),
+            pronto.Term('TST:003', 'type 2 diabetes', synonyms={pronto.Synonym('T2D', 'BROAD')}),
+            pronto.Term('TST:004', 'diabetes'),
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        warnings.simplefilter(warnings.defaultaction)
+
+    def test_word_boundaries(self):
+        annotator = Annotator(self.terms)
+        self.assertEqual(annotator.annotate('harm, armour'), [])
+        self.assertEqual(annotator.annotate('type 21 diabetes'), [Match(8, 16, 'TST:004')])
+        self.assertEqual(annotator.annotate('the left arm.'), [
+            Match(4, 12, 'TST:002'), Match(9, 12, 'TST:001'), Match(9, 12, 'TST:002')])
+
+    def test_scopes(self):
+        text = 'Arm and upper limb, T2D'
+        self.assertEqual([m.id for m in Annotator(self.terms).annotate(text)],
+                         ['TST:001', 'TST:002', 'TST:001', 'TST:003'])
+        self.assertEqual([m.id for m in Annotator(self.terms, ['EXACT']).annotate(text)],
+                         ['TST:001', 'TST:001'])
+        self.assertEqual([m.id for m in Annotator(self.terms, [], names=False).annotate(text)], [])
+
+    def test_casefold(self):
+        annotator = Annotator(self.terms, casefold=False)
+        self.assertEqual(annotator.annotate('Arm'), [Match(0, 3, 'TST:002')])
+        self.assertEqual(annotator.annotate('TYPE 2 DIABETES'), [])
+        # case folding lengthens the German sharp s
+        annotator = Annotator(self.terms)
+        self.assertEqual(annotator.annotate('Straße: TYPE 2 DIABETES'), [
+            Match(8, 23, 'TST:003'), Match(15, 23, 'TST:004')])
+
+    def test_longest(self):
+        annotator = Annotator(self.terms)
+        self.assertEqual(annotator.annotate('left arm, type 2 diabetes', longest=True), [
+            Match(0, 8, 'TST:002'), Match(10, 25, 'TST:003')])
+        self.assertEqual(annotator.annotate('arm', longest=True), [
+            Match(0, 3, 'TST:001'), Match(0, 3, 'TST:002')])
+
+    def test_obo_hpo(self):
+        rng = random.Random(0)
+        terms = list(self.hpo)
+        labels = [t.name for t in rng.sample(terms, 300)]
+        labels += [s.desc for t in rng.sample(terms, 300) for s in t.synonyms]
+        rng.shuffle(labels)
+        text = ' and '.join(labels)
+        annotator = self.hpo.annotator()
+        self.assertEqual(annotator.annotate(text), scan(terms, text))
+
+    def test_annotate_many(self):
+        annotator = self.hpo.annotator(['EXACT'])
+        texts = [t.name + ', with ' + s.desc for t in list(self.hpo)[:2000:20] for s in t.synonyms]
+        expected = [annotator.annotate(text) for text in texts]
+        self.assertEqual(list(annotator.annotate_many(texts)), expected)
+        self.assertEqual(list(annotator.annotate_many(iter(texts), processes=2, chunksize=4)), expected)
+
+    def test_annotate_lines(self):
+        annotator = Annotator(self.terms)
+        text = 'left arm\nT2D, arm\n\ndiabetes\n'
+        expected = [m for m in annotator.annotate(text)]
+        for processes in (None, 2):
+            handle = io.StringIO(text)
+            self.assertEqual(list(annotator.annotate_lines(handle, processes=processes)), expected)
+
+    def test_pickle(self):
+        annotator = Annotator(self.terms)
+        other = pickle.loads(pickle.dumps(annotator, pickle.HIGHEST_PROTOCOL))
+        text = 'left arm, type 2 diabetes'
+        self.assertEqual(other.annotate(text), annotator.annotate(text))
@@ -0,0 +1,209 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+### DEPS
+import os
+import shutil
+import tempfile
+import textwrap
+import time
+import unittest
+import warnings
+
+import six
+
+from . import utils
+import pronto
+import pronto.cache
+from pronto.parser import OboParser
+
+
+### TESTS
+class TestProntoOntologyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = pronto.cache.OntologyCache(os.path.join(self.tmpdir, "cache"))
+        self.path = os.path.join(self.tmpdir, "cmo.obo")
+        shutil.copy(os.path.join(utils.DATADIR, "cmo.obo"), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as f:
+            f.write(textwrap.dedent(text).lstrip())
+        return path
+
+    def touch(self, path, delta=10):
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + delta))
+
+    def assert_cached(self, *args, **kwargs):
+        kwargs.setdefault('cache', self.cache)
+        with utils.mock.patch.object(OboParser, 'parse') as parse:
+            ont = pronto.Ontology(*args, **kwargs)
+            self.assertFalse(parse.called)
+        return ont
+
+    def test_cache_hit(self):
+        parsed = pronto.Ontology(self.path, cache=self.cache)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+        cached = self.assert_cached(self.path)
+        self.assertEqual(cached.path, self.path)
+        self.assertEqual(repr(cached.meta), repr(parsed.meta))
+        self.assertEqual(list(cached.terms), list(parsed.terms))
+        for term in parsed:
+            other = cached[term.id]
+            self.assertEqual(term.obo, other.obo)
+            self.assertEqual(term.children.id, other.children.id)
+            for relation, others in six.iteritems(other.relations):
+                for x in others:
+                    self.assertIs(x, cached.terms.get(x.id, x))
+
+    def test_cache_options(self):
+        pronto.Ontology(self.path, cache=self.cache)
+        pronto.Ontology(self.path, False, cache=self.cache)
+        pronto.Ontology(self.path, parser='OboParser', cache=self.cache)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 3)
+
+    def test_cache_outdated(self):
+        pronto.Ontology(self.path, cache=self.cache)
+        with open(self.path, 'a') as handle:
+            handle.write("\n[Term]\nid: CMO:9999999\nname: new term\nis_a: CMO:0000000\n")
+        self.touch(self.path)
+        ont = pronto.Ontology(self.path, cache=self.cache)
+        self.assertIn('CMO:9999999', ont)
+        self.assertIn('CMO:9999999', self.assert_cached(self.path))
+
+    def test_check_hash(self):
+        pronto.Ontology(self.path, cache=self.cache)
+        self.touch(self.path)
+        with utils.mock.patch.object(OboParser, 'parse', wraps=OboParser.parse) as parse:
+            pronto.Ontology(self.path, cache=self.cache)
+            self.assertTrue(parse.called)
+
+        self.cache.check_hash = True
+        pronto.Ontology(self.path, cache=self.cache)
+        self.touch(self.path)
+        self.assert_cached(self.path)
+
+    def test_imports_unchanged(self):
+        dep = self.write("dep.obo", """
+            [Term]
+            id: TST:001
+            name: imported term
+        """)
+        main = self.write("main.obo", """
+            import: dep.obo
+
+            [Term]
+            id: TST:002
+            name: main term
+            is_a: TST:001
+        """)
+        pronto.Ontology(main, cache=self.cache)
+        ont = self.assert_cached(main)
+        self.assertEqual(ont['TST:002'].parents.id, ['TST:001'])
+        self.assertEqual(ont['TST:001'].name, 'imported term')
+
+        with open(dep, 'a') as f:
+            f.write("\n[Term]\nid: TST:003\nname: other imported term\n")
+        self.touch(dep)
+        ont = pronto.Ontology(main, cache=self.cache)
+        self.assertIn('TST:003', ont)
+
+    def test_typedefs_restored(self):
+        path = self.write("typedef.obo", """
+            [Term]
+            id: TST:001
+            name: written thing
+
+            [Term]
+            id: TST:002
+            name: writer
+            relationship: tst_has_written TST:001
+
+            [Typedef]
+            id: tst_has_written
+            name: has written
+            inverse_of: tst_written_by
+
+            [Typedef]
+            id: tst_written_by
+            name: written by
+            inverse_of: tst_has_written
+        """)
+        pronto.Ontology(path, cache=self.cache)
+        for name in ('tst_has_written', 'tst_written_by'):
+            del pronto.Relationship._instances[name]
+        try:
+            ont = self.assert_cached(path)
+            relation = pronto.Relationship('tst_has_written')
+            self.assertEqual(relation.complementary, 'tst_written_by')
+            self.assertEqual(ont['TST:002'].relations[relation].id, ['TST:001'])
+            self.assertEqual(ont['TST:001'].relations[relation.complement()].id, ['TST:002'])
+        finally:
+            for name in ('tst_has_written', 'tst_written_by'):
+                pronto.Relationship._instances.pop(name, None)
+
+    def test_catalog(self):
+        for name in ('a', 'b'):
+            self.write("dep_{}.obo".format(name), """
+                [Term]
+                id: TST:{}
+                name: imported term
+            """.format(name.upper()))
+        main = self.write("main.obo", """
+            import: http://example.com/dep.obo
+
+            [Term]
+            id: TST:002
+            name: main term
+        """)
+        iri = "http://example.com/dep.obo"
+        first = {iri: os.path.join(self.tmpdir, "dep_a.obo")}
+        second = {iri: os.path.join(self.tmpdir, "dep_b.obo")}
+        self.assertIn('TST:A', pronto.Ontology(main, cache=self.cache, catalog=first))
+        self.assertIn('TST:B', pronto.Ontology(main, cache=self.cache, catalog=second))
+        self.assertIn('TST:A', self.assert_cached(main, catalog=first))
+
+        self.write("catalog-v001.xml", """
+            <catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                <uri name="http://example.com/dep.obo" uri="dep_a.obo"/>
+            </catalog>
+        """)
+        self.assertIn('TST:A', pronto.Ontology(main, cache=self.cache))
+
+    def test_eviction(self):
+        pronto.Ontology(self.path, False, cache=self.cache)
+        pronto.Ontology(self.path, cache=self.cache)
+        sizes = [os.path.getsize(os.path.join(self.cache.directory, name))
+                 for name in os.listdir(self.cache.directory)]
+        self.assertEqual(len(sizes), 2)
+
+        # make the first entry the most recently used one
+        time.sleep(0.05)
+        self.assert_cached(self.path, False)
+        self.cache.max_size = 2 * max(sizes)
+        pronto.Ontology(self.path, parser='OboParser', cache=self.cache)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
+        self.assert_cached(self.path, False)
+        self.assert_cached(self.path, parser='OboParser')
+
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_cache_argument(self):
+        directory = os.path.join(self.tmpdir, "other")
+        pronto.Ontology(self.path, cache=directory)
+        self.assertEqual(len(os.listdir(directory)), 1)
+        self.assertRaises(TypeError, pronto.Ontology, self.path, cache=1)
+
+
+def setUpModule():
+    warnings.simplefilter('ignore')
+
+def tearDownModule():
+    warnings.simplefilter(warnings.defaultaction)
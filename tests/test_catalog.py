@@ -0,0 +1,127 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+### DEPS
+import os
+import shutil
+import tempfile
+import textwrap
+import unittest
+import warnings
+
+from six.moves.urllib.error import URLError
+
+from . import utils
+import pronto
+import pronto.fetch
+from pronto.catalog import Catalog
+
+
+### TESTS
+class TestProntoCatalog(unittest.TestCase):
+
+    IMPORTSDIR = os.path.join(utils.DATADIR, "imports")
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = self.write("main.obo", """
+            import: http://purl.obolibrary.org/obo/uo.obo
+            import: http://purl.obolibrary.org/obo/pato.obo
+
+            [Term]
+            id: TST:001
+            name: main
+            is_a: UO:0000000
+        """)
+        # simulate an offline node
+        patcher = utils.mock.patch.object(pronto.fetch.Fetcher, 'open',
+                                          side_effect=URLError("offline"))
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as f:
+            f.write(textwrap.dedent(text).lstrip())
+        return path
+
+    def assert_imported(self, ont):
+        self.assertIn('UO:0000000', ont)
+        self.assertIn('PATO:0000001', ont)
+        self.assertIs(ont['TST:001'].parents[0], ont['UO:0000000'])
+        self.assertFalse(self.fetch.called)
+
+    def test_mapping(self):
+        ont = pronto.Ontology(self.path, catalog={
+            'http://purl.obolibrary.org/obo/uo.obo': os.path.join(self.IMPORTSDIR, "uo.obo"),
+            'http://purl.obolibrary.org/obo/pato.obo': os.path.join(self.IMPORTSDIR, "pato.obo"),
+        })
+        self.assert_imported(ont)
+        self.assertIn(os.path.join(self.IMPORTSDIR, "uo.obo"), ont._sources)
+
+    def test_xml(self):
+        catalog = self.write("catalog.xml", """
+            <?xml version="1.0" encoding="UTF-8" standalone="no"?>
+            <catalog prefer="public" xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                <group xml:base="{}">
+                    <uri name="http://purl.obolibrary.org/obo/uo.obo" uri="uo.obo"/>
+                </group>
+                <nextCatalog catalog="next.xml"/>
+            </catalog>
+        """.format(self.IMPORTSDIR))
+        self.write("next.xml", """
+            <catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                <rewriteURI uriStartString="http://purl.obolibrary.org/obo/" rewritePrefix="{}/"/>
+                <nextCatalog catalog="catalog.xml"/>
+            </catalog>
+        """.format(self.IMPORTSDIR))
+        self.assert_imported(pronto.Ontology(self.path, catalog=catalog))
+
+        catalog = Catalog.from_xml(catalog)
+        self.assertEqual(
+            catalog.resolve('http://purl.obolibrary.org/obo/ro_import.owl'),
+            os.path.join(self.IMPORTSDIR, "ro_import.owl.gz"),
+        )
+        self.assertIsNone(catalog.resolve('http://purl.obolibrary.org/obo/missing.obo'))
+        self.assertIsNone(catalog.resolve('http://example.com/uo.obo'))
+
+    def test_default_catalog(self):
+        self.write(Catalog.DEFAULT_NAME, """
+            <catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                <rewriteURI uriStartString="http://purl.obolibrary.org/obo/" rewritePrefix="imports/"/>
+            </catalog>
+        """)
+        shutil.copytree(self.IMPORTSDIR, os.path.join(self.tmpdir, "imports"))
+        self.assert_imported(pronto.Ontology(self.path))
+
+    def test_unresolved_import(self):
+        catalog = Catalog()
+        catalog.add('http://purl.obolibrary.org/obo/uo.obo', os.path.join(self.IMPORTSDIR, "uo.obo"))
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            ont = pronto.Ontology(self.path, catalog=catalog)
+        self.assertIn('UO:0000000', ont)
+        self.assertNotIn('PATO:0000001', ont)
+        self.fetch.assert_called_once_with('http://purl.obolibrary.org/obo/pato.obo', 2)
+        self.assertEqual(len(w), 1)
+
+    def test_resolve_handle(self):
+        ont = pronto.Ontology('http://purl.obolibrary.org/obo/uo.obo', catalog={
+            'http://purl.obolibrary.org/obo/uo.obo': os.path.join(self.IMPORTSDIR, "uo.obo"),
+        })
+        self.assertEqual(ont.path, os.path.join(self.IMPORTSDIR, "uo.obo"))
+        self.assertIn('UO:0000000', ont)
+        self.assertFalse(self.fetch.called)
+
+    def test_catalog_argument(self):
+        self.assertRaises(TypeError, pronto.Ontology, self.path, catalog=1)
+
+
+def setUpModule():
+    warnings.simplefilter('ignore')
+
+def tearDownModule():
+    warnings.simplefilter(warnings.defaultaction)
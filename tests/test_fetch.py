@@ -0,0 +1,172 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+### DEPS
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import warnings
+
+from six.moves import BaseHTTPServer
+from six.moves.urllib.error import HTTPError
+
+from . import utils
+import pronto
+import pronto.fetch
+
+
+class OtherHostHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer with the requested path, or redirect to the stub server.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/redirect/'):
+            self.send_response(302)
+            self.send_header('Location', 'http://localhost:8080' + self.path[len('/redirect'):])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = 'FROM-OTHER {}'.format(self.path).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+### TESTS
+class TestProntoFetcher(unittest.TestCase):
+
+    URL = "http://localhost:8080/cmo.obo"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fetcher = pronto.fetch.Fetcher(os.path.join(self.tmpdir, "http"))
+        del utils.StubHTTPServer.requests[:]
+        with open(os.path.join(utils.DATADIR, "cmo.obo"), 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fetch(self, url=URL, fetcher=None):
+        with (fetcher or self.fetcher).open(url) as handle:
+            return handle.read()
+
+    def statuses(self):
+        return [code for _, code, _ in utils.StubHTTPServer.requests]
+
+    @unittest.skipIf(sys.version_info < (3, 7), "stub server ignores If-Modified-Since")
+    def test_last_modified(self):
+        self.assertEqual(self.fetch(), self.data)
+        self.assertEqual(self.fetch(), self.data)
+        self.assertEqual(self.statuses(), [200, 304])
+
+    def test_etag(self):
+        with utils.mock.patch.object(utils.StubHTTPServer, 'etags', True):
+            self.assertEqual(self.fetch(), self.data)
+            self.assertEqual(self.fetch(), self.data)
+        self.assertEqual(self.statuses(), [200, 304])
+
+    def test_keep_alive(self):
+        self.fetch()
+        self.fetch("http://localhost:8080/uo.obo")
+        ports = {port for _, _, port in utils.StubHTTPServer.requests}
+        self.assertEqual(len(ports), 1)
+
+    def test_redirect(self):
+        self.assertEqual(self.fetch("http://localhost:8080/redirect/cmo.obo"), self.data)
+        self.assertEqual(self.statuses(), [302, 200])
+
+    def test_redirect_other_host(self):
+        server = utils.StubHTTPServer._Server(("127.0.0.1", 0), OtherHostHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            other = "http://127.0.0.1:{}".format(server.server_address[1])
+            self.assertEqual(self.fetch(other + "/redirect/cmo.obo"), self.data)
+            self.assertEqual(self.fetch(other + "/data"), b"FROM-OTHER /data")
+            with open(os.path.join(utils.DATADIR, "uo.obo"), 'rb') as f:
+                self.assertEqual(self.fetch("http://localhost:8080/uo.obo"), f.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+        for (_, netloc), connections in self.fetcher._idle.items():
+            for connection in connections:
+                self.assertEqual("{}:{}".format(connection.host, connection.port), netloc)
+
+    def test_not_found(self):
+        self.assertRaises(HTTPError, self.fetch, "http://localhost:8080/missing.obo")
+        self.assertEqual(self.fetch(), self.data)
+
+    def test_no_cache(self):
+        fetcher = pronto.fetch.Fetcher(os.path.join(self.tmpdir, "none"), cache=False)
+        self.assertEqual(self.fetch(fetcher=fetcher), self.data)
+        self.assertEqual(self.fetch(fetcher=fetcher), self.data)
+        self.assertEqual(self.statuses(), [200, 200])
+        self.assertFalse(os.path.exists(fetcher.directory))
+
+    def test_cache_unavailable(self):
+        with utils.mock.patch.object(pronto.fetch.os, 'makedirs', side_effect=OSError):
+            self.assertEqual(self.fetch(), self.data)
+        self.assertFalse(os.path.exists(self.fetcher.directory))
+
+    def test_cache_write_error(self):
+        class FullDisk(object):
+            def write(self, data):
+                raise IOError("no space left on device")
+        @contextlib.contextmanager
+        def atomic_write(path):
+            yield FullDisk()
+        with utils.mock.patch.object(pronto.fetch, 'atomic_write', atomic_write):
+            self.assertRaises(IOError, self.fetch)
+        self.assertEqual(self.fetch(), self.data)
+
+    def test_eviction(self):
+        uo = "http://localhost:8080/uo.obo"
+        self.fetcher.max_size = len(self.data) + 1024
+        self.fetch()
+        os.utime(self.fetcher._entry(self.URL), (0, 0))
+        self.fetch(uo)
+        directory = self.fetcher.directory
+        self.assertEqual(sorted(os.listdir(directory)),
+                         sorted([os.path.basename(self.fetcher._entry(uo)),
+                                 os.path.basename(self.fetcher._entry(uo)) + '.json']))
+        size = sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory))
+        self.assertLessEqual(size, self.fetcher.max_size)
+
+    def test_other_scheme_closed(self):
+        response = io.BytesIO(b'format-version: 1.2')
+        with utils.mock.patch.object(pronto.fetch, 'urlopen', return_value=response):
+            self.assertEqual(self.fetch("ftp://localhost/uo.obo"), b'format-version: 1.2')
+        self.assertTrue(response.closed)
+
+    def test_clear(self):
+        self.fetch()
+        self.assertEqual(len(os.listdir(self.fetcher.directory)), 2)
+        self.fetcher.clear()
+        self.assertEqual(os.listdir(self.fetcher.directory), [])
+
+    def test_remote_ontology(self):
+        with utils.mock.patch.object(pronto.fetch, 'default_fetcher', self.fetcher):
+            remote = pronto.Ontology(self.URL, False)
+            zipped = pronto.Ontology("http://localhost:8080/cl.ont.gz", False)
+        self.assertEqual(remote.obo, pronto.Ontology(os.path.join(utils.DATADIR, "cmo.obo"), False).obo)
+        self.assertEqual(len(zipped), len(pronto.Ontology(os.path.join(utils.DATADIR, "cl.ont.gz"), False)))
+
+
+def setUpModule():
+    warnings.simplefilter('ignore')
+
+def tearDownModule():
+    warnings.simplefilter(warnings.defaultaction)
@@ -0,0 +1,62 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+### DEPS
+import os
+import unittest
+import warnings
+
+from . import utils
+import pronto
+import pronto.identifiers
+
+
+### TESTS
+class TestProntoIdTable(unittest.TestCase):
+
+    IDS = ['GO:0008150', 'GO:0003674', 'GO:8150', 'CL:0000000', 'owl:Thing',
+           'http://purl.obolibrary.org/obo/UBERON_0000001', 'X:1234567890123456789012',
+           '42', 'GO:0008150\n']
+
+    def test_sequence(self):
+        table = pronto.identifiers.IdTable(self.IDS)
+        self.assertEqual(len(table), len(self.IDS))
+        self.assertEqual(list(table), self.IDS)
+        self.assertEqual(table[-2], '42')
+        self.assertEqual(table[1:3], self.IDS[1:3])
+
+    def test_positions(self):
+        table = pronto.identifiers.IdTable(self.IDS)
+        for i, id in enumerate(self.IDS):
+            self.assertEqual(table.positions[id], i)
+            self.assertEqual(table.index(id), i)
+            self.assertIn(id, table)
+        for id in ['GO:0000001', 'GO:00008150', 'owl:Nothing', 'CL:', 1]:
+            self.assertNotIn(id, table.positions)
+            self.assertIsNone(table.positions.get(id))
+            self.assertRaises(ValueError, table.index, id)
+        self.assertRaises(KeyError, table.positions.__getitem__, 'GO:0000001')
+
+    def test_duplicates(self):
+        IdTable = pronto.identifiers.IdTable
+        self.assertRaises(ValueError, IdTable, ['GO:0008150', 'GO:0003674', 'GO:0008150'])
+        self.assertRaises(ValueError, IdTable, ['owl:Thing', 'owl:Thing'])
+
+    def test_closure(self):
+        warnings.simplefilter('ignore')
+        try:
+            ms = pronto.Ontology(os.path.join(utils.DATADIR, "psi-ms.obo"), False)
+        finally:
+            warnings.simplefilter(warnings.defaultaction)
+        index = ms.closure()
+        expected = {term.id: index.ancestors(term) for term in ms}
+        compact = ms.closure(compact=True)
+        self.assertIsNot(compact, index)
+        self.assertIs(ms.closure(), compact)
+        self.assertIsInstance(compact.ids, pronto.identifiers.IdTable)
+        self.assertEqual(list(compact.ids), list(index.ids))
+        for term in ms:
+            self.assertEqual(compact.ancestors(term.id), expected[term.id])
+            self.assertEqual(compact.position(term), index.position(term))
+        self.assertEqual(list(compact.batch_positions(list(ms.terms))), list(range(len(ms))))
+        self.assertIsNot(ms.closure(compact=False), compact)
@@ -0,0 +1,108 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+### DEPS
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import six
+
+from . import utils
+import pronto
+import pronto.lazy
+
+
+### TESTS
+class TestProntoLazyOntology(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "psi-ms.obo")
+        shutil.copy(os.path.join(utils.DATADIR, "psi-ms.obo"), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_lazy_terms(self):
+        eager = pronto.Ontology(self.path, False)
+        lazy = pronto.Ontology(self.path, False, lazy=True)
+        self.assertIsInstance(lazy.terms, pronto.lazy.LazyTermDict)
+        self.assertEqual(len(lazy), len(eager))
+        self.assertEqual(list(lazy.terms), list(eager.terms))
+        for term in eager:
+            other = lazy[term.id]
+            self.assertEqual(term.name, other.name)
+            self.assertEqual(term.desc, other.desc)
+            self.assertEqual(term.other, other.other)
+            self.assertEqual(term.obo, other.obo)
+            self.assertEqual(term.children.id, other.children.id)
+            self.assertEqual(term.rparents().id, other.rparents().id)
+
+    def test_terms_loaded_on_access(self):
+        ont = pronto.Ontology(self.path, False, lazy=True)
+        self.assertEqual(len(ont.terms._terms), 0)
+        term = ont['MS:1000031']
+        self.assertEqual(term.name, 'instrument model')
+        self.assertEqual(set(ont.terms._terms), {'MS:1000031'})
+        self.assertIn('MS:1000121', term.children.id)
+        self.assertLess(len(ont.terms._terms), len(ont))
+
+    def test_index_reused(self):
+        pronto.Ontology(self.path, False, lazy=True)
+        self.assertTrue(os.path.exists(pronto.lazy.index_path(self.path)))
+        with utils.mock.patch.object(pronto.lazy.OboIndex, 'scan') as scan:
+            ont = pronto.Ontology(self.path, False, lazy=True)
+            self.assertFalse(scan.called)
+        self.assertIn('MS:1000031', ont)
+
+    def test_index_outdated(self):
+        pronto.Ontology(self.path, False, lazy=True)
+        with open(self.path, 'ab') as handle:
+            handle.write(b"\n[Term]\nid: MS:9999999\nname: new term\nis_a: MS:1000031\n")
+        ont = pronto.Ontology(self.path, False, lazy=True)
+        self.assertEqual(ont['MS:9999999'].name, 'new term')
+        self.assertIn('MS:9999999', ont['MS:1000031'].children.id)
+
+    def test_include(self):
+        ont = pronto.Ontology(self.path, False, lazy=True)
+        ont.include(pronto.Term('TST:001', 'test', relations={
+            pronto.Relationship('is_a'): ['MS:1000031']
+        }))
+        self.assertIn('TST:001', ont)
+        self.assertEqual(len(ont), len(pronto.Ontology(self.path, False)) + 1)
+        self.assertIn('TST:001', ont['MS:1000031'].children.id)
+
+    def test_close(self):
+        ont = pronto.Ontology(self.path, False, lazy=True)
+        term = ont['MS:1000031']
+        ont.terms.close()
+        self.assertIs(ont['MS:1000031'], term)
+        self.assertRaises(ValueError, ont.terms.__getitem__, 'MS:1000121')
+        ont.terms.close()
+
+    def test_fallback_empty(self):
+        path = os.path.join(self.tmpdir, "empty.obo")
+        open(path, 'wb').close()
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            ont = pronto.Ontology(path, lazy=True)
+        self.assertTrue(any(x.category is pronto.utils.ProntoWarning for x in w))
+        self.assertEqual(len(ont), 0)
+
+    def test_fallback(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            ont = pronto.Ontology(os.path.join(utils.DATADIR, "hpo.obo.gz"), lazy=True)
+        self.assertTrue(any(x.category is pronto.utils.ProntoWarning for x in w))
+        self.assertNotIsInstance(ont.terms, pronto.lazy.LazyTermDict)
+        self.assertIn('HP:0000003', ont)
+
+
+def setUpModule():
+    warnings.simplefilter('ignore')
+
+def tearDownModule():
+    warnings.simplefilter(warnings.defaultaction)
@@ -0,0 +1,143 @@
+# coding: utf-8
+from __future__ import absolute_import
+
+### DEPS
+import os
+import pickle
+import shutil
+import tempfile
+import textwrap
+import unittest
+import warnings
+
+from . import utils
+import pronto
+import pronto.lookup
+
+
+def scan(ontology, field, casefold=False):
+    """Map the values of a field to the terms having them, by iterating.
+    """
+    fold = pronto.lookup._casefold if casefold else (lambda x: x)
+    found = {}
+    for term in ontology:
+        if field == 'name':
+            values = [term.name] if term.name else []
+        elif field == 'synonym':
+            values = [s.desc for s in term.synonyms]
+        else:
+            values = [x.split(' ', 1)[0] for x in term.other.get(field, ())]
+        for value in set(fold(x) for x in values):
+            found.setdefault(value, set()).add(term.id)
+    return found
+
+
+### TESTS
+class TestProntoLookupIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.simplefilter('ignore')
+
+    @classmethod
+    def tearDownClass(cls):
+        warnings.simplefilter(warnings.defaultaction)
+
+    def setUp(self):
+        self.uo = pronto.Ontology(os.path.join(utils.DATADIR, "uo.obo"), False)
+
+    def check(self, ontology):
+        index = ontology.lookup_index()
+        for field in index.fields:
+            for casefold in (False, True):
+                expected = scan(ontology, field, casefold)
+                found = {value: set(ids) for value, ids in index.items(field, casefold)}
+                self.assertEqual(found, expected)
+                for value in sorted(expected)[:100]:
+                    self.assertEqual(set(ontology.lookup(value, [field], casefold).id), expected[value])
+
+    def test_fields(self):
+        self.check(self.uo)
+        self.assertEqual(len(self.uo.lookup('unit.ontology', ['namespace'])), len(self.uo))
+        self.assertEqual(self.uo.lookup('UO:0000009', ['name']), [])
+        self.assertEqual(self.uo.lookup('Kilogram'), [])
+        self.assertEqual(self.uo.lookup('Kilogram', casefold=True).id, ['UO:0000009'])
+
+    def test_obo_hpo(self):
+        hpo = pronto.Ontology(os.path.join(utils.DATADIR, "hpo.obo.gz"), False)
+        self.check(hpo)
+        self.assertIn('HP:0000118', hpo.lookup('Phenotypic abnormality').id)
+
+    def test_include(self):
+        index = self.uo.lookup_index()
+        self.uo.include(pronto.Term('TST:001', 'kilogram', other={'subset': ['unit_slim']}))
+        self.assertIs(self.uo.lookup_index(), index)
+        self.assertEqual(self.uo.lookup('kilogram').id, ['UO:0000009', 'TST:001'])
+        self.assertIn('TST:001', self.uo.lookup('unit_slim', ['subset']).id)
+        self.check(self.uo)
+
+    def test_include_replace(self):
+        self.uo.lookup_index()
+        self.uo.include(pronto.Term('UO:0000009', 'kilo gram'))
+        self.assertEqual(self.uo.lookup('kilogram'), [])
+        self.assertEqual(self.uo.lookup('kg'), [])
+        self.assertEqual(self.uo.lookup('kilo gram').id, ['UO:0000009'])
+        self.check(self.uo)
+
+    def test_merge(self):
+        self.uo.lookup_index()
+        other = pronto.Ontology()
+        other.include(pronto.Term('TST:001', 'Kilogram'), pronto.Term('UO:0000008', 'meter'))
+        self.uo.merge(other)
+        self.assertEqual(self.uo.lookup('kilogram', casefold=True).id, ['UO:0000009', 'TST:001'])
+        self.assertEqual(self.uo.lookup('metre'), [])
+        self.assertEqual(self.uo.lookup('meter').id, ['UO:0000008'])
+        self.check(self.uo)
+
+    def test_resolve_imports(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for name, text in [("dep.obo", """
+                [Term]
+                id: TST:001
+                name: beta
+            """), ("main.obo", """
+                import: dep.obo
+
+                [Term]
+                id: TST:002
+                name: alpha
+                is_a: TST:001
+            """)]:
+                with open(os.path.join(tmpdir, name), 'w') as f:
+                    f.write(textwrap.dedent(text).lstrip())
+            ont = pronto.Ontology(os.path.join(tmpdir, "main.obo"), False)
+            self.assertEqual(ont.lookup('alpha').id, ['TST:002'])
+            self.assertEqual(ont.lookup('beta'), [])
+            ont.resolve_imports(True, -1)
+            self.assertEqual(ont.lookup('beta').id, ['TST:001'])
+            self.check(ont)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_remove(self):
+        index = pronto.lookup.LookupIndex(self.uo, ['name', 'synonym'])
+        self.assertRaises(KeyError, index.find, 'unit_slim', ['subset'])
+        index.remove([self.uo['UO:0000008']])
+        self.assertEqual(index.find('metre'), [])
+        self.assertEqual(index.find('m'), ['UO:0000068', 'UO:0000297'])
+        self.assertRaises(ValueError, pronto.lookup.LookupIndex, [], ['label'])
+
+    def test_shared_value(self):
+        terms = [pronto.Term('TST:{:05}'.format(i), other={'namespace': ['test']})
+                 for i in range(50000)]
+        index = pronto.lookup.LookupIndex(terms + terms[:10], ['namespace'])
+        self.assertEqual(index.find('test'), [term.id for term in terms])
+        index.remove(terms[1:])
+        self.assertEqual(index.find('test'), ['TST:00000'])
+
+    def test_pickle(self):
+        self.uo.lookup_index()
+        uo = pickle.loads(pickle.dumps(self.uo, pickle.HIGHEST_PROTOCOL))
+        self.assertIsNone(uo._lookups)
+        self.assertEqual(uo.lookup('kg').id, ['UO:0000009'])
@@ -10,14 +10,19 @@ import re
 import sys
 import contextlib
 import os
+import pickle
 import shutil
 import gzip
+import tempfile
+import time
 import os.path as op
 import warnings
 import textwrap
+import json
 
 from . import utils
 import pronto
+import pronto.closure
 
 
 ### TESTS
@@ -200,6 +205,71 @@ class TestProntoFeatures(TestProntoOntology):
             is_a: HP:0000107 ! Renal cyst""").strip()
         )
 
+    def test_obo_dump(self):
+        hpo = pronto.Ontology("tests/resources/hpo.obo.gz", False)
+        with utils.mock.patch.object(pronto.ontology, 'datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value.strftime.return_value = "01:01:2018 00:00"
+            expected = hpo.obo
+            text = expected.decode('utf-8') if six.PY2 else expected
+
+            chunks = list(hpo.iter_obo(4096))
+            self.assertEqual(expected[:0].join(chunks), expected)
+            self.assertGreater(len(chunks), 1)
+            self.assertTrue(all(len(chunk) >= 4096 for chunk in chunks[:-1]))
+
+            buffer = io.BytesIO()
+            hpo.dump(buffer)
+            self.assertEqual(buffer.getvalue(), text.encode('utf-8'))
+            buffer = io.StringIO()
+            hpo.dump(buffer, buffer_size=1)
+            self.assertEqual(buffer.getvalue(), text)
+
+            path = os.path.join(tempfile.mkdtemp(), "hpo.obo.gz")
+            try:
+                with gzip.open(path, 'wb') as f:
+                    hpo.dump(f)
+                with gzip.open(path, 'rb') as f:
+                    self.assertEqual(f.read(), text.encode('utf-8'))
+            finally:
+                shutil.rmtree(os.path.dirname(path))
+
+            empty = pronto.Ontology()
+            self.assertEqual(list(empty.iter_obo()), [empty.obo])
+
+        self.assertRaises(ValueError, hpo.dump, io.BytesIO(), format='owl')
+
+    def test_obojson_dump(self):
+        hpo = pronto.Ontology("tests/resources/hpo.obo.gz", False)
+        chunks = list(hpo.iter_obojson(4096))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) >= 4096 for chunk in chunks[:-1]))
+        graph = json.loads(''.join(chunks))['graphs'][0]
+        self.assertEqual(len(graph['nodes']), len(hpo))
+        self.assertEqual(len(graph['edges']), sum(len(t.parents) for t in hpo))
+
+        path = os.path.join(tempfile.mkdtemp(), "hpo.json.gz")
+        try:
+            with gzip.open(path, 'wb') as f:
+                hpo.dump(f, format='obojson')
+            other = pronto.Ontology(path, False)
+        finally:
+            shutil.rmtree(os.path.dirname(path))
+        self.assertEqual(other._parsed_by, 'OboJSONParser')
+        self.assertEqual(other.meta, hpo.meta)
+        self.assertEqual(list(other.terms), list(hpo.terms))
+        for term in hpo:
+            copy = other[term.id]
+            self.assertEqual((copy.name, copy.desc, copy.desc.xref, copy.synonyms),
+                             (term.name, term.desc, term.desc.xref, term.synonyms))
+            self.assertEqual(copy.other, {k:v for k,v in six.iteritems(term.other)
+                                                if k not in ('id', 'is_a')})
+            self.assertEqual(set(copy.parents.id), set(term.parents.id))
+            self.assertEqual(set(copy.children.id), set(term.children.id))
+
+        buffer = io.StringIO()
+        hpo.dump(buffer, format='obojson', buffer_size=1)
+        self.assertEqual(buffer.getvalue(), ''.join(chunks))
+
     def test_obo_stream_import(self):
         # Check with a named stream
         with open("tests/resources/elo.obo", 'rb') as stream:
@@ -262,6 +332,540 @@ class TestProntoLocalOntology(TestProntoOntology):
         obo = pronto.Ontology("tests/resources/cmo.obo")
         self.check_ontology(obo)
 
+    def test_local_obo_workers(self):
+        """Try to import a local obo ontology using several processes
+        """
+        obo = pronto.Ontology("tests/resources/psi-ms.obo", workers=2)
+        self.check_ontology(obo)
+        self.assertEqual(
+            [t.id for t in obo],
+            [t.id for t in pronto.Ontology("tests/resources/psi-ms.obo")],
+        )
+
+
+class TestProntoImportGraph(TestProntoOntology):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.write("main.obo", "a.obo", "b.obo", term="MAIN:1", parent="A:1")
+        self.write("a.obo", "common.obo", term="A:1", parent="COMMON:1")
+        self.write("b.obo", "common.obo", term="B:1", parent="COMMON:1")
+        self.write("common.obo", "main.obo", term="COMMON:1")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, *imports, **kwargs):
+        with open(op.join(self.tmpdir, name), 'w') as f:
+            for i in imports:
+                f.write("import: {}\n".format(i))
+            f.write("\n[Term]\nid: {}\nname: {}\n".format(kwargs['term'], name))
+            if 'parent' in kwargs:
+                f.write("is_a: {}\n".format(kwargs['parent']))
+
+    def test_diamond_imports(self):
+        path = op.join(self.tmpdir, "main.obo")
+        get_handle = pronto.Ontology._get_handle
+        with utils.mock.patch.object(pronto.Ontology, '_get_handle', side_effect=get_handle) as m:
+            ont = pronto.Ontology(path)
+        opened = [op.basename(call[0][0]) for call in m.call_args_list]
+        self.assertEqual(opened, ["main.obo", "a.obo", "b.obo", "common.obo"])
+
+        self.assertEqual(list(ont.terms), ["MAIN:1", "A:1", "B:1", "COMMON:1"])
+        self.check_ontology(ont)
+        self.assertEqual(ont['MAIN:1'].rparents().id, ["A:1", "COMMON:1"])
+        self.assertEqual(ont['COMMON:1'].children.id, ["A:1", "B:1"])
+        self.assertIs(ont['A:1'].parents[0], ont['COMMON:1'])
+
+    def test_import_depth(self):
+        ont = pronto.Ontology(op.join(self.tmpdir, "main.obo"), import_depth=1)
+        self.assertEqual(list(ont.terms), ["MAIN:1", "A:1", "B:1"])
+        self.assertEqual(ont['A:1'].parents.id, ["COMMON:1"])
+        self.assertEqual(ont['A:1'].parents[0].name, "")
+
+    def test_missing_import(self):
+        self.write("b.obo", "missing.obo", term="B:1")
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            ont = pronto.Ontology(op.join(self.tmpdir, "main.obo"))
+        self.assertTrue(any(x.category is pronto.utils.ProntoWarning for x in w))
+        self.assertEqual(list(ont.terms), ["MAIN:1", "A:1", "B:1", "COMMON:1"])
+
+    def test_resolve_imports_later(self):
+        ont = pronto.Ontology(op.join(self.tmpdir, "main.obo"), False)
+        ont['MAIN:1'].rparents()
+        ont.resolve_imports(True, -1)
+        self.assertEqual(ont['MAIN:1'].rparents().id, ["A:1", "COMMON:1"])
+        self.assertIs(ont['MAIN:1'].parents[0], ont['A:1'])
+
+
+class TestProntoConcurrentImports(TestProntoOntology):
+
+    IMPORTS = [
+        "http://localhost:8080/imports/uo.obo",
+        "http://localhost:8080/imports/pato.obo",
+        "http://localhost:8080/cmo.obo",
+        "http://localhost:8080/missing.obo",
+    ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = op.join(self.tmpdir, "main.obo")
+        with open(self.path, 'w') as f:
+            for i in self.IMPORTS:
+                f.write("import: {}\n".format(i))
+            f.write("\n[Term]\nid: TST:001\nname: main\nis_a: UO:0000000\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def load(self, delay, **kwargs):
+        with utils.mock.patch.object(utils.StubHTTPServer, 'delay', delay):
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter('always')
+                start = time.time()
+                ont = pronto.Ontology(self.path, **kwargs)
+                elapsed = time.time() - start
+        errors = [x for x in w if x.category is pronto.utils.ProntoWarning]
+        return ont, elapsed, errors
+
+    def test_concurrent_imports(self):
+        sequential, _, errors = self.load(0)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("missing.obo", str(errors[0].message))
+
+        ont, elapsed, errors = self.load(0.5, threads=4)
+        self.assertLess(elapsed, 0.5 * len(self.IMPORTS) * 0.75)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("missing.obo", str(errors[0].message))
+        self.assertEqual(list(ont.terms), list(sequential.terms))
+        for term in sequential:
+            self.assertEqual(ont[term.id].obo, term.obo)
+        self.assertIs(ont['TST:001'].parents[0], ont['UO:0000000'])
+
+    def test_concurrent_imports_timeout(self):
+        ont, _, errors = self.load(0.5, threads=2, timeout=0.1)
+        self.assertEqual(list(ont.terms), ['TST:001'])
+        self.assertEqual(len(errors), len(self.IMPORTS))
+
+
+class TestProntoOntologyLinking(TestProntoOntology):
+
+    def setUp(self):
+        self.cmo = pronto.Ontology("tests/resources/cmo.obo", False)
+        self.is_a = pronto.Relationship('is_a')
+
+    def new_terms(self):
+        return [
+            pronto.Term('TST:001', 'test 1', relations={self.is_a: ['CMO:0000004']}),
+            pronto.Term('TST:002', 'test 2', relations={self.is_a: ['TST:001', 'CMO:0000003']}),
+        ]
+
+    def assert_linked(self, ontology, other):
+        self.assertEqual(list(ontology.terms), list(other.terms))
+        for term in ontology:
+            relations = [(r, x.id) for r, x in six.iteritems(other[term.id].relations)]
+            self.assertEqual([(r, x.id) for r, x in six.iteritems(term.relations)], relations)
+            for others in six.itervalues(term.relations):
+                for x in others:
+                    self.assertIs(x, ontology.terms.get(x.id, x))
+
+    def test_include_matches_full_linking(self):
+        expected = pronto.Ontology("tests/resources/cmo.obo", False)
+        for term in self.new_terms():
+            expected.terms[term.id] = term
+        expected.adopt()
+        expected.reference()
+        self.cmo.include(*self.new_terms())
+        self.assert_linked(self.cmo, expected)
+
+    def test_include_invalidates_related_terms(self):
+        root, parent = self.cmo['CMO:0000000'], self.cmo['CMO:0000004']
+        unrelated = self.cmo['CMO:0000005']
+        rchildren = len(root.rchildren())
+        self.assertNotIn('TST:001', parent.rchildren().id)
+        unrelated.rparents()
+        cached = unrelated._rparents
+
+        self.cmo.include(*self.new_terms())
+        self.assertEqual(len(root.rchildren()), rchildren + 2)
+        self.assertIn('TST:001', parent.rchildren().id)
+        self.assertIn('TST:002', parent.rchildren().id)
+        self.assertIn('CMO:0000000', self.cmo['TST:002'].rparents().id)
+        self.assertIs(unrelated._rparents, cached)
+
+    def test_include_forward_reference(self):
+        first, second = self.new_terms()
+        self.cmo.include(second)
+        self.assertEqual(self.cmo['TST:002'].parents[0].name, '')
+        self.cmo.include(first)
+        self.assertIs(self.cmo['TST:002'].parents[0], self.cmo['TST:001'])
+        self.assertEqual(self.cmo['TST:001'].children.id, ['TST:002'])
+        self.assertEqual(self.cmo['TST:002'].rparents(1).id, ['TST:001', 'CMO:0000003'])
+
+    def test_merge_links_placeholders(self):
+        first, second = pronto.Ontology(), pronto.Ontology()
+        first.include(self.new_terms()[1])
+        second.include(self.new_terms()[0])
+        self.cmo.merge(first)
+        self.cmo.merge(second)
+        self.assertIs(self.cmo['TST:002'].parents[0], self.cmo['TST:001'])
+        self.assertEqual(self.cmo['TST:001'].children.id, ['TST:002'])
+        self.assertEqual(self.cmo['CMO:0000004'].children.id[-1], 'TST:001')
+
+    def test_include_replace(self):
+        self.cmo.include(*self.new_terms())
+        self.cmo.include(pronto.Term('TST:001', 'replaced', relations={self.is_a: ['CMO:0000005']}))
+        self.assertEqual(self.cmo['TST:001'].name, 'replaced')
+        self.assertIn('TST:001', self.cmo['CMO:0000005'].children.id)
+
+
+class TestProntoClosureIndex(TestProntoOntology):
+
+    def setUp(self):
+        self.cmo = pronto.Ontology("tests/resources/cmo.obo", False)
+
+    def test_matches_recursive(self):
+        expected = {t.id: (t.rparents().id, t.rchildren().id) for t in self.cmo}
+        self.cmo._empty_cache()
+        index = self.cmo.closure()
+        self.assertIs(self.cmo.closure(), index)
+        for term in self.cmo:
+            parents, children = expected[term.id]
+            self.assertEqual(sorted(index.ancestors(term)), sorted(parents))
+            self.assertEqual(sorted(index.descendants(term.id)), sorted(children))
+            self.assertEqual(term.rparents().id, parents)
+            self.assertEqual(term.rchildren().id, children)
+            for other in parents:
+                self.assertTrue(index.is_descendant(term, other))
+                self.assertTrue(index.is_ancestor(other, term.id))
+                self.assertFalse(index.is_descendant(other, term))
+
+    def test_relationships(self):
+        ms = pronto.Ontology("tests/resources/psi-ms.obo", False)
+        is_a, part_of = pronto.Relationship('is_a'), pronto.Relationship('part_of')
+        index = ms.closure(['is_a'])
+        self.assertIs(ms.closure([is_a]), index)
+        self.assertIsNot(ms.closure(), index)
+        for term in ms:
+            expected, stack = set(), list(term.relations.get(is_a, ()))
+            while stack:
+                other = stack.pop()
+                if other.id not in expected:
+                    expected.add(other.id)
+                    stack.extend(other.relations.get(is_a, ()))
+            self.assertEqual(set(index.ancestors(term)), expected)
+            self.assertLessEqual(expected, set(ms.closure().ancestors(term)))
+            for other in term.relations.get(part_of, ()):
+                self.assertTrue(ms.closure().is_descendant(term, other))
+
+    def test_include_invalidates(self):
+        index = self.cmo.closure()
+        self.cmo['CMO:0000000'].rchildren()
+        self.cmo.include(pronto.Term('TST:001', 'test', relations={
+            pronto.Relationship('is_a'): ['CMO:0000004']}))
+        self.assertIsNot(self.cmo.closure(), index)
+        self.assertIn('TST:001', self.cmo['CMO:0000000'].rchildren().id)
+        self.assertIn('TST:001', self.cmo.closure().descendants('CMO:0000000'))
+        self.assertTrue(self.cmo.closure().is_descendant('TST:001', 'CMO:0000000'))
+
+    def test_merge_invalidates(self):
+        index = self.cmo.closure()
+        other = pronto.Ontology()
+        other.include(pronto.Term('TST:001', 'test', relations={
+            pronto.Relationship('is_a'): ['CMO:0000004']}))
+        self.cmo.merge(other)
+        self.assertIsNot(self.cmo.closure(), index)
+        self.assertTrue(self.cmo.closure().is_descendant('TST:001', 'CMO:0000000'))
+        self.assertIn('TST:001', self.cmo['CMO:0000004'].rchildren().id)
+
+    def test_adopt_detaches(self):
+        is_a = pronto.Relationship('is_a')
+        self.cmo.include(pronto.Term('TST:ROOT', 'root'))
+        self.cmo.closure()
+        self.cmo['CMO:0000000'].relations[is_a] = ['TST:ROOT']
+        self.cmo.adopt()
+        self.cmo.reference()
+        self.assertIsNone(self.cmo['CMO:0000004']._closure)
+        self.assertIn('TST:ROOT', self.cmo['CMO:0000004'].rparents().id)
+        self.assertIn('CMO:0000004', self.cmo['TST:ROOT'].rchildren().id)
+
+    def test_cycle(self):
+        ont = pronto.Ontology()
+        is_a = pronto.Relationship('is_a')
+        ont.include(
+            pronto.Term('TST:001', 'a', relations={is_a: ['TST:002']}),
+            pronto.Term('TST:002', 'b', relations={is_a: ['TST:001']}),
+            pronto.Term('TST:003', 'c', relations={is_a: ['TST:001']}),
+        )
+        index = ont.closure()
+        self.assertEqual(index.ancestors('TST:003'), ['TST:001', 'TST:002'])
+        self.assertEqual(index.ancestors('TST:001'), ['TST:001', 'TST:002'])
+        self.assertEqual(index.descendants('TST:002'), ['TST:001', 'TST:002', 'TST:003'])
+        self.assertEqual(ont['TST:003'].rparents().id, ['TST:001', 'TST:002'])
+
+    def check_batch(self, ontology, relationships=None):
+        index = ontology.closure(relationships)
+        ids = list(ontology.terms)
+        terms = [ids[(i * 7) % len(ids)] for i in range(500)]
+        others = [ids[(i * 13) % len(ids)] for i in range(500)]
+        for term in terms[:50]:
+            others.extend(index.ancestors(term)[:2])
+            terms.extend([term] * len(index.ancestors(term)[:2]))
+
+        mask = ontology.batch_is_descendant(terms, others, relationships)
+        self.assertEqual([bool(x) for x in mask],
+                         [index.is_descendant(t, o) for t, o in zip(terms, others)])
+        self.assertTrue(any(mask))
+
+        for method, scalar in [(ontology.batch_ancestors, index.ancestors),
+                               (ontology.batch_descendants, index.descendants)]:
+            offsets, positions = method(terms, relationships)
+            self.assertEqual(len(offsets), len(terms) + 1)
+            for i, term in enumerate(terms):
+                found = positions[offsets[i]:offsets[i+1]]
+                self.assertEqual([index.ids[x] for x in found], scalar(term))
+
+    def test_batch(self):
+        self.check_batch(self.cmo)
+        ms = pronto.Ontology("tests/resources/psi-ms.obo", False)
+        self.check_batch(ms, ['is_a'])
+        self.check_batch(ms, ['is_a', 'part_of'])
+
+    @unittest.skipIf(pronto.closure.numpy is None, "numpy unavailable")
+    def test_batch_positions(self):
+        index = self.cmo.closure()
+        positions = pronto.closure.numpy.array([index.position('CMO:0000004')])
+        mask = index.batch_is_descendant(positions, ['CMO:0000000'])
+        self.assertEqual(mask.tolist(), [True])
+        self.assertRaises(ValueError, index.batch_is_descendant, positions, [])
+
+    def test_batch_without_numpy(self):
+        with utils.mock.patch.object(pronto.closure, 'numpy', None):
+            self.check_batch(self.cmo)
+
+    def test_pickle(self):
+        self.cmo.closure()
+        ont = pickle.loads(pickle.dumps(self.cmo, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(ont._closures, {})
+        self.assertIsNone(ont['CMO:0000004']._closure)
+
+
+class TestProntoTermGraph(TestProntoOntology):
+
+    def setUp(self):
+        self.cmo = pronto.Ontology("tests/resources/cmo.obo", False)
+        self.is_a = pronto.Relationship('is_a')
+
+    def test_views(self):
+        term = self.cmo['CMO:0000004']
+        self.assertIsInstance(term.relations, pronto.term.Relations)
+        self.assertEqual(list(term.relations), [self.is_a, self.is_a.complement()])
+        self.assertIn(self.is_a, term.relations)
+        self.assertEqual(term.relations[self.is_a].id, ['CMO:0000003'])
+        self.assertIs(term.relations[self.is_a], term.relations[self.is_a])
+        self.assertIsNone(term.relations.get(pronto.Relationship('part_of')))
+        self.assertEqual(term.parents.id, ['CMO:0000003'])
+        self.assertIs(term.parents[0], self.cmo['CMO:0000003'])
+        self.assertIn(term, self.cmo['CMO:0000003'].children)
+
+    def test_read(self):
+        term, graph = self.cmo['CMO:0000004'], self.cmo['CMO:0000004'].relations._graph
+        parents = term.relations[self.is_a]
+        self.assertIs(term.relations[self.is_a], parents)
+        self.assertEqual(dict(term.relations)[self.is_a], parents)
+        self.assertEqual(parents.id, ['CMO:0000003'])
+        self.assertFalse(graph._stale)
+        self.assertIsNotNone(graph.walk(term.relations._position, 'bottomup'))
+        term.relations[self.is_a] = pronto.TermList([self.cmo['CMO:0000000']])
+        parents.append(self.cmo['CMO:0000005'])
+        self.assertEqual(term.relations[self.is_a].id, ['CMO:0000000'])
+
+    def test_change(self):
+        term, graph = self.cmo['CMO:0000004'], self.cmo['CMO:0000004'].relations._graph
+        term.relations[self.is_a].append(self.cmo['CMO:0000005'])
+        self.assertTrue(graph._stale)
+        self.assertEqual(term.relations[self.is_a].id, ['CMO:0000003', 'CMO:0000005'])
+        self.assertEqual(term.parents.id, ['CMO:0000003', 'CMO:0000005'])
+        del term.relations[self.is_a]
+        self.assertNotIn(self.is_a, term.relations)
+        term._empty_cache()
+        self.assertEqual(term.parents.id, [])
+        term.relations[self.is_a] = pronto.TermList([self.cmo['CMO:0000000']])
+        self.assertEqual(len(term.relations), 2)
+        term._empty_cache()
+        self.assertEqual(term.rparents().id, ['CMO:0000000'])
+
+    def test_replace(self):
+        term, graph = self.cmo['CMO:0000004'], self.cmo['CMO:0000004'].relations._graph
+        child = self.cmo['CMO:0000007']
+        self.assertIn('CMO:0000003', child.rparents().id)
+        term.relations = {self.is_a: pronto.TermList([self.cmo['CMO:0000000']])}
+        self.assertTrue(graph._stale)
+        self.assertIsNone(graph.walk(child.relations._position, 'bottomup'))
+        self.cmo._empty_cache()
+        self.assertEqual(term.parents.id, ['CMO:0000000'])
+        self.assertNotIn('CMO:0000003', child.rparents().id)
+
+    def test_walk(self):
+        expected = {}
+        for term in self.cmo:
+            expected[term.id] = (term.rparents().id, term.rchildren().id)
+        self.cmo['CMO:0000000'].relations._graph._stale = True
+        self.cmo._empty_cache()
+        for term in self.cmo:
+            self.assertEqual((term.rparents().id, term.rchildren().id), expected[term.id])
+
+    def test_reference(self):
+        graph = self.cmo['CMO:0000004'].relations._graph
+        self.cmo.include(pronto.Term('TST:001', 'test', relations={self.is_a: ['CMO:0000004']}))
+        self.assertTrue(graph._stale)
+        self.assertIn('TST:001', self.cmo['CMO:0000000'].rchildren().id)
+        self.cmo.reference()
+        self.assertIsNot(self.cmo['CMO:0000004'].relations._graph, graph)
+        self.assertFalse(self.cmo['CMO:0000004'].relations._graph._stale)
+        self.cmo._empty_cache()
+        self.assertEqual(self.cmo['CMO:0000004'].children.id[-1], 'TST:001')
+        self.assertIn('TST:001', self.cmo['CMO:0000000'].rchildren().id)
+
+    def test_pickle(self):
+        self.cmo['CMO:0000004'].relations[self.is_a].append(self.cmo['CMO:0000005'])
+        ont = pickle.loads(pickle.dumps(self.cmo, pickle.HIGHEST_PROTOCOL))
+        self.assertIsInstance(ont['CMO:0000004'].relations, pronto.term.Relations)
+        self.assertEqual(ont['CMO:0000004'].parents.id, ['CMO:0000003', 'CMO:0000005'])
+        self.assertEqual(repr(ont['CMO:0000004'].relations), repr(self.cmo['CMO:0000004'].relations))
+
+
+class TestProntoTraversal(TestProntoOntology):
+
+    def chain(self, length):
+        is_a = pronto.Relationship('is_a')
+        ont = pronto.Ontology()
+        ont.include(*[
+            pronto.Term('TST:{:05}'.format(i), relations={is_a: ['TST:{:05}'.format(i - 1)]}
+                        if i else None)
+                for i in range(length)
+        ])
+        return ont
+
+    def test_self_cycle(self):
+        elo = pronto.Ontology("tests/resources/elo.obo")
+        term = elo['ELO:0110000']
+        self.assertIn(term, term.parents)
+        self.assertIn(term, term.rparents())
+        self.assertIn(term, term.rchildren())
+        for term in elo:
+            term.rparents()
+            term.rchildren()
+            term.rparents(3, False)
+
+    def test_cycle(self):
+        ont = self.chain(5)
+        ont.include(pronto.Term('TST:00000', relations={pronto.Relationship('is_a'): ['TST:00004']}))
+        self.assertEqual(sorted(ont['TST:00002'].rparents().id), sorted(ont.terms))
+        self.assertEqual(ont['TST:00002'].rparents(2, False).id, ['TST:00000'])
+        self.assertEqual(ont['TST:00002'].rparents(7, False).id, ['TST:00000'])
+
+    def test_deep_hierarchy(self):
+        ont = self.chain(5000)
+        self.assertEqual(len(ont['TST:04999'].rparents()), 4999)
+        self.assertEqual(len(ont['TST:00000'].rchildren()), 4999)
+        self.assertEqual(ont['TST:04999'].rparents(10, False).id, ['TST:04989'])
+        self.assertEqual(len(ont['TST:04999'].rparents(10)), 10)
+
+    def test_lazy(self):
+        hpo = pronto.Ontology("tests/resources/hpo.obo.gz", False)
+        root = hpo['HP:0000001']
+        root.relations._graph._stale = True
+        with utils.mock.patch.object(pronto.term, '_direct',
+                                     return_value=[hpo['HP:0000118']]) as children:
+            next(root.iter_rchildren())
+            self.assertEqual(children.call_count, 1)
+
+    def test_relationships(self):
+        ms = pronto.Ontology("tests/resources/psi-ms.obo", False)
+        part_of = pronto.Relationship('part_of')
+        for term in ms:
+            self.assertEqual(term.rparents(relationships=['is_a', 'part_of']).id,
+                             term.rparents().id)
+            self.assertEqual(sorted(term.rparents(relationships=['is_a']).id),
+                             sorted(ms.closure(['is_a']).ancestors(term)))
+            self.assertEqual(sorted(term.rchildren(relationships=['is_a']).id),
+                             sorted(ms.closure(['is_a']).descendants(term)))
+            self.assertEqual(term.rchildren(1, relationships=['has_part']).id,
+                             [x.id for x in term.relations.get(part_of.complement(), [])])
+
+    def test_termlist(self):
+        cmo = pronto.Ontology("tests/resources/cmo.obo", False)
+        terms = pronto.TermList([cmo['CMO:0000004'], cmo['CMO:0000005']])
+        expected = pronto.TermList()
+        for term in terms:
+            expected.extend(term.rparents(2))
+        self.assertEqual(terms.rparents(2).id, expected.id)
+        expected = pronto.TermList()
+        for term in terms:
+            expected.extend(term.rchildren(relationships=['is_a']))
+        self.assertEqual(terms.rchildren(relationships=['is_a']).id, expected.id)
+
+
+class TestProntoOntologyPickling(TestProntoOntology):
+
+    def assert_roundtrip(self, ontology):
+        data = pickle.dumps(ontology, pickle.HIGHEST_PROTOCOL)
+        other = pickle.loads(data)
+        self.check_ontology(other)
+        self.assertEqual(other.path, ontology.path)
+        self.assertEqual(repr(other.meta), repr(ontology.meta))
+        self.assertEqual(list(other.terms), list(ontology.terms))
+        for term in ontology:
+            copy = other[term.id]
+            self.assertEqual(copy.obo, term.obo)
+            self.assertEqual(copy.desc.xref, term.desc.xref)
+            self.assertEqual(list(copy.relations), list(term.relations))
+            for relation, others in six.iteritems(copy.relations):
+                self.assertEqual(others.id, term.relations[relation].id)
+                for x in others:
+                    self.assertIs(x, other.terms.get(x.id, x))
+        return other
+
+    def test_pickle_obo(self):
+        self.assert_roundtrip(pronto.Ontology("tests/resources/cmo.obo", False))
+
+    def test_pickle_owl(self):
+        self.assert_roundtrip(pronto.Ontology("tests/resources/cl.ont.gz", False))
+
+    def test_pickle_external_targets(self):
+        ont = pronto.Ontology()
+        ont.include(pronto.Term('TST:001', 'test', relations={
+            pronto.Relationship('is_a'): ['EXT:001', 'EXT:002'],
+            pronto.Relationship('part_of'): ['EXT:001'],
+        }))
+        term = self.assert_roundtrip(ont)['TST:001']
+        self.assertNotIn('EXT:001', ont)
+        self.assertIs(term.parents[0], term.relations[pronto.Relationship('part_of')][0])
+
+    def test_pickle_custom_typedef(self):
+        data = pickle.dumps(pronto.Ontology("tests/resources/elo.obo"))
+        for name in ('has_written', 'written_by'):
+            del pronto.Relationship._instances[name]
+        elo = pickle.loads(data)
+        self.assertEqual(pronto.Relationship('has_written').complementary, 'written_by')
+        self.assertIn(pronto.Relationship('written_by'), elo['ELO:0130001'].relations)
+
+    def test_pickle_term(self):
+        cmo = pronto.Ontology("tests/resources/cmo.obo", False)
+        original = cmo['CMO:0000003']
+        term = pickle.loads(pickle.dumps(original))
+        self.assertEqual((term.id, term.name, term.desc), (original.id, original.name, original.desc))
+        self.assertEqual(term.synonyms, original.synonyms)
+        self.assertEqual(term.relations[pronto.Relationship('is_a')], ['CMO:0000001'])
+        self.assertEqual(list(term.relations), list(original.relations))
+
+    def test_pickle_version(self):
+        state = pronto.Ontology("tests/resources/uo.obo").__getstate__()
+        ont = pronto.Ontology()
+        self.assertRaises(ValueError, ont.__setstate__, (0,) + state[1:])
+
 
 class TestProntoRemoteOntology(TestProntoOntology):
 
@@ -10,6 +10,8 @@ import importlib
 import warnings
 import platform
 import gzip
+import tempfile
+import textwrap
 
 from . import utils
 import pronto
@@ -177,11 +179,314 @@ class _TestProntoOwlParser(object):
             )
         self._check(m,t,i, exp_len=685)
 
+    # -----------------------------------
+    # Test streaming the document
+    # -----------------------------------
+
+    STREAMED = textwrap.dedent("""
+        <?xml version="1.0"?>
+        <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+                 xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"
+                 xmlns:owl="http://www.w3.org/2002/07/owl#"
+                 xmlns:obo="http://purl.obolibrary.org/obo/"
+                 xmlns:oboInOwl="http://www.geneontology.org/formats/oboInOwl#">
+            <owl:Axiom>
+                <owl:annotatedSource rdf:resource="http://purl.obolibrary.org/obo/TST_002"/>
+                <owl:annotatedProperty rdf:resource="http://purl.obolibrary.org/obo/IAO_0000115"/>
+                <owl:annotatedTarget>second definition</owl:annotatedTarget>
+                <oboInOwl:hasDbXref>PMID:2</oboInOwl:hasDbXref>
+            </owl:Axiom>
+            <owl:Ontology rdf:about="http://purl.obolibrary.org/obo/tst.owl"/>
+            <owl:Class rdf:about="http://purl.obolibrary.org/obo/TST_001">
+                <rdfs:label>first</rdfs:label>
+                <rdfs:subClassOf>
+                    <owl:Restriction>
+                        <owl:someValuesFrom>
+                            <owl:Class rdf:about="http://purl.obolibrary.org/obo/TST_003"/>
+                        </owl:someValuesFrom>
+                    </owl:Restriction>
+                </rdfs:subClassOf>
+            </owl:Class>
+            <owl:Axiom>
+                <owl:annotatedSource rdf:resource="http://purl.obolibrary.org/obo/TST_001"/>
+                <owl:annotatedProperty rdf:resource="http://purl.obolibrary.org/obo/IAO_0000115"/>
+                <owl:annotatedTarget>first definition</owl:annotatedTarget>
+                <oboInOwl:hasDbXref>PMID:1</oboInOwl:hasDbXref>
+            </owl:Axiom>
+            <owl:Class rdf:about="http://purl.obolibrary.org/obo/TST_002">
+                <rdfs:label>second</rdfs:label>
+                <obo:IAO_0000115>unannotated definition</obo:IAO_0000115>
+            </owl:Class>
+        </rdf:RDF>
+    """).lstrip().encode('utf-8')
+
+    def _check_streamed(self, etree):
+        with utils.mock.patch("pronto.parser.owl.etree", etree):
+            m,t,i = self.parser().parse(six.BytesIO(self.STREAMED))
+        self.assertEqual(list(t), ['TST:001', 'TST:002'])
+        self.assertEqual(t['TST:001'].desc, 'first definition')
+        self.assertEqual(t['TST:001'].desc.xref, ('PMID:1',))
+        self.assertEqual(t['TST:002'].desc, 'second definition')
+        self.assertEqual(t['TST:002'].desc.xref, ('PMID:2',))
+
+        annotate = self.parser._annotate
+        with utils.mock.patch("pronto.parser.owl.etree", etree):
+            with utils.mock.patch.object(self.parser, '_annotate', wraps=annotate) as mock_annotate:
+                self.parser().parse(six.BytesIO(self.STREAMED))
+        axioms = mock_annotate.call_args[0][1]
+        self.assertEqual(axioms, {})
+
+        with utils.mock.patch("pronto.parser.owl.etree", etree):
+            previous = None
+            for elem in self.parser._iter_toplevel(six.BytesIO(self.STREAMED)):
+                self.assertIsNot(previous, elem)
+                if previous is not None:
+                    self.assertEqual(len(previous), 0)
+                previous = elem
+
+    @unittest.skipIf(utils.lxml_etree is None, 'lxml unavailable')
+    def test_streamed_lxml(self):
+        self._check_streamed(utils.lxml_etree)
+
+    def test_streamed_ElementTree(self):
+        self._check_streamed(utils.xml_etree)
+
+    def test_interned_strings(self):
+        with open(os.path.join(self.resources_dir, 'nmrCV.owl'), 'rb') as f:
+            m,t,i = self.parser.parse(f)
+        strings = {}
+        for term in t.values():
+            self.assertIs(strings.setdefault(term.id, term.id), term.id)
+            for key, values in six.iteritems(term.other):
+                self.assertIs(strings.setdefault(key, key), key)
+                for value in values if key not in pronto.parser.owl._FREE_TEXT_TAGS else ():
+                    self.assertIs(strings.setdefault(value, value), value)
+            for others in term.relations.values():
+                for other in others:
+                    self.assertIs(strings.setdefault(other, other), other)
+
 
 class TestOwlXMLParser(_TestProntoOwlParser, TestProntoParser):
     parser = pronto.parser.owl.OwlXMLParser
 
 
+class TestOboParser(TestProntoParser):
+    parser = pronto.parser.obo.OboParser
+
+    def test_with_gzip(self):
+        m,t,i = self._parse(
+            self.parser(),
+            os.path.join(self.resources_dir, 'hpo.obo.gz'),
+        )
+        self._check(m,t,i, exp_len=12358)
+
+    def test_with_line_iterator(self):
+        lines = iter([
+            b"format-version: 1.2\n",
+            b"\n",
+            b"[Term]\n",
+            b"id: TST:001\n",
+            b"name: root\n",
+            b"\n",
+            b"[Instance]\n",
+            b"id: TST:INSTANCE\n",
+            b"\n",
+            b"[Term]\n",
+            b"id: TST:002\n",
+            b"name: leaf\n",
+            b"is_a: TST:001 ! root\n",
+        ])
+        m,t,i = self.parser.parse(lines)
+        self.assertEqual(list(t), ['TST:001', 'TST:002'])
+        self.assertEqual(m['format-version'], ['1.2'])
+        self.assertEqual(t['TST:002'].relations, {pronto.Relationship('is_a'): ['TST:001']})
+
+    def test_parallel(self):
+        """Check parsing with several processes gives the same terms.
+        """
+        for name in ('hpo.obo.gz', 'psi-ms.obo', 'elo.obo', 'winni-genp.obo'):
+            path = os.path.join(self.resources_dir, name)
+            with gzip.GzipFile(path) if name.endswith('.gz') else open(path, 'rb') as handle:
+                m,t,i = self.parser.parse(handle)
+            with gzip.GzipFile(path) if name.endswith('.gz') else open(path, 'rb') as handle:
+                pm,pt,pi = self.parser.parse(handle, workers=2)
+            self.assertEqual(m.keys(), pm.keys())
+            self.assertEqual(i, pi)
+            self.assertEqual(list(t), list(pt))
+            for term in six.itervalues(t):
+                other = pt[term.id]
+                self.assertEqual(term.name, other.name)
+                self.assertEqual(term.desc, other.desc)
+                self.assertEqual(term.relations, other.relations)
+                self.assertEqual(
+                    sorted(s.obo for s in term.synonyms),
+                    sorted(s.obo for s in other.synonyms),
+                )
+                self.assertEqual(term.other, other.other)
+
+    def test_local_file(self):
+        """Check local files are parsed like in-memory streams.
+        """
+        path = os.path.join(self.resources_dir, 'psi-ms.obo')
+        with open(path, 'rb') as handle:
+            self.assertIsNotNone(self.parser._map(handle))
+            m,t,i = self.parser.parse(handle)
+        with open(path, 'rb') as handle:
+            sm,st,si = self.parser.parse(six.BytesIO(handle.read()))
+        self.assertEqual(m.keys(), sm.keys())
+        self.assertEqual(i, si)
+        self.assertEqual(list(t), list(st))
+        for term in six.itervalues(t):
+            self.assertEqual(term.relations, st[term.id].relations)
+            self.assertEqual(term.other, st[term.id].other)
+
+    def test_local_file_crlf(self):
+        data = textwrap.dedent("""
+            format-version: 1.2
+            remark: coverage: Testing
+
+            [Instance]
+            id: TST:INSTANCE
+            instance_of: TST:001
+
+            [Term]
+            id: TST:001
+            name: root \t
+
+            [Term]
+            id: TST:002
+            name: leaf
+            is_a: TST:001 ! root
+        """).lstrip().replace("\n", "\r\n").encode('utf-8')
+        fd, path = tempfile.mkstemp(suffix='.obo')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            with open(path, 'rb') as handle:
+                m,t,i = self.parser.parse(handle)
+        finally:
+            os.remove(path)
+        self.assertEqual(m, {'format-version': ['1.2'], 'coverage': ['Testing']})
+        self.assertEqual(list(t), ['TST:001', 'TST:002'])
+        self.assertEqual(t['TST:001'].name, 'root')
+        self.assertEqual(t['TST:002'].relations, {pronto.Relationship('is_a'): ['TST:001']})
+
+    def test_mmap_unavailable(self):
+        with gzip.GzipFile(os.path.join(self.resources_dir, 'hpo.obo.gz')) as handle:
+            self.assertIsNone(self.parser._map(handle))
+        self.assertIsNone(self.parser._map(six.BytesIO(b'format-version: 1.2')))
+
+    def test_typedef_after_terms(self):
+        """Check a relationship declared after its first use is registered.
+        """
+        stream = six.BytesIO(textwrap.dedent("""
+            format-version: 1.2
+
+            [Term]
+            id: TST:001
+            name: first
+            relationship: tst_refers_to TST:002 ! second
+
+            [Term]
+            id: TST:002
+            name: second
+
+            [Typedef]
+            id: tst_refers_to
+            name: refers to
+            inverse_of: tst_referred_by
+            is_transitive: true
+        """).lstrip().encode('utf-8'))
+        m,t,i = self.parser.parse(stream)
+        rel = pronto.Relationship('tst_refers_to')
+        self.assertTrue(rel.transitivity)
+        self.assertEqual(rel.complementary, 'tst_referred_by')
+        self.assertIn(rel, t['TST:001'].relations)
+        self.assertEqual(t['TST:001'].relations[rel], ['TST:002'])
+
+    def test_interned_strings(self):
+        """Check equal identifiers, tags and values are shared by terms.
+        """
+        with open(os.path.join(self.resources_dir, 'psi-ms.obo'), 'rb') as f:
+            m,t,i = self.parser.parse(f)
+        strings = {}
+        for term in t.values():
+            self.assertIs(strings.setdefault(term.id, term.id), term.id)
+            for key, values in six.iteritems(term.other):
+                self.assertIs(strings.setdefault(key, key), key)
+                for value in values if key != 'comment' else ():
+                    self.assertIs(strings.setdefault(value, value), value)
+            for others in term.relations.values():
+                for other in others:
+                    self.assertIs(strings.setdefault(other, other), other)
+        self.assertIs(t['MS:1000121'].relations[pronto.Relationship('is_a')][0],
+                      t['MS:1000031'].id)
+
+
+class TestOboJSONParser(TestProntoParser):
+    parser = pronto.parser.obojson.OboJSONParser
+
+    document = textwrap.dedent(u"""
+        {"graphs": [{
+          "id": "http://purl.obolibrary.org/obo/tst.owl",
+          "edges": [
+            {"sub": "http://purl.obolibrary.org/obo/TST_002", "pred": "is_a",
+             "obj": "http://purl.obolibrary.org/obo/TST_001"},
+            {"sub": "http://purl.obolibrary.org/obo/TST_002",
+             "pred": "http://purl.obolibrary.org/obo/BFO_0000050",
+             "obj": "http://purl.obolibrary.org/obo/TST_001"}
+          ],
+          "nodes": [
+            {"id": "http://purl.obolibrary.org/obo/TST_001", "lbl": "Bürste", "type": "CLASS",
+             "meta": {"definition": {"val": "a brush", "xrefs": ["PMID:1"]},
+                      "synonyms": [{"pred": "hasExactSynonym", "val": "brosse", "xrefs": []}],
+                      "subsets": ["http://purl.obolibrary.org/obo/tst#slim"],
+                      "deprecated": true, "version": 1.5e3,
+                      "basicPropertyValues": [
+                        {"pred": "http://www.geneontology.org/formats/oboInOwl#hasOBONamespace",
+                         "val": "test"}]}},
+            {"id": "http://purl.obolibrary.org/obo/TST_002", "lbl": "bristle", "type": "CLASS"},
+            {"id": "http://purl.obolibrary.org/obo/BFO_0000050", "lbl": "part of",
+             "type": "PROPERTY",
+             "meta": {"basicPropertyValues": [
+               {"pred": "http://www.geneontology.org/formats/oboInOwl#shorthand",
+                "val": "part_of"}]}}
+          ]
+        }]}
+    """).encode('utf-8')
+
+    def test_document(self):
+        """Check nodes and edges are parsed whatever the size of the chunks.
+        """
+        for chunk_size in (1, 7, self.parser.chunk_size):
+            with utils.mock.patch.object(self.parser, 'chunk_size', chunk_size):
+                m,t,i = self.parser.parse(six.BytesIO(self.document))
+            self.assertEqual(m, {'ontology': ['tst']})
+            self.assertEqual(list(t), ['TST:001', 'TST:002'])
+            self.assertEqual(t["TST:001"].name, u"Bürste")
+            self.assertEqual(t['TST:001'].desc.xref, ('PMID:1',))
+            self.assertEqual(t['TST:001'].synonyms, {pronto.Synonym('brosse', 'EXACT')})
+            self.assertEqual(t['TST:001'].other, {
+                'namespace': ['test'], 'subset': ['slim'], 'is_obsolete': ['true']})
+            self.assertEqual(t['TST:002'].relations, {
+                pronto.Relationship('is_a'): ['TST:001'],
+                pronto.Relationship('part_of'): ['TST:001'],
+            })
+
+    def test_hook(self):
+        self.assertTrue(self.parser.hook(path='hp.json.gz'))
+        self.assertTrue(self.parser.hook(lookup=self.document[:1024]))
+        self.assertFalse(self.parser.hook(lookup=b'format-version: 1.2'))
+        ontology = pronto.Ontology(six.BytesIO(self.document), False)
+        self.assertEqual(ontology._parsed_by, 'OboJSONParser')
+        self.assertIn('TST:002', ontology['TST:001'].children)
+
+    def test_malformed(self):
+        for document in (b'{"graphs": [{"nodes": [{"id": "x"}]]}', b'{"graphs": [', b'[]'):
+            self.assertRaises(ValueError, self.parser.parse, six.BytesIO(document))
+
+
+
 def setUpModule():
     warnings.simplefilter('ignore')
 
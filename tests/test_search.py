@@ -0,0 +1,152 @@
+# coding: utf-8
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+### DEPS
+import os
+import shutil
+import tempfile
+import textwrap
+import unittest
+import warnings
+
+import six
+
+from . import utils
+import pronto
+import pronto.search
+from pronto.search import SearchIndex
+
+
+def labels(ontology, fields=('name', 'synonym')):
+    """Iterate over the case-folded labels of an ontology and their terms.
+    """
+    fold = pronto.lookup._casefold
+    for term in ontology:
+        if 'name' in fields and term.name:
+            yield fold(term.name), term.id, 'name'
+        if 'synonym' in fields:
+            for synonym in term.synonyms:
+                yield fold(synonym.desc), term.id, 'synonym'
+        if 'desc' in fields and term.desc:
+            yield fold(six.text_type(term.desc)), term.id, 'desc'
+
+
+def best_scores(ontology, text, fields=('name', 'synonym')):
+    """Score each term by comparing the trigrams of its labels to a text.
+    """
+    query = pronto.search._trigrams(pronto.lookup._casefold(text))
+    best = {}
+    for label, id, field in labels(ontology, fields):
+        grams = pronto.search._trigrams(label)
+        common = len(query & grams)
+        if field == 'desc':
+            score = common / len(query) / 2
+        else:
+            score = 2 * common / (len(query) + len(grams))
+        if common:
+            best[id] = max(best.get(id, 0), score)
+    return sorted(best.values(), reverse=True)
+
+
+### TESTS
+class TestProntoSearchIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.simplefilter('ignore')
+        cls.hpo = pronto.Ontology(os.path.join(utils.DATADIR, "hpo.obo.gz"), False)
+        cls.uo = pronto.Ontology(os.path.join(utils.DATADIR, "uo.obo"), False)
+        cls.queries = ['Abnormalty of the hert', 'increased heart size', 'Kidney',
+                       'xyz', 'ß', 'a', 'Seizure', 'microcephali']
+
+    @classmethod
+    def tearDownClass(cls):
+        warnings.simplefilter(warnings.defaultaction)
+
+    def check_fuzzy(self, index, ontology, fields=('name', 'synonym')):
+        for text in self.queries:
+            scores = best_scores(ontology, text, fields)
+            for threshold in (0.0, 0.3, 0.8):
+                hits = index.fuzzy(text, 10, threshold)
+                expected = [score for score in scores if score >= threshold][:10]
+                self.assertEqual([round(hit.score, 9) for hit in hits],
+                                 [round(score, 9) for score in expected])
+                self.assertEqual(len(set(hit.id for hit in hits)), len(hits))
+
+    def test_fuzzy(self):
+        self.check_fuzzy(self.hpo.search_index(), self.hpo)
+        hit = self.hpo.search_index().fuzzy('Abnormalty of the hert', 1)[0]
+        self.assertEqual((hit.id, hit.label, hit.field), ('HP:0001627', 'Abnormality of the heart', 'synonym'))
+
+    def test_fuzzy_definitions(self):
+        fields = SearchIndex.FIELDS
+        index = SearchIndex(self.hpo, fields)
+        self.check_fuzzy(index, self.hpo, fields)
+
+    def test_fuzzy_without_numpy(self):
+        with utils.mock.patch.object(pronto.search, 'numpy', None):
+            index = SearchIndex(self.hpo)
+            self.assertIsNotNone(index._postings)
+            self.check_fuzzy(index, self.hpo)
+        self.assertEqual(index.fuzzy('Seizures'), self.hpo.search_index().fuzzy('Seizures'))
+
+    def test_prefix(self):
+        index = self.hpo.search_index()
+        for text in ['abn', 'Kid', 'ß', 'seizure', 'zzzz', '']:
+            key = pronto.lookup._casefold(text)
+            expected = {}
+            for label, id, _ in labels(self.hpo):
+                if label.startswith(key):
+                    expected[id] = min(expected.get(id, len(label)), len(label))
+            hits = index.prefix(text, 20)
+            self.assertEqual([len(key) / n for n in sorted(expected.values())[:20]],
+                             [hit.score for hit in hits])
+            for hit in hits:
+                self.assertTrue(pronto.lookup._casefold(hit.label).startswith(key))
+        self.assertEqual(index.prefix('Seizures', 1)[0].label, 'Seizures')
+
+    def test_prefix_without_numpy(self):
+        expected = self.uo.search_index().prefix('kilo', 20)
+        with utils.mock.patch.object(pronto.search, 'numpy', None):
+            self.assertEqual(SearchIndex(self.uo).prefix('kilo', 20), expected)
+
+    def test_invalidation(self):
+        uo = pronto.Ontology(os.path.join(utils.DATADIR, "uo.obo"), False)
+        index = uo.search_index()
+        self.assertIs(uo.search_index(), index)
+        self.assertIsNot(uo.search_index(['name']), index)
+        uo.include(pronto.Term('TST:001', 'kilogrammes'))
+        self.assertEqual(uo.search('kilogrammes', 1).id, ['TST:001'])
+        self.assertEqual(uo.search_index().fields, ('name', 'synonym'))
+
+    def test_resolve_imports(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for name, text in [("dep.obo", """
+                [Term]
+                id: TST:001
+                name: beta
+            """), ("main.obo", """
+                import: dep.obo
+
+                [Term]
+                id: TST:002
+                name: alpha
+            """)]:
+                with open(os.path.join(tmpdir, name), 'w') as f:
+                    f.write(textwrap.dedent(text).lstrip())
+            ont = pronto.Ontology(os.path.join(tmpdir, "main.obo"), False)
+            self.assertEqual(ont.search('bet'), [])
+            ont.resolve_imports(True, -1)
+            self.assertEqual(ont.search('bet').id, ['TST:001'])
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_fields(self):
+        self.assertRaises(ValueError, SearchIndex, self.uo, ['label'])
+        self.assertEqual(SearchIndex([]).fuzzy('kilogram'), [])
+        self.assertEqual(SearchIndex([]).prefix('kilogram'), [])
+        index = SearchIndex(self.uo, ['synonym'])
+        self.assertTrue(all(hit.field == 'synonym' for hit in index.fuzzy('kilogram')))
@@ -0,0 +1,122 @@
+# coding: utf-8
+from __future__ import absolute_import
+from __future__ import division
+
+### DEPS
+import math
+import unittest
+import warnings
+
+from . import utils
+import pronto
+import pronto.similarity
+
+
+### TESTS
+class TestProntoSimilarityIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.simplefilter('ignore')
+        cls.cmo = pronto.Ontology("tests/resources/cmo.obo", False)
+        cls.index = cls.cmo.similarity()
+        cls.ids = list(cls.cmo.terms)[::37]
+
+    @classmethod
+    def tearDownClass(cls):
+        warnings.simplefilter(warnings.defaultaction)
+
+    def lineage(self, id):
+        return {id} | set(self.cmo[id].rparents().id)
+
+    def test_information_content(self):
+        for id in self.ids:
+            count = 1 + len(self.cmo[id].rchildren())
+            self.assertAlmostEqual(self.index.information_content(id),
+                                   -math.log(count / len(self.cmo)))
+
+    def test_pairs(self):
+        ic = self.index.information_content
+        for id in self.ids:
+            for other in self.ids:
+                common = self.lineage(id) & self.lineage(other)
+                expected = max([ic(x) for x in common] or [0.0])
+                self.assertAlmostEqual(self.index.resnik(id, other), expected)
+                if common:
+                    self.assertAlmostEqual(ic(self.index.mica(id, other)), expected)
+                else:
+                    self.assertIsNone(self.index.mica(id, other))
+                total = ic(id) + ic(other)
+                self.assertAlmostEqual(self.index.lin(id, other),
+                                       2 * expected / total if total else 1.0)
+                self.assertAlmostEqual(self.index.jiang_conrath(id, other),
+                                       1 / (1 + total - 2 * expected))
+
+    def test_annotations(self):
+        ont = pronto.Ontology()
+        is_a = pronto.Relationship('is_a')
+        ont.include(
+            pronto.Term('TST:001', 'root'),
+            pronto.Term('TST:002', 'a', relations={is_a: ['TST:001']}),
+            pronto.Term('TST:003', 'b', relations={is_a: ['TST:001']}),
+            pronto.Term('TST:004', 'c', relations={is_a: ['TST:002']}),
+        )
+        corpus = {'x': ['TST:004'], 'y': ['TST:002', 'TST:004'], 'z': ['TST:003'],
+                  'w': ['TST:005']}
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            index = ont.similarity(corpus)
+        self.assertTrue(any(issubclass(x.category, pronto.utils.ProntoWarning) for x in w))
+        self.assertAlmostEqual(index.information_content('TST:001'), 0.0)
+        self.assertAlmostEqual(index.information_content('TST:002'), -math.log(2 / 3))
+        self.assertAlmostEqual(index.information_content('TST:003'), -math.log(1 / 3))
+        self.assertEqual(index.mica('TST:004', 'TST:002'), 'TST:002')
+        self.assertEqual(index.mica('TST:004', 'TST:003'), 'TST:001')
+        self.assertEqual(ont.similarity(corpus.values()).ic.tolist(), index.ic.tolist())
+
+    @unittest.skipIf(pronto.similarity.numpy is None, "numpy unavailable")
+    def test_similarity_matrix(self):
+        for method in self.index.methods:
+            scalar = getattr(self.index, method)
+            matrix = self.index.similarity_matrix(self.ids, self.ids[::-2], method)
+            self.assertEqual(matrix.shape, (len(self.ids), len(self.ids[::-2])))
+            for i, id in enumerate(self.ids):
+                for j, other in enumerate(self.ids[::-2]):
+                    self.assertAlmostEqual(matrix[i, j], scalar(id, other))
+        self.assertRaises(ValueError, self.index.similarity_matrix, self.ids, None, 'cosine')
+
+    @unittest.skipIf(pronto.similarity.numpy is None, "numpy unavailable")
+    def test_similarity_matrix_blocks(self):
+        expected = self.index.similarity_matrix(self.ids)
+        with utils.mock.patch.object(pronto.similarity._Kernel, '_BLOCK', 1):
+            self.assertEqual(self.index.similarity_matrix(self.ids).tolist(), expected.tolist())
+
+    @unittest.skipIf(pronto.similarity.numpy is None, "numpy unavailable")
+    def test_group_similarity(self):
+        groups = [self.ids[i:i+3] for i in range(0, len(self.ids), 2)]
+        others = [self.ids[i:i+4] for i in range(1, len(self.ids), 3)]
+        for method in self.index.methods:
+            scores = self.index.group_similarity(groups, others, method)
+            self.assertEqual(scores.shape, (len(groups), len(others)))
+            for i, group in enumerate(groups):
+                for j, other in enumerate(others):
+                    matrix = self.index.similarity_matrix(group, other, method)
+                    expected = (matrix.max(axis=1).mean() + matrix.max(axis=0).mean()) / 2
+                    self.assertAlmostEqual(scores[i, j], expected)
+            self.assertAlmostEqual(self.index.best_match_average(groups[1], others[2], method),
+                                   scores[1, 2])
+        self.assertRaises(ValueError, self.index.group_similarity, [[]], others)
+
+    @unittest.skipIf(pronto.similarity.numpy is None, "numpy unavailable")
+    def test_group_similarity_processes(self):
+        groups = [self.ids[i:i+3] for i in range(len(self.ids))]
+        expected = self.index.group_similarity(groups, method='lin')
+        scores = self.index.group_similarity(groups, method='lin', processes=2)
+        self.assertEqual(scores.tolist(), expected.tolist())
+
+    def test_without_numpy(self):
+        with utils.mock.patch.object(pronto.similarity, 'numpy', None):
+            index = self.cmo.similarity()
+            self.assertEqual(index.resnik(self.ids[1], self.ids[2]),
+                             self.index.resnik(self.ids[1], self.ids[2]))
+            self.assertRaises(ImportError, index.similarity_matrix, self.ids)
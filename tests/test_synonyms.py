@@ -13,8 +13,11 @@ import gzip
 import os.path as op
 import warnings
 import textwrap
+import pickle
 
 from . import utils
+import pronto
+import pronto.description
 import pronto.synonym
 
 
@@ -77,7 +80,7 @@ class TestProntoSynonym(unittest.TestCase):
     def assertOk(self, synonym, scope, synonymtype=None):
         self.assertEqual(synonym.desc, "The other white meat")
         self.assertEqual(synonym.scope, scope)
-        self.assertEqual(synonym.xref, ['MEAT:00324', 'BACONBASE:03021'])
+        self.assertEqual(synonym.xref, ('MEAT:00324', 'BACONBASE:03021'))
         if synonymtype is not None:
             self.assertEqual(synonym.syn_type, synonymtype)
 
@@ -159,3 +162,49 @@ class TestProntoSynonym(unittest.TestCase):
             synonym = pronto.synonym.Synonym(
                 "The other white meat", "BROAD", "WRONG_TYPE", ["MEAT:00324", "BACONBASE:03021"],
         )
+
+    def test_hash_cache(self):
+        synonym = pronto.synonym.Synonym(
+            "The other white meat", "BROAD", None, ["MEAT:00324", "BACONBASE:03021"],
+        )
+        self.assertFalse(hasattr(synonym, '__dict__'))
+        self.assertEqual(hash(synonym), synonym._hash)
+        synonym.scope = "EXACT"
+        self.assertIsNone(synonym._hash)
+        self.assertEqual(hash(synonym), hash(pronto.synonym.Synonym(
+            "The other white meat", "EXACT", None, ["MEAT:00324", "BACONBASE:03021"],
+        )))
+        synonym.xref += ("MEAT:00325",)
+        self.assertIsNone(synonym._hash)
+        self.assertEqual(hash(synonym), hash(pronto.synonym.Synonym(
+            "The other white meat", "EXACT", None, ["MEAT:00324", "BACONBASE:03021", "MEAT:00325"],
+        )))
+
+    def test_pickle(self):
+        synonym = pronto.synonym.Synonym.from_obo(
+            '"The other white meat" EXACT [MEAT:00324, BACONBASE:03021]'
+        )
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(synonym, protocol))
+            self.assertEqual(copy, synonym)
+            self.assertEqual(hash(copy), hash(synonym))
+
+
+class TestProntoSharedValues(unittest.TestCase):
+
+    def test_shared_xrefs(self):
+        ms = pronto.Ontology(op.join(utils.DATADIR, "psi-ms.obo"), False)
+        xrefs = {}
+        for term in ms:
+            self.assertIs(xrefs.setdefault(term.desc.xref, term.desc.xref), term.desc.xref)
+            for synonym in term.synonyms:
+                self.assertIs(xrefs.setdefault(synonym.xref, synonym.xref), synonym.xref)
+        self.assertIn(('PSI:MS',), xrefs)
+
+    def test_description_pickle(self):
+        desc = pronto.description.Description("A description", ["PMID:1"])
+        self.assertFalse(hasattr(desc, '__dict__'))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(desc, protocol))
+            self.assertEqual(copy, desc)
+            self.assertEqual(copy.xref, ('PMID:1',))
@@ -31,3 +31,7 @@ sys.path.insert(0, MAINDIR)
 # Launch a stub HTTP server to server local files
 from .stubs import StubHTTPServer
 StubHTTPServer(DATADIR).start()
+
+# Do not keep the files downloaded from the stub server
+import pronto.fetch
+pronto.fetch.default_fetcher = pronto.fetch.Fetcher(cache=False)